@@ -1,23 +1,44 @@
 from abc import ABC, abstractmethod
-from typing import Any, Optional, List, Dict
-from pydantic import BaseModel, Field
+from typing import Any, Optional, List, Dict, Generator
+from pydantic import BaseModel, ConfigDict, Field, field_serializer, field_validator
 from loguru import logger
 import json
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
 from langfuse import observe
 
 from llm.base import LLMClient
 from tools.registry import ToolRegistry
+from .checkpoint import CheckpointLog
+from .context import ContextWindowManager
+from .history import MessageHistory
 
 
 class BaseAgentState(BaseModel):
     """
     Holds the evolving state of an agent's execution.
+    messages is a MessageHistory (a list[dict] with a role index), plain lists are converted
+    on construction. It is append-only during a run: the request payload is fitted
+    from it every turn (Agent.prompt_messages), the history itself is never rebuilt.
     """
-    messages: list[dict] = Field(default_factory=list)
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    messages: MessageHistory = Field(default_factory=MessageHistory)
     scratchpad: list[str] = Field(default_factory=list)
     is_finished: bool = False
     iteration: int = 0
 
+    @field_validator("messages", mode="before")
+    @classmethod
+    def _to_history(cls, value):
+        return value if isinstance(value, MessageHistory) else MessageHistory(value or [])
+
+    @field_serializer("messages")
+    def _serialize_messages(self, messages: MessageHistory) -> list[dict]:
+        return list(messages)
+
     def add_message(self, role: str, content: str, **extra):
         msg = {"role": role, "content": content}
         # extra for example tool_id
@@ -49,28 +70,43 @@ def prune_messages(
     Keep minimal context: system + last user + last_n other messages.
     When drop_tools=True, tool role messages are removed before pruning
     so summaries can live in the scratchpad instead of raw tool outputs.
+    Uses the role index of MessageHistory -> O(last_n) for agent states.
     """
-    filtered_messages = (
-        [m for m in messages if m.get("role") != "tool"] if drop_tools else messages
+    history = messages if isinstance(messages, MessageHistory) else MessageHistory(messages)
+    return history.window(
+        keep_system=keep_system, keep_user=keep_user, last_n=last_n, drop_tools=drop_tools
     )
 
-    system_msgs = (
-        [m for m in filtered_messages if m.get("role") == "system"]
-        if keep_system
-        else []
-    )
-    user_msgs = (
-        [m for m in filtered_messages if m.get("role") == "user"] if keep_user else []
-    )
-    other = [m for m in filtered_messages if m.get("role") not in {"system", "user"}]
-    trimmed_other = other[-last_n:] if last_n > 0 else []
-    return system_msgs + user_msgs[-1:] + trimmed_other
-
 class Agent(ABC):
-    def __init__( self, llm: LLMClient, tool_registry: ToolRegistry, max_iterations: int = 100):
+    def __init__(
+        self,
+        llm: LLMClient,
+        tool_registry: ToolRegistry,
+        max_iterations: int = 100,
+        max_tool_workers: int = 4,
+        context_manager: Optional[ContextWindowManager] = None,
+        speculative_tools: bool = False,
+        checkpoint_path: Optional[str] = None,
+    ):
         self.llm = llm
         self.tool_registry = tool_registry
         self.max_iterations = max_iterations
+        # token budget for every request (derived from llm.config when not given)
+        self.context_manager = context_manager or ContextWindowManager.from_config(getattr(llm, "config", None))
+        # thread pool used to run independent tool calls of the same turn concurrently
+        self.max_tool_workers = max_tool_workers
+        self._tool_executor: Optional[ThreadPoolExecutor] = None
+        # tool name -> semaphore capping its concurrent calls (filled from Tool.max_concurrency);
+        # pre-populate it with shared semaphores to cap a tool across several agents
+        self.tool_limits: Dict[str, threading.Semaphore] = {}
+        self._tool_limits_lock = threading.Lock()
+        # opt-in: stream responses and start side-effect-free tools before the response is complete
+        self.speculative_tools = speculative_tools
+        self._speculative: Dict[str, tuple] = {}  # tool_call id -> (arguments, Future)
+        # append-only state log (agent/checkpoint.py) written after every step -> resume() after a crash
+        self.checkpoint_path = checkpoint_path
+        # leave raw tool results out of the request (e.g. when they are summarized in a scratchpad)
+        self.drop_tool_messages = False
         # initial state to start with
         self.inital_state = BaseAgentState()
 
@@ -84,19 +120,168 @@ class Agent(ABC):
         """ Run 1 Step/Iteration """
         raise NotImplementedError()
 
-    def iterate(self, *args, **kwargs) -> BaseAgentState:
-        state = self.start_point(*args, **kwargs)
+    def respond(self, state: BaseAgentState, response: dict) -> Generator[List[dict], List[dict], BaseAgentState]:
+        """
+        Apply one LLM response to the state as a generator: yield every batch of
+        tool calls, get their results back (same order), return the new state.
+        e.g. `results = yield planned_calls`
+        handle_response runs the batches with call_tools, ahandle_response awaits acall_tools.
+        """
+        raise NotImplementedError()
+
+    def handle_response(self, state: BaseAgentState, response: dict) -> BaseAgentState:
+        """ Apply one LLM response to the state (tool calls etc...) -> drives `respond` """
+        steps = self.respond(state, response)
+        try:
+            tool_calls = next(steps)
+            while True:
+                tool_calls = steps.send(self.call_tools(tool_calls))
+        except StopIteration as stop:
+            return stop.value
+
+    async def ahandle_response(self, state: BaseAgentState, response: dict) -> BaseAgentState:
+        """
+        Async counterpart of handle_response: tool calls of `respond` go through acall_tools.
+        An agent that only overrides handle_response runs it in a worker thread.
+        """
+        if not self._overrides("respond"):
+            return await asyncio.to_thread(self.handle_response, state, response)
+        steps = self.respond(state, response)
+        try:
+            tool_calls = next(steps)
+            while True:
+                tool_calls = steps.send(await self.acall_tools(tool_calls))
+        except StopIteration as stop:
+            return stop.value
+
+    def _overrides(self, name: str) -> bool:
+        return getattr(type(self), name) is not getattr(Agent, name)
+
+    async def arun(self, state: BaseAgentState) -> BaseAgentState:
+        """
+        Async Step/Iteration: await the LLM, then apply the response with
+        ahandle_response (async tools are awaited, blocking ones take a worker thread).
+        Falls back to running the whole sync `run` in a thread when the agent
+        implements neither `respond` nor `handle_response`, or uses speculative_tools.
+        """
+        if not (self._overrides("respond") or self._overrides("handle_response")) or self.speculative_tools:
+            # speculation consumes a sync stream and starts tools from it -> whole step in a thread
+            return await asyncio.to_thread(self.run, state)
+        response = (await self.allm_generate(state))[0]
+        return await self.ahandle_response(state, response)
+
+    def _open_checkpoint(self, state: BaseAgentState, checkpoint: Optional[CheckpointLog] = None):
+        if checkpoint is None and self.checkpoint_path:
+            checkpoint = CheckpointLog(self.checkpoint_path)
+            checkpoint.start(state)
+        return checkpoint
+
+    def _loop(self, state: BaseAgentState, checkpoint: Optional[CheckpointLog]) -> BaseAgentState:
         while not state.is_finished and state.iteration < self.max_iterations:
             state.iteration += 1
             state = self.run(state)
+            if checkpoint is not None:
+                checkpoint.step(state)
 
         return state
 
+    async def _aloop(self, state: BaseAgentState, checkpoint: Optional[CheckpointLog]) -> BaseAgentState:
+        while not state.is_finished and state.iteration < self.max_iterations:
+            state.iteration += 1
+            state = await self.arun(state)
+            if checkpoint is not None:
+                await asyncio.to_thread(checkpoint.step, state)
+
+        return state
+
+    def iterate(self, *args, **kwargs) -> BaseAgentState:
+        state = self.start_point(*args, **kwargs)
+        return self._loop(state, self._open_checkpoint(state))
+
+    async def aiterate(self, *args, **kwargs) -> BaseAgentState:
+        """ Async sibling of iterate -> one event loop can drive many agents """
+        state = self.start_point(*args, **kwargs)
+        return await self._aloop(state, self._open_checkpoint(state))
+
+    def _load_checkpoint(self, checkpoint: Optional[str]):
+        path = checkpoint or self.checkpoint_path
+        if not path:
+            raise ValueError("resume() needs a checkpoint path (argument or agent.checkpoint_path)")
+        log = CheckpointLog(path)
+        state = log.load()
+        logger.info(f"Resuming from {path} at iteration {state.iteration}")
+        return state, log
+
+    def resume(self, checkpoint: Optional[str] = None) -> BaseAgentState:
+        """ Continue from the last step stored in a checkpoint log (new steps are appended to it) """
+        state, log = self._load_checkpoint(checkpoint)
+        return self._loop(state, log)
+
+    async def aresume(self, checkpoint: Optional[str] = None) -> BaseAgentState:
+        state, log = self._load_checkpoint(checkpoint)
+        return await self._aloop(state, log)
+
     # LLM WRAPPER
+    def prompt_messages(self, state: BaseAgentState) -> list[dict]:
+        """ messages sent to the llm: history fitted into the token budget (tool schemas reserved) """
+        tools_json = self.tool_registry.to_client_tools_json(self.llm.config.provider)
+        return self.context_manager.fit(
+            state.messages,
+            reserved_tokens=self.context_manager.tokenizer(tools_json),
+            drop_tools=self.drop_tool_messages,
+        )
+
     @observe(name="llm-call", as_type="generation")
     def llm_generate(self, state: BaseAgentState):
         tools = self.tool_registry.to_client_tools(self.llm.config.provider)
-        return self.llm.generate(state.messages, tools=tools)
+        return self.llm.generate(self.prompt_messages(state), tools=tools)
+
+    def llm_stream(self, state: BaseAgentState):
+        """ typed stream events (llm/streaming.py) for the current state """
+        tools = self.tool_registry.to_client_tools(self.llm.config.provider)
+        return self.llm.stream(self.prompt_messages(state), tools=tools)
+
+    def generate_response(self, state: BaseAgentState) -> dict:
+        """
+        One LLM response for the state.
+        With speculative_tools the response is streamed and every side-effect-free
+        tool call starts as soon as its arguments are complete (as long as all calls
+        before it are side-effect-free too). call_tools then reuses those results.
+        If the stream fails, speculative results are discarded.
+        """
+        if not self.speculative_tools:
+            return self.llm_generate(state)[0]
+        return self.llm_generate_speculative(state)
+
+    @observe(name="llm-call", as_type="generation")
+    def llm_generate_speculative(self, state: BaseAgentState) -> dict:
+        """ streamed llm call of generate_response (speculative_tools) """
+        self._discard_speculative()
+        speculating = True
+        try:
+            for event in self.llm_stream(state):
+                event_type = event.get("type") if isinstance(event, dict) else None
+                if event_type == "tool_call_done":
+                    tool_call = event["tool_call"]
+                    tool = self._lookup_tool(tool_call)
+                    arguments = self._parse_arguments(tool_call)
+                    if (speculating and tool is not None and arguments is not None and tool_call.get("id")
+                            and tool.is_side_effect_free(arguments)):
+                        self._speculate(tool, tool_call, arguments)
+                    else:
+                        # a later call could depend on this one's side effects
+                        speculating = False
+                elif event_type == "done":
+                    return event["message"]
+            raise ValueError("LLM stream ended without a `done` event")
+        except BaseException:
+            self._discard_speculative()
+            raise
+
+    @observe(name="llm-call", as_type="generation")
+    async def allm_generate(self, state: BaseAgentState):
+        tools = self.tool_registry.to_client_tools(self.llm.config.provider)
+        return await self.llm.agenerate(self.prompt_messages(state), tools=tools)
     # TOOL EXECUTION WRAPPER
     @observe(name="tool-call", as_type="tool")
     def call_tool(self, tool_call):
@@ -109,27 +294,215 @@ class Agent(ABC):
           "function": { "name": "...", "arguments": {... or json str ...} }
         }
         """
-        if tool_call.get("type") != "function":
-            return {"success": False, "error": f"Unsupported tool_call type {tool_call.get('type')}"}
+        func_name, func_inputs, error = self._prepare_call(tool_call)
+        if error is not None:
+            return error
 
-        func_name = tool_call["function"]["name"]
-        args_raw = tool_call["function"].get("arguments", {}) or {}
+        try:
+            func = self.tool_registry.get(func_name)
+            if func is None:
+                raise ValueError(f"Tool {func_name} not found")
+            logger.debug(f"Calling tool {func_name} with {func_inputs}")
+            result = func(**func_inputs)
+            return {"success": True, "result": result}
+        except Exception as e:
+            logger.exception(f"Tool {func_name} failed")
+            return {"success": False, "error": str(e)}
 
-        if isinstance(args_raw, str):
-            try:
-                func_inputs = json.loads(args_raw)
-            except Exception as e:
-                return {"success": False, "error": f"Invalid JSON arguments: {e}"}
-        else:
-            func_inputs = args_raw
+    @observe(name="tool-call", as_type="tool")
+    async def acall_tool(self, tool_call):
+        """ Async counterpart of call_tool: awaits Tool.acall (async tools run on their event loop) """
+        func_name, func_inputs, error = self._prepare_call(tool_call)
+        if error is not None:
+            return error
 
         try:
             func = self.tool_registry.get(func_name)
             if func is None:
                 raise ValueError(f"Tool {func_name} not found")
             logger.debug(f"Calling tool {func_name} with {func_inputs}")
-            result = func(**func_inputs)
+            result = await func.acall(**func_inputs)
             return {"success": True, "result": result}
         except Exception as e:
             logger.exception(f"Tool {func_name} failed")
             return {"success": False, "error": str(e)}
+
+    @staticmethod
+    def _prepare_call(tool_call: dict):
+        """ (name, parsed arguments, error result or None) of a tool call """
+        if tool_call.get("type") != "function":
+            return None, None, {"success": False, "error": f"Unsupported tool_call type {tool_call.get('type')}"}
+
+        func_name = tool_call["function"]["name"]
+        args_raw = tool_call["function"].get("arguments", {}) or {}
+
+        if isinstance(args_raw, str):
+            try:
+                return func_name, json.loads(args_raw), None
+            except Exception as e:
+                return func_name, None, {"success": False, "error": f"Invalid JSON arguments: {e}"}
+        return func_name, args_raw, None
+
+    # PARALLEL TOOL EXECUTION
+    def call_tools(self, tool_calls: List[dict]) -> List[dict]:
+        """
+        Execute all tool calls of one LLM turn and return their results in the
+        original tool_call order.
+
+        Independent calls run concurrently on a thread pool. A tool marked
+        `serial=True` acts as a barrier: every call before it finishes first,
+        it runs alone on the calling thread, then the next batch starts.
+        `max_concurrency` on a tool caps how many of its calls run at once.
+        """
+        results: List[Optional[dict]] = [None] * len(tool_calls)
+        batch: List[int] = []
+        speculated: Dict[int, Future] = {}
+
+        def flush():
+            for i, future in speculated.items():
+                results[i] = future.result()
+            speculated.clear()
+            if len(batch) == 1 or self.max_tool_workers <= 1:
+                for i in batch:
+                    results[i] = self._call_tool_limited(tool_calls[i])
+            elif batch:
+                executor = self._get_tool_executor()
+                futures = {
+                    # copy context so langfuse traces nest under the current span
+                    i: executor.submit(contextvars.copy_context().run, self._call_tool_limited, tool_calls[i])
+                    for i in batch
+                }
+                for i, future in futures.items():
+                    results[i] = future.result()
+            batch.clear()
+
+        for i, tool_call in enumerate(tool_calls):
+            future = self._take_speculative(tool_call)
+            if future is not None:
+                speculated[i] = future
+                continue
+            tool = self._lookup_tool(tool_call)
+            if tool is None or tool.serial:
+                flush()
+                results[i] = self._call_tool_limited(tool_call)
+            else:
+                batch.append(i)
+        flush()
+        return results
+
+    async def acall_tools(self, tool_calls: List[dict]) -> List[dict]:
+        """
+        Async counterpart of call_tools (same order, `serial` barriers and
+        `max_concurrency` caps). Independent calls of a batch are gathered:
+        async tools are awaited through Tool.acall, only blocking sync tools
+        take a thread of the agent's tool pool.
+        """
+        results: List[Optional[dict]] = [None] * len(tool_calls)
+        batch: List[int] = []
+
+        async def flush():
+            batch_results = await asyncio.gather(*(self._acall_tool_limited(tool_calls[i]) for i in batch))
+            for i, result in zip(batch, batch_results):
+                results[i] = result
+            batch.clear()
+
+        for i, tool_call in enumerate(tool_calls):
+            tool = self._lookup_tool(tool_call)
+            if tool is None or tool.serial:
+                await flush()
+                results[i] = await self._acall_tool_limited(tool_call)
+            else:
+                batch.append(i)
+        await flush()
+        return results
+
+    @staticmethod
+    def _parse_arguments(tool_call: dict) -> Optional[dict]:
+        args_raw = tool_call.get("function", {}).get("arguments", {}) or {}
+        if isinstance(args_raw, str):
+            try:
+                return json.loads(args_raw)
+            except Exception:
+                return None
+        return args_raw
+
+    def _speculate(self, tool, tool_call: dict, arguments: dict):
+        tool_call = {**tool_call, "function": {**tool_call["function"], "arguments": arguments}}
+        if tool.serial:
+            # thread-bound tools run inline: the server keeps generating meanwhile
+            future = Future()
+            future.set_result(self._call_tool_limited(tool_call))
+        else:
+            future = self._get_tool_executor().submit(
+                contextvars.copy_context().run, self._call_tool_limited, tool_call
+            )
+        logger.debug(f"Speculatively started tool {tool.name} ({tool_call.get('id')})")
+        self._speculative[tool_call["id"]] = (arguments, future)
+
+    def _take_speculative(self, tool_call: dict) -> Optional[Future]:
+        """ speculative result for this call if it ran with the same arguments """
+        entry = self._speculative.pop(tool_call.get("id"), None) if tool_call.get("id") else None
+        if entry is None:
+            return None
+        arguments, future = entry
+        if self._parse_arguments(tool_call) != arguments:
+            # the agent rewrote the arguments (e.g. normalized a path) -> run it again
+            return None
+        return future
+
+    def _discard_speculative(self):
+        for _, future in self._speculative.values():
+            future.cancel()
+        self._speculative.clear()
+
+    def _lookup_tool(self, tool_call: dict):
+        if tool_call.get("type") != "function":
+            return None
+        return self.tool_registry.get(tool_call.get("function", {}).get("name"))
+
+    def _tool_semaphore(self, tool) -> Optional[threading.Semaphore]:
+        with self._tool_limits_lock:
+            semaphore = self.tool_limits.get(tool.name)
+            if semaphore is None and tool.max_concurrency:
+                semaphore = threading.BoundedSemaphore(tool.max_concurrency)
+                self.tool_limits[tool.name] = semaphore
+        return semaphore
+
+    def _call_tool_limited(self, tool_call: dict) -> dict:
+        tool = self._lookup_tool(tool_call)
+        semaphore = self._tool_semaphore(tool) if tool is not None else None
+        if semaphore is None:
+            return self.call_tool(tool_call)
+        with semaphore:
+            return self.call_tool(tool_call)
+
+    async def _acall_tool_limited(self, tool_call: dict) -> dict:
+        tool = self._lookup_tool(tool_call)
+        if tool is None or not tool.is_async:
+            # blocking call -> tool pool thread (copy context so langfuse traces nest)
+            return await asyncio.get_running_loop().run_in_executor(
+                self._get_tool_executor(), contextvars.copy_context().run, self._call_tool_limited, tool_call
+            )
+        semaphore = self._tool_semaphore(tool)
+        if semaphore is None:
+            return await self.acall_tool(tool_call)
+        # the limits are thread semaphores (shared with sync agents) -> only wait in a thread when full
+        if not semaphore.acquire(blocking=False):
+            await asyncio.to_thread(semaphore.acquire)
+        try:
+            return await self.acall_tool(tool_call)
+        finally:
+            semaphore.release()
+
+    def _get_tool_executor(self) -> ThreadPoolExecutor:
+        if self._tool_executor is None:
+            self._tool_executor = ThreadPoolExecutor(
+                max_workers=self.max_tool_workers, thread_name_prefix="agent-tool"
+            )
+        return self._tool_executor
+
+    def shutdown(self):
+        """Release the tool thread pool (the agent can still be used afterwards)."""
+        if self._tool_executor is not None:
+            self._tool_executor.shutdown(wait=True)
+            self._tool_executor = None
@@ -0,0 +1,217 @@
+import asyncio
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from llm.base import LLMClient
+from .base import Agent
+from .unit_tester.v2_scratchpad import ScratchpadUnitTesterAgent
+
+
+DEFAULT_QUERY = """
+Write pytest unit tests for: {target}
+- Write tests to a single file under {output_dir} named test_{name}.py.
+- You may mock external/browser/network interactions as needed; focus on verifying our code paths (no real network/HTTP calls).
+- Use pytest functions (no unittest.main). Add sys.path.append(str(Path(__file__).resolve().parents[{root_depth}])) so imports work.
+- After writing the test file, run pytest in {output_dir} and report results. If imports fail or no tests collected, fix and retry.
+- Do not touch files outside {output_dir}.
+""".strip()
+
+
+class TargetResult(BaseModel):
+    """ Outcome of one agent run on one target module """
+    target: str
+    is_finished: bool = False
+    iterations: int = 0
+    wall_time: float = 0.0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    error: Optional[str] = None
+
+
+class BatchReport(BaseModel):
+    results: List[TargetResult]
+    wall_time: float
+
+    @property
+    def throughput(self) -> float:
+        """ targets per minute """
+        return len(self.results) / self.wall_time * 60 if self.wall_time else 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return sum(r.total_tokens for r in self.results)
+
+    def to_string(self) -> str:
+        lines = [
+            f"{'target':<45} {'done':<5} {'iters':>5} {'wall(s)':>8} {'llm':>4} {'prompt':>8} {'compl':>7} {'total':>8}"
+        ]
+        for r in self.results:
+            lines.append(
+                f"{r.target:<45} {str(r.is_finished):<5} {r.iterations:>5} {r.wall_time:>8.1f} "
+                f"{r.llm_calls:>4} {r.prompt_tokens:>8} {r.completion_tokens:>7} {r.total_tokens:>8}"
+                + (f"  error: {r.error}" if r.error else "")
+            )
+        lines.append(
+            f"{len(self.results)} targets in {self.wall_time:.1f}s -> "
+            f"{self.throughput:.2f} targets/min, {self.total_tokens} tokens"
+        )
+        return "\n".join(lines)
+
+
+class UsageTrackingClient(LLMClient):
+    """
+    Wraps a client for one agent:
+    - caps in-flight requests with a semaphore shared by every agent of the batch
+    - sums the token usage reported by the wrapped client (generate responses and
+      the `done` event of streams)
+    """
+
+    def __init__(self, llm: LLMClient, semaphore: asyncio.Semaphore, sync_semaphore: threading.Semaphore):
+        self.llm = llm
+        self.config = llm.config
+        self.langfuse_client = llm.langfuse_client
+        self._semaphore = semaphore
+        self._sync_semaphore = sync_semaphore
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+
+    def _track(self, response: list[dict]) -> list[dict]:
+        self.calls += 1
+        usage = (response[0].get("usage") if response else None) or {}
+        self.prompt_tokens += usage.get("prompt_tokens", 0)
+        self.completion_tokens += usage.get("completion_tokens", 0)
+        self.total_tokens += usage.get("total_tokens", 0)
+        return response
+
+    def generate(self, messages: List[dict[str, Any]], tools: Optional[list] = None) -> list[dict]:
+        with self._sync_semaphore:
+            return self._track(self.llm.generate(messages, tools=tools))
+
+    def _track_event(self, event):
+        # streamed responses (speculative_tools) report their usage on the final `done` event
+        if isinstance(event, dict) and event.get("type") == "done":
+            self._track([event["message"]])
+        return event
+
+    def stream(self, messages: List[dict[str, Any]], tools: Optional[list] = None):
+        with self._sync_semaphore:
+            for event in self.llm.stream(messages, tools=tools):
+                yield self._track_event(event)
+
+    async def agenerate(self, messages: List[dict[str, Any]], tools: Optional[list] = None) -> list[dict]:
+        async with self._semaphore:
+            return self._track(await self.llm.agenerate(messages, tools=tools))
+
+    async def astream(self, messages: List[dict[str, Any]], tools: Optional[list] = None):
+        async with self._semaphore:
+            async for event in self.llm.astream(messages, tools=tools):
+                yield self._track_event(event)
+
+
+def discover_targets(directory: str, pattern: str = "*.py") -> List[str]:
+    """ every module under directory (skips __init__.py) e.g. tools/toolkit/builtin """
+    return sorted(
+        p.as_posix() for p in Path(directory).glob(pattern) if p.name != "__init__.py"
+    )
+
+
+class BatchUnitTesterRunner:
+    """
+    Runs one unit-tester agent per target module concurrently on a single event loop.
+
+    Every target gets its own test directory under output_dir (see target_dirs).
+
+    Global caps shared by all agents:
+    - max_inflight_llm: LLM requests in flight at the same time
+    - max_pytest_processes: run_pytest_tests subprocesses at the same time
+    """
+
+    def __init__(
+        self,
+        llm: LLMClient,
+        agent_factory: Callable[..., Agent] = ScratchpadUnitTesterAgent,
+        max_iterations: int = 10,
+        max_inflight_llm: int = 4,
+        max_pytest_processes: int = 2,
+        output_dir: str = "tools/llm_tests",
+        query_template: str = DEFAULT_QUERY,
+    ):
+        self.llm = llm
+        self.agent_factory = agent_factory
+        self.max_iterations = max_iterations
+        self.max_inflight_llm = max_inflight_llm
+        self.max_pytest_processes = max_pytest_processes
+        self.output_dir = output_dir
+        self.query_template = query_template
+
+    def target_dirs(self, targets: List[str]) -> Dict[str, str]:
+        """
+        target -> its own test directory ({output_dir}/{module name}), so concurrent
+        agents never collect / run each other's test files
+        """
+        stems = Counter(Path(t).stem for t in targets)
+        dirs = {}
+        for target in targets:
+            path = Path(target)
+            # same module name in two packages -> prefix the package
+            name = path.stem if stems[path.stem] == 1 else f"{path.parent.name}_{path.stem}"
+            dirs[target] = (Path(self.output_dir) / name).as_posix()
+        return dirs
+
+    def build_query(self, target: str, output_dir: Optional[str] = None) -> str:
+        output_dir = output_dir or self.output_dir
+        return self.query_template.format(
+            target=target, name=Path(target).stem, output_dir=output_dir,
+            # test file -> repo root (output_dir is relative to the repo root)
+            root_depth=len(Path(output_dir).parts),
+        )
+
+    async def arun(self, targets: List[str]) -> BatchReport:
+        llm_semaphore = asyncio.Semaphore(self.max_inflight_llm)
+        llm_sync_semaphore = threading.BoundedSemaphore(self.max_inflight_llm)
+        pytest_semaphore = threading.BoundedSemaphore(self.max_pytest_processes)
+        target_dirs = self.target_dirs(targets)
+        for directory in target_dirs.values():
+            Path(directory).mkdir(exist_ok=True, parents=True)
+
+        async def run_target(target: str) -> TargetResult:
+            client = UsageTrackingClient(self.llm, llm_semaphore, llm_sync_semaphore)
+            agent = self.agent_factory(
+                client, max_iterations=self.max_iterations, target=target, output_dir=target_dirs[target]
+            )
+            agent.tool_limits["run_pytest_tests"] = pytest_semaphore
+            result = TargetResult(target=target)
+            start = time.perf_counter()
+            try:
+                state = await agent.aiterate(user_query=self.build_query(target, target_dirs[target]))
+                result.is_finished = state.is_finished
+                result.iterations = state.iteration
+            except Exception as e:
+                logger.exception(f"Batch target {target} failed")
+                result.error = str(e)
+            finally:
+                agent.shutdown()
+            result.wall_time = time.perf_counter() - start
+            result.llm_calls = client.calls
+            result.prompt_tokens = client.prompt_tokens
+            result.completion_tokens = client.completion_tokens
+            result.total_tokens = client.total_tokens
+            logger.info(f"[batch] {target} finished={result.is_finished} in {result.wall_time:.1f}s")
+            return result
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(run_target(t) for t in targets))
+        return BatchReport(results=list(results), wall_time=time.perf_counter() - start)
+
+    def run(self, targets: List[str]) -> BatchReport:
+        return asyncio.run(self.arun(targets))
@@ -0,0 +1,136 @@
+"""
+Append-only checkpoint log of an agent state (JSONL, one record per line):
+
+    {"kind": "start", "state_type": "agent.base.ScratchpadAgentState", "state": {...full snapshot...}}
+    {"kind": "step", "iteration": 3,
+     "messages": {"keep": 2, "append": [...]},                 # keep the first `keep` messages, then append
+     "fields": {"scratchpad": {"extend": [...]}, "is_finished": {"set": true}}}
+
+Each step only stores what changed since the previous record, so a long run
+costs O(new messages) per iteration instead of a full snapshot.
+"""
+import importlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+from loguru import logger
+
+
+def _state_type_name(state) -> str:
+    cls = type(state)
+    return f"{cls.__module__}.{cls.__qualname__}"
+
+
+def _import_state_type(name: str):
+    module_name, _, class_name = name.rpartition(".")
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class CheckpointLog:
+    def __init__(self, path: str):
+        self.path = Path(path)
+        # last persisted view of the state -> deltas are computed against it
+        self._messages: list = []
+        self._fields: dict = {}
+
+    def _dump_fields(self, state) -> dict:
+        return state.model_dump(mode="json", exclude={"messages"})
+
+    def _write(self, record: dict, mode: str = "a"):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open(mode, encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def start(self, state):
+        """ (re)start the log with a full snapshot """
+        self._messages = list(state.messages)
+        self._fields = self._dump_fields(state)
+        self._write(
+            {
+                "kind": "start",
+                "state_type": _state_type_name(state),
+                "state": {**self._fields, "messages": list(state.messages)},
+            },
+            mode="w",
+        )
+
+    def step(self, state):
+        """ append the delta since the previous record """
+        messages = list(state.messages)
+        keep = 0
+        for old, new in zip(self._messages, messages):
+            if old is not new and old != new:
+                break
+            keep += 1
+
+        fields = self._dump_fields(state)
+        field_delta = {}
+        for name, value in fields.items():
+            old = self._fields.get(name)
+            if value == old:
+                continue
+            if isinstance(value, list) and isinstance(old, list) and value[:len(old)] == old:
+                field_delta[name] = {"extend": value[len(old):]}
+            else:
+                field_delta[name] = {"set": value}
+
+        self._write(
+            {
+                "kind": "step",
+                "iteration": state.iteration,
+                "messages": {"keep": keep, "append": messages[keep:]},
+                "fields": field_delta,
+            }
+        )
+        self._messages = messages
+        self._fields = fields
+
+    def load(self):
+        """
+        Rebuild the latest state from the log and continue appending after it.
+        A partially written last line (crash mid-write) is cut off.
+        """
+        state_type, fields, messages = None, {}, []
+        valid_bytes = 0
+        with self.path.open("rb") as f:
+            for line_number, line in enumerate(f, start=1):
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete line")
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Dropping unreadable checkpoint tail at line {line_number} in {self.path}")
+                    break
+                valid_bytes += len(line)
+                if record["kind"] == "start":
+                    state_type = record["state_type"]
+                    fields = dict(record["state"])
+                    messages = fields.pop("messages")
+                elif record["kind"] == "step":
+                    delta = record["messages"]
+                    messages = messages[:delta["keep"]] + delta["append"]
+                    for name, change in record["fields"].items():
+                        if "extend" in change:
+                            fields[name] = fields.get(name, []) + change["extend"]
+                        else:
+                            fields[name] = change["set"]
+        if valid_bytes < self.path.stat().st_size:
+            os.truncate(self.path, valid_bytes)
+        if state_type is None:
+            raise ValueError(f"No start record in checkpoint {self.path}")
+
+        state = _import_state_type(state_type).model_validate({**fields, "messages": messages})
+        self._messages = list(state.messages)
+        self._fields = self._dump_fields(state)
+        return state
+
+
+def load_checkpoint(path: str) -> Optional[object]:
+    """ latest state stored in a checkpoint log (None if the file does not exist) """
+    if not Path(path).exists():
+        return None
+    return CheckpointLog(path).load()
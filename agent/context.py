@@ -0,0 +1,178 @@
+import json
+from typing import Callable, List, Optional
+
+from loguru import logger
+
+from llm.config import LLMConfig
+from .history import MessageHistory
+
+# tokens in the model context window (prompt + completion)
+KNOWN_CONTEXT_WINDOWS = {
+    "openai/gpt-oss-120b": 131072,
+    "openai/gpt-oss-20b": 131072,
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.1-70b-versatile": 131072,
+    "llama-3.3-70b-versatile": 131072,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+# per message framing (role, separators) added by chat templates
+MESSAGE_OVERHEAD_TOKENS = 4
+# room for the "...[truncated N chars]" marker
+TRUNCATION_MARKER_TOKENS = 16
+
+
+def estimate_tokens(text: str) -> int:
+    """ cheap fallback: ~4 chars per token for english text / code """
+    return (len(text) + 3) // 4
+
+
+def tiktoken_counter(encoding: str = "o200k_base") -> Optional[Callable[[str], int]]:
+    """ exact-ish counter when tiktoken is installed (optional dependency), else None """
+    try:
+        import tiktoken  # type: ignore
+    except ImportError:  # pragma: no cover - optional dependency
+        return None
+    enc = tiktoken.get_encoding(encoding)
+    return lambda text: len(enc.encode(text, disallowed_special=()))
+
+
+class ContextWindowManager:
+    """
+    Fits the message history into a token budget instead of a fixed message count.
+
+    budget = context window - max_tokens (completion) - reserved (e.g. tool schemas) - safety margin
+    (optionally capped by max_prompt_tokens to stay below provider TPM limits)
+
+    Essential messages (system + last user) are always kept. The remaining
+    messages are kept newest first while they fit; the first one that does not
+    fit is truncated to the space left and everything older is evicted.
+    An assistant message with tool_calls and its tool results count as one unit:
+    they are kept, truncated or evicted together.
+    """
+
+    def __init__(
+        self,
+        context_window: int = DEFAULT_CONTEXT_WINDOW,
+        max_completion_tokens: int = 0,
+        max_prompt_tokens: Optional[int] = None,
+        tokenizer: Optional[Callable[[str], int]] = None,
+        safety_margin: float = 0.05,
+        min_truncated_tokens: int = 64,
+    ):
+        self.context_window = context_window
+        self.max_completion_tokens = max_completion_tokens
+        self.max_prompt_tokens = max_prompt_tokens
+        self.tokenizer = tokenizer or estimate_tokens
+        self.safety_margin = safety_margin
+        self.min_truncated_tokens = min_truncated_tokens
+
+    @classmethod
+    def from_config(cls, config: Optional[LLMConfig], **kwargs) -> "ContextWindowManager":
+        if config is None:
+            return cls(**kwargs)
+        window = config.context_window or KNOWN_CONTEXT_WINDOWS.get(config.model_name, DEFAULT_CONTEXT_WINDOW)
+        return cls(context_window=window, max_completion_tokens=config.max_tokens or 0, **kwargs)
+
+    def budget(self, reserved_tokens: int = 0) -> int:
+        available = int(self.context_window * (1 - self.safety_margin)) - self.max_completion_tokens
+        if self.max_prompt_tokens is not None:
+            available = min(available, self.max_prompt_tokens)
+        return max(available - reserved_tokens, 0)
+
+    def count_message(self, message: dict) -> int:
+        tokens = MESSAGE_OVERHEAD_TOKENS + self.tokenizer(str(message.get("content") or ""))
+        if message.get("tool_calls"):
+            tokens += self.tokenizer(json.dumps(message["tool_calls"], default=str))
+        return tokens
+
+    def count_messages(self, messages: List[dict]) -> int:
+        return sum(self.count_message(m) for m in messages)
+
+    def truncate(self, message: dict, max_tokens: int) -> dict:
+        """ keep the head of the content so it fits in max_tokens """
+        max_tokens = max(max_tokens - TRUNCATION_MARKER_TOKENS, 0)
+        content = str(message.get("content") or "")
+        total = self.count_message(message)
+        # proportional first guess (estimator is linear, tokenizers nearly), then shrink until it fits
+        keep = int(len(content) * max_tokens / total) if total else 0
+        while keep > 0 and self.count_message({**message, "content": content[:keep]}) > max_tokens:
+            keep = int(keep * 0.9)
+        dropped = len(content) - keep
+        return {**message, "content": f"{content[:keep]}\n...[truncated {dropped} chars to fit context]"}
+
+    def fit(
+        self,
+        messages: List[dict],
+        reserved_tokens: int = 0,
+        keep_system: bool = True,
+        drop_tools: bool = False,
+    ) -> List[dict]:
+        """
+        Return the messages (original order) that fit the budget.
+        Input list and messages are never mutated.
+        """
+        # role index -> essentials without rescanning (plain lists are indexed once)
+        history = messages if isinstance(messages, MessageHistory) else MessageHistory(messages)
+        essential = set(history.system_positions) if keep_system else set()
+        if history.last_user_position is not None:
+            essential.add(history.last_user_position)
+        budget_left = self.budget(reserved_tokens) - self.count_messages([history[i] for i in essential])
+        if budget_left < 0:
+            logger.warning(f"system + user messages alone exceed the prompt budget by {-budget_left} tokens")
+
+        kept = {i: history[i] for i in essential}
+        for i in reversed(range(len(history))):
+            message = history[i]
+            role = message.get("role")
+            if i in kept or role in {"system", "user"} or (drop_tools and role == "tool"):
+                continue
+            unit = [i] if drop_tools or role != "tool" else self._tool_group(history, i)
+            messages_in_unit = [history[j] for j in unit]
+            tokens = self.count_messages(messages_in_unit)
+            if tokens <= budget_left:
+                kept.update(zip(unit, messages_in_unit))
+                budget_left -= tokens
+                continue
+            truncated = self._truncate_unit(messages_in_unit, budget_left)
+            if truncated is not None:
+                kept.update(zip(unit, truncated))
+            # keep a contiguous recent window -> evict everything older
+            break
+
+        return [kept[i] for i in sorted(kept)]
+
+    @staticmethod
+    def _tool_group(history: List[dict], position: int) -> List[int]:
+        """
+        Positions of a tool result together with the assistant message that requested it
+        and that message's other results (up to `position`), so a call and its results are
+        kept or evicted together. Results without their call in the same turn stand alone.
+        """
+        call_id = history[position].get("tool_call_id")
+        for head in range(position - 1, -1, -1):
+            message = history[head]
+            if message.get("role") in {"system", "user"}:
+                break
+            if not message.get("tool_calls"):
+                continue
+            ids = {tool_call.get("id") for tool_call in message["tool_calls"] if isinstance(tool_call, dict)}
+            if call_id not in ids:
+                break
+            results = [
+                j for j in range(head + 1, position + 1)
+                if history[j].get("role") == "tool" and history[j].get("tool_call_id") in ids
+            ]
+            return [head] + results
+        return [position]
+
+    def _truncate_unit(self, messages: List[dict], budget_left: int) -> Optional[List[dict]]:
+        """ messages cut down to budget_left (tool results share what the call leaves), None if it cannot fit """
+        if len(messages) == 1:
+            if budget_left < self.min_truncated_tokens:
+                return None
+            return [self.truncate(messages[0], budget_left)]
+        head, results = messages[0], messages[1:]
+        share = (budget_left - self.count_message(head)) // len(results)
+        if share < self.min_truncated_tokens:
+            return None
+        return [head] + [m if self.count_message(m) <= share else self.truncate(m, share) for m in results]
@@ -0,0 +1,32 @@
+from dotenv import load_dotenv
+
+from agent.batch_runner import BatchUnitTesterRunner, discover_targets
+from llm.groq_client import GroqClient, LLMConfig
+
+
+def main():
+    load_dotenv()
+
+    config = LLMConfig(
+        max_tokens=3000,
+        model_name="openai/gpt-oss-120b",
+        reasoning_effort="medium",
+        temperature=0.3,
+        top_p=0.8,
+    )
+    client = GroqClient(config)
+
+    # one agent per module, all driven by one event loop
+    targets = discover_targets("tools/toolkit/builtin")
+    runner = BatchUnitTesterRunner(
+        client,
+        max_iterations=10,
+        max_inflight_llm=3,
+        max_pytest_processes=2,
+    )
+    report = runner.run(targets)
+    print(report.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Fake LLM client, agent and message builders shared by the agent tests (no network).
+"""
+import json
+from typing import List
+
+from agent.base import Agent, BaseAgentState
+from llm.base import LLMClient
+from llm.config import LLMConfig
+from llm.streaming import message_to_events
+
+
+class ScriptedLLM(LLMClient):
+    """ returns the queued responses in order, records every request """
+
+    def __init__(self, responses: List[dict] = ()):
+        super().__init__(LLMConfig())
+        self.responses = list(responses)
+        self.requests = []
+
+    def generate(self, messages, tools=None):
+        self.requests.append(list(messages))
+        return [self.responses.pop(0)]
+
+    def stream(self, messages, tools=None):
+        return message_to_events(self.generate(messages, tools=tools)[0])
+
+
+class EchoAgent(Agent):
+    """ appends the response, runs its tool calls and finishes after one step """
+
+    def start_point(self, user_query: str):
+        return BaseAgentState(messages=[{"role": "user", "content": user_query}])
+
+    def run(self, state):
+        return self.handle_response(state, self.generate_response(state))
+
+    def respond(self, state, response):
+        state.messages.append(response)
+        for result in (yield response.get("tool_calls") or []):
+            state.add_message("tool", json.dumps(result))
+        state.is_finished = True
+        return state
+
+
+def tool_call(call_id: str, name: str, arguments: dict) -> dict:
+    return {"type": "function", "id": call_id, "function": {"name": name, "arguments": json.dumps(arguments)}}
+
+
+def conversation(turns: int, result_chars: int = 400) -> List[dict]:
+    """ system + user + `turns` assistant messages with two read_file calls and their results """
+    messages = [{"role": "system", "content": "sys"}, {"role": "user", "content": "task"}]
+    for n in range(turns):
+        messages.append({"role": "ai", "content": "", "tool_calls": [
+            tool_call(f"{n}a", "read_file", {"file_path": "a.py"}), tool_call(f"{n}b", "read_file", {"file_path": "b.py"}),
+        ]})
+        messages.append({"role": "tool", "tool_call_id": f"{n}a", "content": "a" * result_chars})
+        messages.append({"role": "tool", "tool_call_id": f"{n}b", "content": "b" * result_chars})
+    return messages
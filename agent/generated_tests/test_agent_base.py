@@ -0,0 +1,205 @@
+import sys
+import pathlib
+# Add project root to sys.path for imports
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+from agent.generated_tests.fakes import EchoAgent, ScriptedLLM, tool_call
+from tools.decorator import tool
+from tools.registry import ToolRegistry
+
+
+def test_speculation_only_starts_calls_declared_side_effect_free():
+    started = []
+
+    @tool(side_effect_free=lambda arguments: arguments.get("mode") != "write")
+    def page(mode: str) -> str:
+        started.append(mode)
+        return mode
+
+    registry = ToolRegistry()
+    registry.register(page)
+    llm = ScriptedLLM([{"role": "assistant", "content": "", "tool_calls": [
+        tool_call("1", "page", {"mode": "read"}), tool_call("2", "page", {"mode": "write"}),
+    ]}])
+    agent = EchoAgent(llm, registry, speculative_tools=True)
+    agent.generate_response(agent.start_point("go"))
+    assert list(agent._speculative) == ["1"]
+    agent._speculative["1"][1].result()
+    assert started == ["read"]
+    agent.shutdown()
+
+
+def test_async_run_honours_speculative_tools():
+    @tool(side_effect_free=True)
+    def page(mode: str) -> str:
+        return mode
+
+    registry = ToolRegistry()
+    registry.register(page)
+    llm = ScriptedLLM([{"role": "assistant", "content": "", "tool_calls": [tool_call("1", "page", {"mode": "read"})]}])
+    agent = EchoAgent(llm, registry, speculative_tools=True)
+    agent.allm_generate = lambda state: pytest.fail("speculative agents must stream")
+    state = asyncio.run(agent.aiterate(user_query="go"))
+    assert json.loads(state.messages[-1]["content"]) == {"success": True, "result": "read"}
+    agent.shutdown()
+
+
+def test_call_tools_keeps_order_and_respects_serial_and_max_concurrency():
+    events = []
+    lock = threading.Lock()
+
+    def track(label, delay):
+        with lock:
+            events.append(("start", label))
+        time.sleep(delay)
+        with lock:
+            events.append(("end", label))
+        return label
+
+    @tool()
+    def slow(label: str, delay: float) -> str:
+        return track(label, delay)
+
+    @tool(serial=True)
+    def barrier(label: str) -> str:
+        return track(label, 0)
+
+    @tool(max_concurrency=1)
+    def single(label: str) -> str:
+        return track(label, 0.02)
+
+    registry = ToolRegistry()
+    for t in (slow, barrier, single):
+        registry.register(t)
+    agent = EchoAgent(ScriptedLLM(), registry, max_tool_workers=4)
+    calls = [
+        tool_call("1", "slow", {"label": "a", "delay": 0.05}),
+        tool_call("2", "slow", {"label": "b", "delay": 0.0}),
+        tool_call("3", "barrier", {"label": "x"}),
+        tool_call("4", "single", {"label": "c"}),
+        tool_call("5", "single", {"label": "d"}),
+    ]
+    results = agent.call_tools(calls)
+    agent.shutdown()
+
+    assert [r["result"] for r in results] == ["a", "b", "x", "c", "d"]
+    # the serial call starts after every earlier call ended and before any later one starts
+    position = events.index(("start", "x"))
+    assert {("end", "a"), ("end", "b")} <= set(events[:position])
+    assert events[position + 1] == ("end", "x")
+    # a and b overlapped, c and d (max_concurrency=1) did not
+    assert events.index(("start", "b")) < events.index(("end", "a"))
+    assert events.index(("end", "c")) < events.index(("start", "d")) or \
+        events.index(("end", "d")) < events.index(("start", "c"))
+
+
+class AsyncScriptedLLM(ScriptedLLM):
+    """ native async client: the sync methods must not be used by the async loop """
+
+    def generate(self, messages, tools=None):
+        pytest.fail("the async loop must await agenerate")
+
+    async def agenerate(self, messages, tools=None):
+        await asyncio.sleep(0)
+        return ScriptedLLM.generate(self, messages, tools=tools)
+
+
+def test_aiterate_awaits_the_llm_and_async_tools():
+    threads = {}
+
+    @tool()
+    async def fetch(url: str) -> str:
+        threads.setdefault("fetch", set()).add(threading.current_thread().name)
+        await asyncio.sleep(0.1)
+        return url
+
+    @tool()
+    def parse(text: str) -> int:
+        threads.setdefault("parse", set()).add(threading.current_thread().name)
+        return len(text)
+
+    registry = ToolRegistry()
+    for t in (fetch, parse):
+        registry.register(t)
+    llm = AsyncScriptedLLM([{"role": "assistant", "content": "", "tool_calls": [
+        tool_call("1", "fetch", {"url": "a"}), tool_call("2", "fetch", {"url": "b"}),
+        tool_call("3", "fetch", {"url": "c"}), tool_call("4", "parse", {"text": "abcd"}),
+    ]}])
+    agent = EchoAgent(llm, registry, max_tool_workers=1)
+    agent.call_tools = lambda tool_calls: pytest.fail("the async loop must await acall_tools")
+
+    start = time.perf_counter()
+    state = asyncio.run(agent.aiterate(user_query="go"))
+    elapsed = time.perf_counter() - start
+    agent.shutdown()
+
+    assert state.is_finished and len(llm.requests) == 1
+    results = [json.loads(m["content"]) for m in state.messages if m["role"] == "tool"]
+    assert [r["result"] for r in results] == ["a", "b", "c", 4]
+    # the three fetches were awaited together (one tool pool thread would have run them back to back)
+    assert elapsed < 0.25
+    assert threads["fetch"] == {"tool-event-loop"}
+    assert all(name.startswith("agent-tool") for name in threads["parse"])
+
+
+def test_acall_tools_keeps_serial_barriers_and_concurrency_caps():
+    events = []
+
+    @tool()
+    async def slow(label: str) -> str:
+        events.append(("start", label))
+        await asyncio.sleep(0.02)
+        events.append(("end", label))
+        return label
+
+    @tool(serial=True)
+    async def barrier(label: str) -> str:
+        events.append(("start", label))
+        events.append(("end", label))
+        return label
+
+    @tool(max_concurrency=1)
+    async def single(label: str) -> str:
+        return await slow.func(label)
+
+    registry = ToolRegistry()
+    for t in (slow, barrier, single):
+        registry.register(t)
+    agent = EchoAgent(ScriptedLLM(), registry)
+    calls = [
+        tool_call("1", "slow", {"label": "a"}), tool_call("2", "slow", {"label": "b"}),
+        tool_call("3", "barrier", {"label": "x"}),
+        tool_call("4", "single", {"label": "c"}), tool_call("5", "single", {"label": "d"}),
+        tool_call("6", "missing", {}),
+    ]
+    results = asyncio.run(agent.acall_tools(calls))
+
+    assert [r.get("result") for r in results] == ["a", "b", "x", "c", "d", None]
+    assert results[-1] == {"success": False, "error": "Tool missing not found"}
+    assert events[:4] == [("start", "a"), ("start", "b"), ("end", "a"), ("end", "b")]
+    assert events[4:6] == [("start", "x"), ("end", "x")]
+    assert events[6:] == [("start", "c"), ("end", "c"), ("start", "d"), ("end", "d")]
+    assert agent._tool_executor is not None  # the unknown tool went through the blocking path
+    agent.shutdown()
+
+
+def test_default_async_client_methods_wrap_the_sync_ones():
+    message = {"role": "ai", "content": "hi", "tool_calls": [tool_call("1", "read_file", {"file_path": "a.py"})]}
+
+    async def scenario():
+        llm = ScriptedLLM([message, message])
+        response = await llm.agenerate([{"role": "user", "content": "x"}])
+        events = [event async for event in llm.astream([{"role": "user", "content": "x"}])]
+        return response, events
+
+    response, events = asyncio.run(scenario())
+    assert response == [message]
+    assert [e["type"] for e in events][-2:] == ["tool_call_done", "done"]
+    assert events[-1]["message"]["tool_calls"] == message["tool_calls"]
@@ -0,0 +1,38 @@
+import sys
+import pathlib
+# Add project root to sys.path for imports
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+import asyncio
+import threading
+
+from agent.batch_runner import BatchUnitTesterRunner, UsageTrackingClient
+from agent.generated_tests.fakes import ScriptedLLM
+from llm.streaming import collect_stream
+
+
+def test_batch_runner_gives_every_target_its_own_directory():
+    runner = BatchUnitTesterRunner(ScriptedLLM(), output_dir="tools/llm_tests")
+    dirs = runner.target_dirs(["tools/toolkit/web_explorer.py", "tools/a/utils.py", "tools/b/utils.py"])
+    assert dirs["tools/toolkit/web_explorer.py"] == "tools/llm_tests/web_explorer"
+    assert dirs["tools/a/utils.py"] != dirs["tools/b/utils.py"]
+
+    query = runner.build_query("tools/toolkit/web_explorer.py", dirs["tools/toolkit/web_explorer.py"])
+    assert "under tools/llm_tests/web_explorer named test_web_explorer.py" in query
+    assert "parents[3]" in query  # test file -> repo root
+
+
+def test_usage_tracking_counts_generated_and_streamed_responses():
+    usage = {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12}
+    responses = [{"role": "ai", "content": "hi", "usage": usage} for _ in range(4)]
+    client = UsageTrackingClient(ScriptedLLM(responses), asyncio.Semaphore(1), threading.BoundedSemaphore(1))
+    messages = [{"role": "user", "content": "x"}]
+
+    async def async_calls():
+        await client.agenerate(messages)
+        return collect_stream([event async for event in client.astream(messages)])
+
+    client.generate(messages)
+    assert collect_stream(client.stream(messages))[0]["content"] == "hi"
+    assert asyncio.run(async_calls())[0]["content"] == "hi"
+    assert (client.calls, client.prompt_tokens, client.completion_tokens, client.total_tokens) == (4, 40, 8, 48)
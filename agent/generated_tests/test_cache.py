@@ -0,0 +1,97 @@
+import sys
+import pathlib
+# Add project root to sys.path for imports
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+import asyncio
+import itertools
+import types
+
+import pytest
+
+from llm import cache
+from llm.base import LLMClient
+from llm.cache import CachedLLMClient, ResponseStore
+from llm.config import LLMConfig
+
+
+class CountingLLM(LLMClient):
+    """ answers every prompt with its text and the number of the call """
+
+    def __init__(self, temperature: float = 0.0):
+        super().__init__(LLMConfig(temperature=temperature))
+        self.calls = 0
+
+    def generate(self, messages, tools=None):
+        self.calls += 1
+        return [{"role": "ai", "content": f"{messages[-1]['content']} #{self.calls}"}]
+
+    def stream(self, messages, tools=None):
+        raise NotImplementedError
+
+
+@pytest.fixture(autouse=True)
+def ordered_clock(monkeypatch):
+    # every store access gets a distinct timestamp -> deterministic LRU order
+    ticks = itertools.count(1)
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def ask(client, text: str) -> str:
+    return client.generate([{"role": "user", "content": text}])[0]["content"]
+
+
+def test_cached_client_serves_hits_and_evicts_the_least_recently_used(tmp_path):
+    llm = CountingLLM()
+    client = CachedLLMClient(llm, path=str(tmp_path / "cache.sqlite"), max_entries=2)
+
+    assert ask(client, "a") == "a #1"
+    assert ask(client, "a") == "a #1"  # hit
+    assert ask(client, "b") == "b #2"
+    assert ask(client, "a") == "a #1"  # touch a -> b is now the least recently used
+    assert ask(client, "c") == "c #3"  # evicts b
+    assert (client.hits, client.misses, llm.calls) == (2, 3, 3)
+
+    assert ask(client, "a") == "a #1"
+    assert ask(client, "b") == "b #4"  # refetched, evicts c
+    assert ask(client, "c") == "c #5"
+    assert client.store._conn.execute("SELECT COUNT(*) FROM responses").fetchone() == (2,)
+    client.store.close()
+
+
+def test_response_store_evicts_by_total_size(tmp_path):
+    store = ResponseStore(str(tmp_path / "cache.sqlite"), max_entries=100, max_bytes=10)
+    store.put("a", "1234")
+    store.put("b", "5678")
+    assert store.get("a") == "1234"  # b becomes the least recently used
+    store.put("c", "90")
+    store.put("d", "xy")  # 12 bytes -> b goes
+    assert [store.get(k) for k in "abcd"] == ["1234", None, "90", "xy"]
+    store.put("big", "x" * 11)  # larger than the cap on its own -> everything goes
+    assert [store.get(k) for k in ("a", "c", "d", "big")] == [None, None, None, None]
+    store.close()
+
+
+def test_sampled_requests_bypass_the_cache_unless_allowed(tmp_path):
+    llm = CountingLLM(temperature=0.7)
+    client = CachedLLMClient(llm, path=str(tmp_path / "cache.sqlite"))
+    assert [ask(client, "a"), ask(client, "a")] == ["a #1", "a #2"]
+    assert (client.hits, client.misses) == (0, 0)
+
+    replaying = CachedLLMClient(llm, path=str(tmp_path / "cache.sqlite"), allow_nondeterministic=True)
+    assert [ask(replaying, "a"), ask(replaying, "a")] == ["a #3", "a #3"]
+    client.store.close()
+    replaying.store.close()
+
+
+def test_agenerate_shares_the_cache_with_generate(tmp_path):
+    llm = CountingLLM()
+    client = CachedLLMClient(llm, path=str(tmp_path / "cache.sqlite"))
+    messages = [{"role": "user", "content": "a"}]
+    tools = [{"type": "function", "function": {"name": "read_file"}}]
+
+    first = client.generate(messages, tools=tools)
+    assert asyncio.run(client.agenerate(messages, tools=tools)) == first
+    assert asyncio.run(client.agenerate(messages))[0]["content"] == "a #2"  # other tools -> other key
+    assert (client.hits, client.misses, llm.calls) == (1, 2, 2)
+    client.store.close()
@@ -0,0 +1,53 @@
+import sys
+import pathlib
+# Add project root to sys.path for imports
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+import json
+
+from agent.base import ScratchpadAgentState
+from agent.checkpoint import CheckpointLog, load_checkpoint
+from agent.generated_tests.fakes import EchoAgent, ScriptedLLM
+from agent.history import MessageHistory
+from tools.registry import ToolRegistry
+
+
+def test_checkpoint_log_round_trips_steps_and_cuts_a_torn_tail(tmp_path):
+    path = tmp_path / "run.jsonl"
+    state = ScratchpadAgentState(messages=[{"role": "system", "content": "sys"}, {"role": "user", "content": "task"}])
+    log = CheckpointLog(str(path))
+    log.start(state)
+
+    state.iteration = 1
+    state.add_message("ai", "step one")
+    state.scratchpad.append("read a.py")
+    state.test_files_written = {"tools/llm_tests/test_a.py"}
+    log.step(state)
+    state.iteration = 2
+    state.add_message("tool", "result", tool_call_id="1")
+    state.is_finished = True
+    log.step(state)
+
+    records = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [r["kind"] for r in records] == ["start", "step", "step"]
+    assert records[2]["messages"] == {"keep": 3, "append": [state.messages[-1]]}
+    assert records[2]["fields"]["is_finished"] == {"set": True}
+
+    with path.open("a") as f:
+        f.write('{"kind": "step", "iterat')  # crash mid-write
+    restored = load_checkpoint(str(path))
+    assert isinstance(restored, ScratchpadAgentState)
+    assert isinstance(restored.messages, MessageHistory)
+    assert restored.model_dump() == state.model_dump()
+    assert path.read_text().endswith("\n")
+
+
+def test_agent_resumes_from_its_checkpoint(tmp_path):
+    path = str(tmp_path / "run.jsonl")
+    llm = ScriptedLLM([{"role": "assistant", "content": "done"}])
+    agent = EchoAgent(llm, ToolRegistry(), checkpoint_path=path)
+    state = agent.iterate(user_query="go")
+
+    resumed = EchoAgent(ScriptedLLM(), ToolRegistry(), checkpoint_path=path).resume()
+    assert resumed.model_dump() == state.model_dump()
+    assert llm.requests and resumed.is_finished
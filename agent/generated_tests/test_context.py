@@ -0,0 +1,45 @@
+import sys
+import pathlib
+# Add project root to sys.path for imports
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+from typing import List
+
+import pytest
+
+from agent.context import ContextWindowManager
+from agent.generated_tests.fakes import conversation
+
+
+def assert_pairs_complete(messages: List[dict]):
+    requested = [c["id"] for m in messages for c in m.get("tool_calls") or []]
+    answered = [m["tool_call_id"] for m in messages if m.get("role") == "tool"]
+    assert requested == answered
+
+
+@pytest.mark.parametrize("window", [150, 300, 420, 700, 5000])
+def test_fit_stays_in_budget_and_keeps_tool_calls_with_their_results(window):
+    manager = ContextWindowManager(context_window=window, safety_margin=0, min_truncated_tokens=16)
+    messages = conversation(turns=5)
+    fitted = manager.fit(messages)
+
+    assert fitted[:2] == messages[:2]  # essentials always kept
+    assert manager.count_messages(fitted) <= manager.budget()
+    assert_pairs_complete(fitted)
+    # a contiguous recent window: the newest message is always the last one kept
+    assert fitted[-1]["tool_call_id"] == messages[-1]["tool_call_id"]
+
+
+def test_fit_truncates_the_results_of_the_newest_call_to_the_space_left():
+    manager = ContextWindowManager(context_window=300, safety_margin=0, min_truncated_tokens=16)
+    messages = conversation(turns=1, result_chars=4000)
+    fitted = manager.fit(messages)
+    assert len(fitted) == len(messages)
+    assert all("truncated" in m["content"] for m in fitted[-2:])
+    assert manager.count_messages(fitted) <= manager.budget()
+
+
+def test_fit_drop_tools_leaves_tool_results_out():
+    manager = ContextWindowManager(context_window=5000, safety_margin=0)
+    fitted = manager.fit(conversation(turns=2), drop_tools=True)
+    assert [m["role"] for m in fitted] == ["system", "user", "ai", "ai"]
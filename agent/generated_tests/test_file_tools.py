@@ -9,6 +9,8 @@ from pathlib import Path
 
 import pytest
 
+from agent.generated_tests.fakes import ScriptedLLM, tool_call
+from agent.unit_tester.v2_scratchpad import ScratchpadUnitTesterAgent
 # Import the functions to test
 from tools.toolkit.builtin.file_tools import (
     list_directory_files,
@@ -133,3 +135,63 @@ def test_list_directory_files_depth(tmp_path: Path):
     res_missing = list_directory_files(str(missing), depth=1)
     assert res_missing["success"] is False
     assert "Path not found" in res_missing["error"]
+
+
+def test_read_file_line_window_and_byte_cap(tmp_path: Path):
+    file_path = tmp_path / "module.py"
+    file_path.write_text("".join(f"line {i}\n" for i in range(1, 101)))
+
+    window = read_file(str(file_path), line_start=10, line_end=12)
+    assert window["success"] is True
+    assert window["result"] == "line 10\nline 11\nline 12\n"
+    assert window["total_lines"] == 100
+    assert (window["line_start"], window["line_end"], window["truncated"]) == (10, 12, False)
+
+    capped = read_file(str(file_path), line_start=95, max_bytes=20)
+    assert capped["result"] == "line 95\nline 96\n"
+    assert capped["line_end"] == 96
+    assert capped["truncated"] is True
+
+
+def test_read_file_past_the_end_is_an_error(tmp_path: Path):
+    file_path = tmp_path / "short.py"
+    file_path.write_text("a\nb\n")
+    past = read_file(str(file_path), line_start=3)
+    assert past["success"] is False
+    assert "past the end of the file (2 lines)" in past["error"]
+
+    empty = tmp_path / "empty.py"
+    empty.write_text("")
+    assert read_file(str(empty))["success"] is True
+
+
+def test_read_file_cuts_a_line_longer_than_max_bytes(tmp_path: Path):
+    file_path = tmp_path / "minified.js"
+    file_path.write_text("x" * 5000 + "\nnext line\nlast")
+
+    first = read_file(str(file_path), max_bytes=100)
+    assert first["result"] == "x" * 100
+    assert (first["line_end"], first["total_lines"], first["truncated"]) == (1, 3, True)
+    assert "line 1 is longer than max_bytes" in first["note"]
+
+    rest = read_file(str(file_path), line_start=first["line_end"] + 1, max_bytes=100)
+    assert rest["result"] == "next line\nlast"
+    assert "note" not in rest and rest["truncated"] is False
+
+
+def test_read_file_schema_exposes_every_argument():
+    schema = read_file.to_openai_format()["function"]["parameters"]
+    assert set(schema["properties"]) == {"file_path", "path", "line_start", "line_end", "max_bytes"}
+    assert schema["required"] == []
+    assert read_file(path=__file__, line_start=1, line_end=1)["result"] == "import sys\n"
+
+
+def test_scratchpad_agent_counts_a_read_through_the_path_alias():
+    llm = ScriptedLLM([{"role": "assistant", "content": "", "tool_calls": [
+        tool_call("1", "read_file", {"path": "./tools/toolkit/builtin/json_tools.py", "line_start": 1, "line_end": 40}),
+    ]}])
+    agent = ScratchpadUnitTesterAgent(llm, max_iterations=1, target="tools/toolkit/builtin/json_tools.py")
+    agent.call_tools = lambda tool_calls: [{"success": True, "result": {"success": True, "result": ""}} for _ in tool_calls]
+    state = agent.iterate(user_query="write tests")
+    assert state.target_module_read is True
+    assert state.read_files_seen == {"tools/toolkit/builtin/json_tools.py:1-40"}
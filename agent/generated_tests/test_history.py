@@ -0,0 +1,51 @@
+import sys
+import pathlib
+# Add project root to sys.path for imports
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+from agent.base import BaseAgentState
+from agent.generated_tests.fakes import conversation
+from agent.history import MessageHistory
+
+
+def assert_index_matches(history: MessageHistory):
+    fresh = MessageHistory(list(history))
+    assert history.system_positions == fresh.system_positions
+    assert history.last_user_position == fresh.last_user_position
+    assert history.last_user is fresh.last_user
+    for drop_tools in (False, True):
+        assert history.last_others(100, drop_tools=drop_tools) == fresh.last_others(100, drop_tools=drop_tools)
+        assert history.window(last_n=3, drop_tools=drop_tools) == fresh.window(last_n=3, drop_tools=drop_tools)
+
+
+def test_message_history_index_matches_a_rebuild_after_every_mutation():
+    history = MessageHistory(conversation(turns=2))
+    assert_index_matches(history)
+
+    history.append({"role": "user", "content": "again"})
+    history += [{"role": "ai", "content": "ok"}, {"role": "tool", "tool_call_id": "x", "content": "r"}]
+    assert_index_matches(history)
+    assert history.last_user_position == len(history) - 3
+
+    history[1] = {"role": "ai", "content": "replaced user"}
+    assert_index_matches(history)
+    del history[2:5]
+    assert_index_matches(history)
+    history.insert(0, {"role": "system", "content": "first"})
+    history.pop()
+    assert_index_matches(history)
+    assert history.system_positions == [0, 1]
+
+    copied = history.copy()
+    copied.append({"role": "user", "content": "only in the copy"})
+    assert_index_matches(copied)
+    assert history.last_user_position != copied.last_user_position
+
+
+def test_state_converts_plain_lists_and_keeps_the_history_object():
+    state = BaseAgentState(messages=[{"role": "user", "content": "hi"}])
+    history = state.messages
+    assert isinstance(history, MessageHistory)
+    state.add_message("ai", "hello")
+    assert state.messages is history
+    assert state.model_dump()["messages"] == [{"role": "user", "content": "hi"}, {"role": "ai", "content": "hello"}]
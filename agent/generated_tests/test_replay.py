@@ -0,0 +1,74 @@
+import sys
+import pathlib
+# Add project root to sys.path for imports
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+import asyncio
+import json
+
+import pytest
+
+from agent.generated_tests.fakes import ScriptedLLM, tool_call
+from llm.replay import RecordingLLMClient, ReplayLLMClient
+from llm.streaming import collect_stream
+
+FIRST = [{"role": "user", "content": "first"}]
+SECOND = [{"role": "user", "content": "second"}]
+TOOLS = [{"type": "function", "function": {"name": "read_file"}}]
+
+
+@pytest.fixture
+def cassette(tmp_path):
+    """ one generate and one stream exchange recorded from a scripted client """
+    path = tmp_path / "run.jsonl"
+    llm = ScriptedLLM([
+        {"role": "ai", "content": "one"},
+        {"role": "ai", "content": "", "tool_calls": [tool_call("1", "read_file", {"file_path": "a.py"})]},
+    ])
+    recorder = RecordingLLMClient(llm, str(path))
+    generated = recorder.generate(FIRST, tools=TOOLS)
+    streamed = list(recorder.stream(SECOND, tools=TOOLS))
+    recorder.close()
+    return path, generated, streamed
+
+
+def test_recorded_exchanges_replay_by_request_key(cassette):
+    path, generated, streamed = cassette
+    kinds = [json.loads(line)["kind"] for line in path.read_text().splitlines()]
+    assert kinds == ["header", "generate", "stream"]
+
+    replay = ReplayLLMClient(str(path))
+    assert replay.generate(FIRST, tools=TOOLS) == generated
+    assert replay.generate(FIRST, tools=TOOLS) == generated  # the last entry of a key stays replayable
+    assert list(replay.stream(SECOND, tools=TOOLS)) == streamed
+    assert collect_stream(replay.stream(SECOND, tools=TOOLS))[0]["tool_calls"][0]["id"] == "1"
+
+    async def async_replay():
+        response = await replay.agenerate(FIRST, tools=TOOLS)
+        return response, [event async for event in replay.astream(SECOND, tools=TOOLS)]
+
+    assert asyncio.run(async_replay()) == (generated, streamed)
+
+    with pytest.raises(LookupError, match="match=key"):
+        replay.generate(SECOND, tools=TOOLS)  # never recorded as generate
+    with pytest.raises(LookupError):
+        replay.generate(FIRST)  # other tools -> other key
+
+
+def test_sequence_replay_serves_recorded_order_once(cassette):
+    path, generated, streamed = cassette
+    replay = ReplayLLMClient(str(path), match="sequence")
+    changed = [{"role": "user", "content": "prompt changed between runs"}]
+    assert replay.generate(changed) == generated
+    assert list(replay.stream(changed)) == streamed
+    with pytest.raises(LookupError, match="match=sequence"):
+        replay.generate(changed)
+
+
+def test_replayed_responses_are_copies(cassette):
+    path, generated, _ = cassette
+    replay = ReplayLLMClient(str(path))
+    replay.generate(FIRST, tools=TOOLS)[0]["content"] = "edited"
+    assert replay.generate(FIRST, tools=TOOLS) == generated
+    with pytest.raises(ValueError):
+        ReplayLLMClient(str(path), match="fuzzy")
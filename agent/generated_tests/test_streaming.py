@@ -0,0 +1,44 @@
+import sys
+import pathlib
+# Add project root to sys.path for imports
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+import json
+
+from agent.generated_tests.fakes import tool_call
+from llm.streaming import ToolCallAssembler, collect_stream, message_to_events
+
+
+def test_tool_call_assembler_handles_interleaved_deltas():
+    assembler = ToolCallAssembler()
+    events = []
+    events += assembler.add_tool_delta(1, None, "write_file", '{"file_path": ')
+    events += assembler.add_tool_delta(0, "call_0", "read_file", '{"file_')
+    events += assembler.add_tool_delta(1, "call_1", None, '"t.py", "content": "x"')
+    events += assembler.add_tool_delta(0, None, None, 'path": "a.py"}')
+    events += assembler.add_tool_delta(1, None, None, "}")
+    events += assembler.finish()
+
+    done = [e for e in events if e["type"] == "tool_call_done"]
+    assert [e["index"] for e in done] == [0, 1]
+    assert json.loads(done[0]["tool_call"]["function"]["arguments"]) == {"file_path": "a.py"}
+    assert done[1]["tool_call"]["id"] == "call_1"
+    assert json.loads(done[1]["tool_call"]["function"]["arguments"]) == {"file_path": "t.py", "content": "x"}
+
+    message = events[-1]["message"]
+    assert [c["id"] for c in message["tool_calls"]] == ["call_0", "call_1"]
+    deltas = "".join(e["delta"] for e in events if e["type"] == "tool_call_args_delta" and e["index"] == 1)
+    assert deltas == done[1]["tool_call"]["function"]["arguments"]
+
+
+def test_tool_call_assembler_closes_calls_without_json_arguments_at_the_end():
+    assembler = ToolCallAssembler()
+    events = assembler.add_tool_delta(0, "c0", "list_files") + assembler.add_tool_delta(1, "c1", "ping", "not json")
+    assert not [e for e in events if e["type"] == "tool_call_done"]
+    done = [e for e in assembler.finish() if e["type"] == "tool_call_done"]
+    assert [e["tool_call"]["function"]["arguments"] for e in done] == ["{}", "not json"]
+
+
+def test_message_to_events_round_trips_a_response():
+    message = {"role": "ai", "content": "hi", "tool_calls": [tool_call("1", "read_file", {"file_path": "a.py"})]}
+    assert collect_stream(message_to_events(message))[0]["tool_calls"] == message["tool_calls"]
@@ -0,0 +1,56 @@
+import sys
+import pathlib
+# Add project root to sys.path for imports
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[2]))
+
+import json
+
+from agent.generated_tests.fakes import ScriptedLLM, tool_call
+from agent.history import MessageHistory
+from agent.unit_tester.v2_scratchpad import ScratchpadUnitTesterAgent
+
+
+def test_scratchpad_agent_uses_its_target_and_output_dir():
+    written = "tools/llm_tests/json_tools/test_json_tools.py"
+    llm = ScriptedLLM([{"role": "assistant", "content": "", "tool_calls": [
+        tool_call("1", "write_file", {"file_path": written, "content": "def test_x(): pass"}),
+        tool_call("2", "read_file", {"file_path": "tools/toolkit/builtin/json_tools.py"}),
+        tool_call("3", "read_file", {"file_path": "tools/toolkit/builtin/json_tools.py"}),
+    ]}])
+    agent = ScratchpadUnitTesterAgent(
+        llm, max_iterations=1, target="tools/toolkit/builtin/json_tools.py", output_dir="tools/llm_tests/json_tools"
+    )
+    calls = []
+
+    def fake_call_tools(tool_calls):
+        calls.extend(tool_calls)
+        return [{"success": True, "result": {"success": True, "result": {"exit_code": 0}}} for _ in tool_calls]
+
+    agent.call_tools = fake_call_tools
+    state = agent.iterate(user_query="write tests")
+
+    forced = [c for c in calls if c["id"] == "forced-pytest"]
+    assert forced[0]["function"]["arguments"] == {
+        "directory": "tools/llm_tests/json_tools", "changed_files": [written]
+    }
+    assert state.target_module_read is True
+    guard = [m["content"] for m in state.messages if m.get("role") == "assistant" and "re-read" in str(m.get("content"))]
+    assert guard and "tools/llm_tests/json_tools/test_json_tools.py" in guard[0]
+    assert "web_explorer" not in json.dumps(list(state.messages))
+
+
+def test_scratchpad_agent_keeps_history_and_fits_the_request():
+    llm = ScriptedLLM([
+        {"role": "assistant", "content": "", "tool_calls": [tool_call("1", "list_dir", {"path": "."})]},
+        {"role": "assistant", "content": "", "tool_calls": [tool_call("2", "list_dir", {"path": "tools"})]},
+    ])
+    agent = ScratchpadUnitTesterAgent(llm, max_iterations=2)
+    agent.call_tools = lambda tool_calls: [{"success": True, "result": ["a.py"]} for _ in tool_calls]
+    state = agent.iterate(user_query="write tests")
+
+    history = state.messages
+    assert isinstance(history, MessageHistory)
+    assert any(m.get("role") == "tool" for m in history)  # history is not pruned
+    # ... but raw tool outputs are left out of the request
+    assert not any(m.get("role") == "tool" for m in llm.requests[-1])
+    assert llm.requests[-1][0]["role"] == "system"
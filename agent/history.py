@@ -0,0 +1,129 @@
+from collections import deque
+from itertools import islice
+from typing import Iterable, List, Optional
+
+
+class MessageHistory(list):
+    """
+    Message list (drop-in for list[dict]) that keeps a role index up to date:
+    - pinned system messages and the last user message
+    - deques of the other messages (with and without tool messages)
+
+    append/extend update the index in O(1) per message, so windowed views
+    (system + last user + last n others) cost O(k) instead of rescanning the
+    whole history every iteration. Rare in-place edits (insert, slicing, pop...)
+    fall back to a full reindex.
+    """
+
+    def __init__(self, messages: Iterable[dict] = ()):
+        super().__init__()
+        self._reset_index()
+        self.extend(messages)
+
+    def _reset_index(self):
+        self._system: List[dict] = []
+        self._system_positions: List[int] = []
+        self._last_user: Optional[dict] = None
+        self._last_user_position: Optional[int] = None
+        self._others: deque = deque()
+        self._others_no_tools: deque = deque()
+
+    def _index(self, message: dict, position: int):
+        role = message.get("role")
+        if role == "system":
+            self._system.append(message)
+            self._system_positions.append(position)
+        elif role == "user":
+            self._last_user = message
+            self._last_user_position = position
+        else:
+            self._others.append(message)
+            if role != "tool":
+                self._others_no_tools.append(message)
+
+    def _reindex(self):
+        self._reset_index()
+        for position, message in enumerate(self):
+            self._index(message, position)
+
+    # incremental mutations
+    def append(self, message: dict):
+        super().append(message)
+        self._index(message, len(self) - 1)
+
+    def extend(self, messages: Iterable[dict]):
+        for message in messages:
+            self.append(message)
+
+    def __iadd__(self, messages: Iterable[dict]):
+        self.extend(messages)
+        return self
+
+    # everything else changes positions -> rebuild the index
+    def _mutating(name):
+        def method(self, *args, **kwargs):
+            result = getattr(list, name)(self, *args, **kwargs)
+            self._reindex()
+            return result
+        method.__name__ = name
+        return method
+
+    insert = _mutating("insert")
+    pop = _mutating("pop")
+    remove = _mutating("remove")
+    clear = _mutating("clear")
+    sort = _mutating("sort")
+    reverse = _mutating("reverse")
+    __setitem__ = _mutating("__setitem__")
+    __delitem__ = _mutating("__delitem__")
+    del _mutating
+
+    # copies must rebuild the index instead of copying list items + index twice
+    def copy(self) -> "MessageHistory":
+        return MessageHistory(self)
+
+    def __copy__(self) -> "MessageHistory":
+        return MessageHistory(self)
+
+    def __deepcopy__(self, memo) -> "MessageHistory":
+        import copy
+        return MessageHistory(copy.deepcopy(list(self), memo))
+
+    def __reduce__(self):
+        return (MessageHistory, (list(self),))
+
+    # views
+    @property
+    def system_messages(self) -> List[dict]:
+        return list(self._system)
+
+    @property
+    def system_positions(self) -> List[int]:
+        return list(self._system_positions)
+
+    @property
+    def last_user(self) -> Optional[dict]:
+        return self._last_user
+
+    @property
+    def last_user_position(self) -> Optional[int]:
+        return self._last_user_position
+
+    def last_others(self, n: int, drop_tools: bool = False) -> List[dict]:
+        """ last n non system/user messages in order -> O(n) """
+        if n <= 0:
+            return []
+        source = self._others_no_tools if drop_tools else self._others
+        return list(islice(reversed(source), n))[::-1]
+
+    def window(
+        self,
+        keep_system: bool = True,
+        keep_user: bool = True,
+        last_n: int = 2,
+        drop_tools: bool = False,
+    ) -> List[dict]:
+        """ system + last user + last_n other messages (same result as prune_messages) """
+        system_msgs = list(self._system) if keep_system else []
+        user_msgs = [self._last_user] if keep_user and self._last_user is not None else []
+        return system_msgs + user_msgs + self.last_others(last_n, drop_tools=drop_tools)
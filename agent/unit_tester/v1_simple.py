@@ -1,13 +1,19 @@
 from ..base import Agent, BaseAgentState, LLMClient, ToolRegistry
 from tools.toolkit.builtin import code_tools, file_tools, json_tools
+from tools.toolkit.builtin.pytest_report import report_passed
 from pathlib import Path
 import json
 from loguru import logger
-from typing import Optional
+from typing import Generator, List, Optional
 
 
 class SimpleUnitTesterAgent(Agent):
-    def __init__(self, llm: LLMClient,  max_iterations: int = 100):
+    def __init__(self, llm: LLMClient,  max_iterations: int = 100, max_tool_workers: int = 4,
+                 checkpoint_path: Optional[str] = None, target: Optional[str] = None,
+                 output_dir: str = "tools/llm_tests"):
+        # target is named in the user query; tests are written to / run in output_dir
+        self.target = target
+        self.output_dir = Path(output_dir).as_posix()
         # create tool registry with only the tools needed to write/run tests
         tool_registry = ToolRegistry()
         tool_registry.register(file_tools.write_file)
@@ -18,7 +24,7 @@ class SimpleUnitTesterAgent(Agent):
         # json_is_valid can help validate model outputs
         tool_registry.register(json_tools.json_is_valid)
 
-        super().__init__(llm, tool_registry, max_iterations)
+        super().__init__(llm, tool_registry, max_iterations, max_tool_workers, checkpoint_path=checkpoint_path)
         # initialize state with system prompt
         prompt_path = Path("prompts/unit_tester_v1.txt")
         system_prompt_template = prompt_path.read_text(encoding="utf-8")
@@ -37,8 +43,10 @@ class SimpleUnitTesterAgent(Agent):
     
     def run(self, state: BaseAgentState) -> BaseAgentState:
         # 1) Call LLM
-        response = self.llm_generate(state)[0]
+        response = self.generate_response(state)
+        return self.handle_response(state, response)
 
+    def respond(self, state: BaseAgentState, response: dict) -> Generator[List[dict], List[dict], BaseAgentState]:
         # 2) Add assistant response
         state.add_message(role=response.get("role", "ai"), content=response.get("content", ""), tool_calls=response.get("tool_calls"))
 
@@ -47,6 +55,7 @@ class SimpleUnitTesterAgent(Agent):
 
         # 4) Execute tool calls if any
         tool_calls = response.get("tool_calls", []) or []
+        planned_calls = []
         for tool_call in tool_calls:
             if tool_call.get("type") != "function":
                 continue
@@ -62,10 +71,10 @@ class SimpleUnitTesterAgent(Agent):
             else:
                 func_inputs = args_raw
 
-            # track when we actually write a test file into tools/llm_tests
+            # track when we actually write a test file into the output dir
             if func_name == "write_file":
                 path_arg = func_inputs.get("file_path")
-                if path_arg and str(path_arg).startswith("tools/llm_tests"):
+                if path_arg and Path(path_arg).as_posix().startswith(self.output_dir + "/"):
                     test_files_written.add(str(path_arg))
 
             # skip premature pytest runs before any test file exists
@@ -77,7 +86,12 @@ class SimpleUnitTesterAgent(Agent):
             tool_call_copy = dict(tool_call)
             tool_call_copy["function"] = dict(tool_call["function"])
             tool_call_copy["function"]["arguments"] = func_inputs
-            tool_result = self.call_tool(tool_call_copy)
+            planned_calls.append(tool_call_copy)
+
+        # independent calls run concurrently; results come back in tool_call order
+        tool_results = (yield planned_calls)
+        for tool_call, tool_result in zip(planned_calls, tool_results):
+            func_name = tool_call["function"]["name"]
             tool_message = {
                 "role": "tool",
                 "tool_call_id": tool_call.get("id"),
@@ -87,34 +101,21 @@ class SimpleUnitTesterAgent(Agent):
             state.messages.append(tool_message)
             logger.info(json.dumps(tool_message, indent=2))
 
-            if func_name == "run_pytest_tests" and isinstance(tool_result, dict):
-                result_text = str(tool_result.get("result", ""))
-                collected_ok = False
-                if "collected" in result_text:
-                    # crude parse to ensure tests actually ran
-                    try:
-                        after_collected = result_text.split("collected", 1)[1]
-                        num = after_collected.split("items")[0].strip().split()[-1]
-                        collected_ok = int(num) > 0
-                    except Exception:
-                        collected_ok = False
-                if (
-                    tool_result.get("success")
-                    and "FAIL" not in result_text
-                    and "ERROR" not in result_text
-                    and "no tests ran" not in result_text.lower()
-                    and collected_ok
-                ):
-                    pytest_passed = True
+            if func_name == "run_pytest_tests" and report_passed(tool_result):
+                pytest_passed = True
 
         # If we have written tests but haven't run pytest yet, force a pytest call
         if test_files_written and not pytest_passed:
             pytest_call = {
                 "type": "function",
                 "id": "forced-pytest",
-                "function": {"name": "run_pytest_tests", "arguments": {"directory": "tools/llm_tests"}},
+                "function": {
+                    "name": "run_pytest_tests",
+                    # only the tests affected by the files written this turn
+                    "arguments": {"directory": self.output_dir, "changed_files": sorted(test_files_written)},
+                },
             }
-            tool_result = self.call_tool(pytest_call)
+            tool_result = (yield [pytest_call])[0]
             tool_message = {
                 "role": "tool",
                 "tool_call_id": pytest_call.get("id"),
@@ -124,30 +125,14 @@ class SimpleUnitTesterAgent(Agent):
             state.messages.append(tool_message)
             logger.info(json.dumps(tool_message, indent=2))
 
-            if isinstance(tool_result, dict):
-                result_text = str(tool_result.get("result", ""))
-                collected_ok = False
-                if "collected" in result_text:
-                    try:
-                        after_collected = result_text.split("collected", 1)[1]
-                        num = after_collected.split("items")[0].strip().split()[-1]
-                        collected_ok = int(num) > 0
-                    except Exception:
-                        collected_ok = False
-                if (
-                    tool_result.get("success")
-                    and "FAIL" not in result_text
-                    and "ERROR" not in result_text
-                    and "no tests ran" not in result_text.lower()
-                    and collected_ok
-                ):
-                    pytest_passed = True
-                else:
-                    # add quick hint message to state to steer next turn
-                    state.add_message(
-                        role="ai",
-                        content="Pytest failed or found no tests; fix imports (tools path) or failing tests, then rerun."
-                    )
+            if report_passed(tool_result):
+                pytest_passed = True
+            else:
+                # add quick hint message to state to steer next turn
+                state.add_message(
+                    role="ai",
+                    content="Pytest failed or found no tests; fix imports (tools path) or failing tests, then rerun."
+                )
 
         # 3) Set Stop condition (only when pytest passed)
         if pytest_passed:
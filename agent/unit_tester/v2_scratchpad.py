@@ -1,12 +1,31 @@
 import json
 from pathlib import Path
-from typing import List
+from typing import Generator, List, Optional
 from loguru import logger
 
-from ..base import Agent, ScratchpadAgentState, prune_messages
+from ..base import Agent, ScratchpadAgentState
+from ..context import ContextWindowManager
 from llm.base import LLMClient
 from tools.registry import ToolRegistry
 from tools.toolkit.builtin import code_tools, file_tools, json_tools
+from tools.toolkit.builtin.pytest_report import report_passed
+
+
+def _read_path(func_inputs: dict) -> Optional[str]:
+    """ file a read_file call reads (file_path or its `path` alias, normalized like self.target) """
+    path = func_inputs.get("file_path") or func_inputs.get("path")
+    return Path(path).as_posix() if path else None
+
+
+def _read_key(func_inputs: dict) -> Optional[str]:
+    """ path (+ line window) of a read_file call: paging through one file is not a duplicate read """
+    path = _read_path(func_inputs)
+    if not path:
+        return None
+    line_start, line_end = func_inputs.get("line_start"), func_inputs.get("line_end")
+    if line_start is None and line_end is None:
+        return path
+    return f"{path}:{line_start or 1}-{line_end or ''}"
 
 
 class ScratchpadUnitTesterAgent(Agent):
@@ -16,7 +35,21 @@ class ScratchpadUnitTesterAgent(Agent):
     - Prunes older tool/assistant messages to avoid context bloat.
     """
 
-    def __init__(self, llm: LLMClient, max_iterations: int = 100):
+    def __init__(
+        self,
+        llm: LLMClient,
+        max_iterations: int = 100,
+        max_tool_workers: int = 4,
+        max_prompt_tokens: int = 8000,
+        checkpoint_path: Optional[str] = None,
+        target: str = "tools/toolkit/web_explorer.py",
+        output_dir: str = "tools/llm_tests",
+    ):
+        # module under test and the directory its tests are written to / run in
+        # (one directory per target, so concurrent agents never see each other's tests)
+        self.target = Path(target).as_posix()
+        self.output_dir = Path(output_dir).as_posix()
+        self.test_file = f"{self.output_dir}/test_{Path(target).stem}.py"
         tool_registry = ToolRegistry()
         tool_registry.register(file_tools.write_file)
         tool_registry.register(file_tools.read_file)
@@ -24,12 +57,21 @@ class ScratchpadUnitTesterAgent(Agent):
         # tool_registry.register(file_tools.list_directory_files)
         tool_registry.register(json_tools.json_is_valid)
 
-        super().__init__(llm, tool_registry, max_iterations)
+        # small prompt budget: distilled knowledge lives in the scratchpad, not in history
+        context_manager = ContextWindowManager.from_config(llm.config, max_prompt_tokens=max_prompt_tokens)
+        super().__init__(
+            llm, tool_registry, max_iterations, max_tool_workers, context_manager, checkpoint_path=checkpoint_path
+        )
+        # raw tool outputs live in the scratchpad
+        self.drop_tool_messages = True
 
         prompt_path = Path("prompts/unit_tester_v2.txt")
         system_prompt_template = prompt_path.read_text(encoding="utf-8")
         system_prompt = system_prompt_template.format(
-            tools=self.tool_registry.to_string()
+            tools=self.tool_registry.to_string(),
+            target=self.target,
+            output_dir=self.output_dir,
+            test_file_name=Path(self.test_file).name,
         )
 
         self.initial_state = ScratchpadAgentState(
@@ -39,13 +81,21 @@ class ScratchpadUnitTesterAgent(Agent):
             pytest_passed=False,
         )
 
+    def _in_output_dir(self, path: str) -> bool:
+        return Path(path).as_posix().startswith(self.output_dir + "/")
+
     def start_point(self, user_query) -> ScratchpadAgentState:
         state = self.initial_state.model_copy(deep=True)
         state.add_message(role="user", content=user_query)
         return state
 
     def run(self, state: ScratchpadAgentState) -> ScratchpadAgentState:
-        response = self.llm_generate(state)[0]
+        response = self.generate_response(state)
+        return self.handle_response(state, response)
+
+    def respond(
+        self, state: ScratchpadAgentState, response: dict
+    ) -> Generator[List[dict], List[dict], ScratchpadAgentState]:
         state.messages.append(
             {
                 "role": response.get("role", "ai"),
@@ -81,7 +131,10 @@ class ScratchpadUnitTesterAgent(Agent):
                 return f"{func_name} summary: {json.dumps(summary)[:350]}"
             return f"{func_name}: {str(tool_result)[:350]}"
 
-        # Execute tool calls
+        # Plan tool calls first: skip/guard logic runs in order, then the planned
+        # calls execute (independent ones concurrently) and every step is flushed
+        # back in the original tool_call order.
+        steps: List[tuple] = []
         for tool_call in tool_calls:
             if tool_call.get("type") != "function":
                 continue
@@ -104,16 +157,19 @@ class ScratchpadUnitTesterAgent(Agent):
                 if state.dir_listings_executed >= 1:
                     skip_msg = (
                         "list_directory_files disabled after the initial call; "
-                        "proceed to read_file tools/toolkit/web_explorer.py and write tests."
-                    )
-                    scratchpad_entries.append(skip_msg)
-                    state.add_message(
-                        role="assistant",
-                        content=(
-                            "Stop listing directories. Next: read_file tools/toolkit/web_explorer.py, "
-                            "then write tests into tools/llm_tests/test_web_explorer.py and run pytest there."
-                        ),
+                        f"proceed to read_file {self.target} and write tests."
                     )
+                    steps.append(("scratchpad", skip_msg))
+                    steps.append((
+                        "message",
+                        {
+                            "role": "assistant",
+                            "content": (
+                                f"Stop listing directories. Next: read_file {self.target}, "
+                                f"then write tests into {self.test_file} and run pytest there."
+                            ),
+                        },
+                    ))
                     continue
                 depth_val = func_inputs.get("depth", 2)
                 try:
@@ -130,82 +186,121 @@ class ScratchpadUnitTesterAgent(Agent):
                         "directory listings disabled after initial exploration; "
                         "read target module and proceed to tests."
                     )
-                    scratchpad_entries.append(skip_msg)
-                    state.add_message(
-                        role="assistant",
-                        content=(
-                            "Next action: read_file tools/toolkit/web_explorer.py, "
-                            "draft tests into tools/llm_tests/test_web_explorer.py, "
-                            "then run pytest in tools/llm_tests."
-                        ),
-                    )
+                    steps.append(("scratchpad", skip_msg))
+                    steps.append((
+                        "message",
+                        {
+                            "role": "assistant",
+                            "content": (
+                                f"Next action: read_file {self.target}, "
+                                f"draft tests into {self.test_file}, "
+                                f"then run pytest in {self.output_dir}."
+                            ),
+                        },
+                    ))
                     continue
                 if signature in state.recent_dir_signatures[-3:]:
                     skip_msg = f"skipped duplicate list_directory_files for {signature}"
-                    scratchpad_entries.append(skip_msg)
+                    steps.append(("scratchpad", skip_msg))
                     continue
                 if state.dir_listings_executed >= 2:
                     skip_msg = (
                         "max directory listings reached; move to reading target module "
-                        "tools/toolkit/web_explorer.py then write tests in tools/llm_tests."
-                    )
-                    scratchpad_entries.append(skip_msg)
-                    state.add_message(
-                        role="assistant",
-                        content=(
-                            "Next action: read_file tools/toolkit/web_explorer.py, "
-                            "plan tests, write a single pytest file under tools/llm_tests/, "
-                            "then run pytest in tools/llm_tests."
-                        ),
+                        f"{self.target} then write tests in {self.output_dir}."
                     )
+                    steps.append(("scratchpad", skip_msg))
+                    steps.append((
+                        "message",
+                        {
+                            "role": "assistant",
+                            "content": (
+                                f"Next action: read_file {self.target}, "
+                                f"plan tests, write a single pytest file under {self.output_dir}/, "
+                                f"then run pytest in {self.output_dir}."
+                            ),
+                        },
+                    ))
                     continue
 
             if func_name == "write_file":
                 path_arg = func_inputs.get("file_path")
-                if path_arg and str(path_arg).startswith("tools/llm_tests"):
+                if path_arg and self._in_output_dir(path_arg):
                     test_files_written.add(str(path_arg))
 
             if func_name == "read_file":
-                path_arg = func_inputs.get("file_path")
-                if path_arg == "tools/toolkit/web_explorer.py":
+                path_arg = _read_key(func_inputs)
+                if _read_path(func_inputs) == self.target:
                     state.target_module_read = True
                 if path_arg and path_arg in state.read_files_seen:
                     skip_msg = (
                         f"skipped duplicate read_file for {path_arg}; proceed to write tests "
-                        "into tools/llm_tests/test_web_explorer.py and run pytest there."
+                        f"into {self.test_file} and run pytest there."
                     )
-                    scratchpad_entries.append(skip_msg)
+                    steps.append(("scratchpad", skip_msg))
                     # Return a tool-style error to make the LLM advance
-                    tool_message = {
-                        "role": "tool",
-                        "tool_call_id": tool_call.get("id"),
-                        "name": func_name,
-                        "content": json.dumps(
-                            {
-                                "success": False,
-                                "error": "read_file already executed for this path; write tests now and run pytest.",
-                            }
-                        ),
-                    }
-                    state.messages.append(tool_message)
-                    logger.info(json.dumps(tool_message, indent=2))
-                    state.add_message(
-                        role="assistant",
-                        content=(
-                            "Do not re-read the same file. Move on: write tests into "
-                            "tools/llm_tests/test_web_explorer.py, then run pytest in tools/llm_tests."
-                        ),
-                    )
+                    steps.append((
+                        "message",
+                        {
+                            "role": "tool",
+                            "tool_call_id": tool_call.get("id"),
+                            "name": func_name,
+                            "content": json.dumps(
+                                {
+                                    "success": False,
+                                    "error": "read_file already executed for this path; write tests now and run pytest.",
+                                }
+                            ),
+                        },
+                    ))
+                    steps.append((
+                        "message",
+                        {
+                            "role": "assistant",
+                            "content": (
+                                "Do not re-read the same file. Move on: write tests into "
+                                f"{self.test_file}, then run pytest in {self.output_dir}."
+                            ),
+                        },
+                    ))
                     continue
 
             if func_name == "run_pytest_tests" and not test_files_written:
                 logger.debug("Skipping run_pytest_tests until a test file is written")
                 continue
 
+            # every planned call is executed, so bookkeeping can happen now and
+            # later calls of the same turn see it (e.g. duplicate reads)
+            if func_name == "list_directory_files":
+                state.recent_dir_signatures.append(signature)
+                state.recent_dir_signatures = state.recent_dir_signatures[-5:]
+                state.dir_listings_executed += 1
+            if func_name == "read_file":
+                path_arg = _read_key(func_inputs)
+                if path_arg:
+                    state.read_files_seen.add(path_arg)
+
             tool_call_copy = dict(tool_call)
             tool_call_copy["function"] = dict(tool_call["function"])
             tool_call_copy["function"]["arguments"] = func_inputs
-            tool_result = self.call_tool(tool_call_copy)
+            steps.append(("call", tool_call_copy))
+
+        # Execute tool calls
+        planned_calls = [payload for kind, payload in steps if kind == "call"]
+        tool_results = iter((yield planned_calls))
+        for kind, payload in steps:
+            if kind == "scratchpad":
+                scratchpad_entries.append(payload)
+                continue
+            if kind == "message":
+                state.messages.append(payload)
+                if payload.get("role") == "tool":
+                    logger.info(json.dumps(payload, indent=2))
+                continue
+
+            tool_call = payload
+            func_name = tool_call["function"]["name"]
+            func_inputs = tool_call["function"]["arguments"]
+            tool_result = next(tool_results)
             tool_message = {
                 "role": "tool",
                 "tool_call_id": tool_call.get("id"),
@@ -214,44 +309,23 @@ class ScratchpadUnitTesterAgent(Agent):
             }
             state.messages.append(tool_message)
             logger.info(json.dumps(tool_message, indent=2))
-
-            if func_name == "list_directory_files":
-                state.recent_dir_signatures.append(signature)
-                state.recent_dir_signatures = state.recent_dir_signatures[-5:]
-                state.dir_listings_executed += 1
-            if func_name == "read_file":
-                path_arg = func_inputs.get("file_path")
-                if path_arg:
-                    state.read_files_seen.add(path_arg)
             scratchpad_entries.append(summarize_tool(func_name, tool_result, func_inputs))
 
-            if func_name == "run_pytest_tests" and isinstance(tool_result, dict):
-                result_text = str(tool_result.get("result", ""))
-                collected_ok = False
-                if "collected" in result_text:
-                    try:
-                        after_collected = result_text.split("collected", 1)[1]
-                        num = after_collected.split("items")[0].strip().split()[-1]
-                        collected_ok = int(num) > 0
-                    except Exception:
-                        collected_ok = False
-                if (
-                    tool_result.get("success")
-                    and "FAIL" not in result_text
-                    and "ERROR" not in result_text
-                    and "no tests ran" not in result_text.lower()
-                    and collected_ok
-                ):
-                    pytest_passed = True
+            if func_name == "run_pytest_tests" and report_passed(tool_result):
+                pytest_passed = True
 
         # Force pytest once a test file exists and no passing run yet
         if test_files_written and not pytest_passed:
             pytest_call = {
                 "type": "function",
                 "id": "forced-pytest",
-                "function": {"name": "run_pytest_tests", "arguments": {"directory": "tools/llm_tests"}},
+                "function": {
+                    "name": "run_pytest_tests",
+                    # only the tests affected by the files written so far
+                    "arguments": {"directory": self.output_dir, "changed_files": sorted(test_files_written)},
+                },
             }
-            tool_result = self.call_tool(pytest_call)
+            tool_result = (yield [pytest_call])[0]
             tool_message = {
                 "role": "tool",
                 "tool_call_id": pytest_call.get("id"),
@@ -262,31 +336,15 @@ class ScratchpadUnitTesterAgent(Agent):
             logger.info(json.dumps(tool_message, indent=2))
             scratchpad_entries.append(f"forced run_pytest_tests: {str(tool_result)[:500]}")
 
-            if isinstance(tool_result, dict):
-                result_text = str(tool_result.get("result", ""))
-                collected_ok = False
-                if "collected" in result_text:
-                    try:
-                        after_collected = result_text.split("collected", 1)[1]
-                        num = after_collected.split("items")[0].strip().split()[-1]
-                        collected_ok = int(num) > 0
-                    except Exception:
-                        collected_ok = False
-                if (
-                    tool_result.get("success")
-                    and "FAIL" not in result_text
-                    and "ERROR" not in result_text
-                    and "no tests ran" not in result_text.lower()
-                    and collected_ok
-                ):
-                    pytest_passed = True
-                else:
-                    state.add_message(
-                        role="ai",
-                        content="Pytest failed or found no tests; fix imports (tools path) or failing tests, then rerun."
-                    )
+            if report_passed(tool_result):
+                pytest_passed = True
+            else:
+                state.add_message(
+                    role="ai",
+                    content="Pytest failed or found no tests; fix imports (tools path) or failing tests, then rerun."
+                )
 
-        # Update scratchpad and prune history to keep context small
+        # Update scratchpad (tool outputs are left out of the next request, see drop_tool_messages)
         scratchpad_payload = None
         if scratchpad_entries:
             state.scratchpad.extend(scratchpad_entries)
@@ -302,8 +360,6 @@ class ScratchpadUnitTesterAgent(Agent):
                     "content": f"<scratchpad>{json.dumps(scratchpad_payload)}</scratchpad>",
                 }
             )
-        state.messages = prune_messages(state.messages, drop_tools=True, last_n=4)
-
         # Stop condition
         if pytest_passed:
             finish_msg = {
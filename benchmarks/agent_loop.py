@@ -0,0 +1,320 @@
+"""
+Agent-loop overhead benchmark.
+
+Drives both unit-tester agents against a scripted (or replayed) LLM with stubbed
+side-effect tools and reports, per iteration, where time goes:
+    llm | tool | serialization (json dumps/loads) | logging | pruning | other
+plus message-list sizes and (optionally) allocation peaks.
+
+run from repo root:
+    python -m benchmarks.agent_loop --iterations 40
+    python -m benchmarks.agent_loop --save bench.json
+    python -m benchmarks.agent_loop --baseline bench.json --max-regression 0.25
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+from loguru import logger
+
+from agent.unit_tester import v1_simple, v2_scratchpad
+from llm.base import LLMClient
+from llm.config import LLMConfig
+from llm.replay import ReplayLLMClient
+from llm.streaming import message_to_events
+from tools.decorator import tool
+from tools.registry import ToolRegistry
+from tools.toolkit.builtin import file_tools, json_tools
+
+PHASES = ("llm", "tool", "serialization", "logging", "pruning", "other")
+READ_TARGETS = [
+    "tools/toolkit/web_explorer.py",
+    "tools/toolkit/builtin/file_tools.py",
+    "tools/toolkit/builtin/code_tools.py",
+    "agent/base.py",
+]
+
+
+# ---------------- stubs ----------------
+class PytestStub:
+    """ fails until `pass_after` runs, then reports a green run (run_pytest_tests-like report) """
+
+    def __init__(self, pass_after: int):
+        self.pass_after = pass_after
+        self.runs = 0
+
+    def __call__(self, directory: str = ".", changed_files: list = None, full_run: bool = False) -> dict:
+        self.runs += 1
+        tests = [[f"test_x.py::test_{i}", "passed", 0.001] for i in range(6)]
+        if self.runs < self.pass_after:
+            tests[5][1] = "failed"
+            report = {
+                "exit_code": 1, "collected": 6, "passed": 5, "failed": 1, "errors": 0, "skipped": 0,
+                "duration": 0.12, "tests": tests,
+                "failures": [{"test": "test_x.py::test_5", "outcome": "failed",
+                              "traceback": "E   AssertionError\n" * 15}],
+            }
+            return {"success": False, "result": report}
+        report = {
+            "exit_code": 0, "collected": 6, "passed": 6, "failed": 0, "errors": 0, "skipped": 0,
+            "duration": 0.10, "tests": tests, "failures": [],
+        }
+        return {"success": True, "result": report}
+
+
+def build_registry(pytest_stub: PytestStub) -> ToolRegistry:
+    @tool(serial=True)
+    def write_file(file_path: str, content: str) -> dict:
+        """Write content to a file (benchmark stub, nothing is written)."""
+        return {"success": True, "result": True}
+
+    @tool(max_concurrency=1)
+    def run_pytest_tests(directory: str = ".", changed_files: list = None, full_run: bool = False) -> dict:
+        """Run pytest in the given directory (benchmark stub)."""
+        return pytest_stub(directory, changed_files, full_run)
+
+    registry = ToolRegistry()
+    registry.register(write_file)
+    registry.register(file_tools.read_file)
+    registry.register(run_pytest_tests)
+    registry.register(file_tools.list_directory_files)
+    registry.register(json_tools.json_is_valid)
+    return registry
+
+
+class ScriptedLLMClient(LLMClient):
+    """ returns a fixed tool-calling script: read a module, validate json, write a test file """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(LLMConfig(temperature=0.0))
+        self.latency = latency
+        self.calls = 0
+
+    def generate(self, messages: List[Any], tools: Optional[list] = None) -> list[dict]:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        n = self.calls
+        test_content = "def test_ok():\n    assert True\n" * (20 + n)
+        tool_calls = [
+            {"type": "function", "id": f"read-{n}", "function": {
+                "name": "read_file",
+                "arguments": json.dumps({"file_path": READ_TARGETS[n % len(READ_TARGETS)]})}},
+            {"type": "function", "id": f"json-{n}", "function": {
+                "name": "json_is_valid", "arguments": json.dumps({"s": json.dumps({"iteration": n})})}},
+            {"type": "function", "id": f"write-{n}", "function": {
+                "name": "write_file",
+                "arguments": json.dumps({"file_path": "tools/llm_tests/test_bench.py", "content": test_content})}},
+        ]
+        return [{"role": "ai", "content": f"iteration {n}: reading, validating and writing tests", "tool_calls": tool_calls}]
+
+    def stream(self, messages: List[Any], tools: Optional[list] = None):
+        yield from message_to_events(self.generate(messages, tools=tools)[0])
+
+
+# ---------------- instrumentation ----------------
+class PhaseRecorder:
+    def __init__(self):
+        self.iteration = 0
+        self.phase_totals = defaultdict(lambda: defaultdict(float))  # iteration -> phase -> seconds
+        self.iterations: List[dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def phase(self, name: str):
+        # nested phases (e.g. json.dumps inside a tool) are attributed to the outer one
+        if getattr(self._local, "active", False):
+            yield
+            return
+        self._local.active = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.active = False
+            with self._lock:
+                self.phase_totals[self.iteration][name] += elapsed
+
+    def timed(self, name: str, func: Callable) -> Callable:
+        def wrapper(*args, **kwargs):
+            with self.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+class _TimedModule:
+    """ proxy for a module attribute (json / logger) that times selected functions """
+
+    def __init__(self, target, recorder: PhaseRecorder, phase: str, names: tuple):
+        self._target = target
+        self._timed = {name: recorder.timed(phase, getattr(target, name)) for name in names}
+
+    def __getattr__(self, name):
+        return self._timed.get(name) or getattr(self._target, name)
+
+
+@contextmanager
+def instrument(agent, module, recorder: PhaseRecorder):
+    """ patch the agent module + instance so every phase is timed, restore afterwards """
+    originals = {"json": module.json, "logger": module.logger}
+    module.json = _TimedModule(json, recorder, "serialization", ("dumps", "loads"))
+    module.logger = _TimedModule(logger, recorder, "logging", ("info", "debug"))
+    agent.llm = _TimedModule(agent.llm, recorder, "llm", ("generate",))
+    agent.call_tool = recorder.timed("tool", agent.call_tool)
+    # history fitting (per request + state pruning)
+    agent.context_manager.fit = recorder.timed("pruning", agent.context_manager.fit)
+    try:
+        yield
+    finally:
+        for name, value in originals.items():
+            setattr(module, name, value)
+
+
+def message_bytes(messages: list) -> int:
+    return sum(len(str(m.get("content") or "")) for m in messages)
+
+
+def run_agent(name: str, agent_cls, module, llm: LLMClient, iterations: int, trace_alloc: bool) -> dict:
+    pytest_stub = PytestStub(pass_after=iterations)
+    agent = agent_cls(llm, max_iterations=iterations)
+    agent.tool_registry = build_registry(pytest_stub)
+    recorder = PhaseRecorder()
+    run = agent.run
+
+    def measured_run(state):
+        recorder.iteration = state.iteration
+        messages_before = len(state.messages)
+        if trace_alloc:
+            tracemalloc.reset_peak()
+            mem_start = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        state = run(state)
+        wall = time.perf_counter() - start
+        record = {
+            "iteration": state.iteration,
+            "wall": wall,
+            "messages_before": messages_before,
+            "messages_after": len(state.messages),
+            "content_bytes_after": message_bytes(state.messages),
+        }
+        if trace_alloc:
+            record["alloc_peak"] = tracemalloc.get_traced_memory()[1] - mem_start
+        recorder.iterations.append(record)
+        return state
+
+    agent.run = measured_run
+    if trace_alloc:
+        tracemalloc.start()
+    try:
+        with instrument(agent, module, recorder):
+            agent.iterate(user_query="Write pytest unit tests for tools/toolkit/web_explorer.py")
+    finally:
+        if trace_alloc:
+            tracemalloc.stop()
+        agent.shutdown()
+
+    for record in recorder.iterations:
+        phases = recorder.phase_totals[record["iteration"]]
+        accounted = sum(phases.get(p, 0.0) for p in PHASES if p != "other")
+        record.update({p: phases.get(p, 0.0) for p in PHASES if p != "other"})
+        record["other"] = max(record["wall"] - accounted, 0.0)
+    return {"agent": name, "iterations": recorder.iterations}
+
+
+# ---------------- reporting ----------------
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(int(round(q * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def summarize(result: dict) -> dict:
+    rows = result["iterations"]
+    summary = {}
+    for key in PHASES + ("wall",):
+        values = [r[key] for r in rows]
+        summary[key] = {"p50": percentile(values, 0.5), "p95": percentile(values, 0.95), "total": sum(values)}
+    summary["messages_max"] = max((r["messages_after"] for r in rows), default=0)
+    summary["content_bytes_max"] = max((r["content_bytes_after"] for r in rows), default=0)
+    if rows and "alloc_peak" in rows[0]:
+        summary["alloc_peak_p95"] = percentile([r["alloc_peak"] for r in rows], 0.95)
+    return summary
+
+
+def print_report(name: str, result: dict, summary: dict):
+    print(f"\n== {name}: {len(result['iterations'])} iterations ==")
+    print(f"{'phase':<14} {'p50(ms)':>9} {'p95(ms)':>9} {'total(ms)':>10}")
+    for key in PHASES + ("wall",):
+        s = summary[key]
+        print(f"{key:<14} {s['p50'] * 1e3:>9.3f} {s['p95'] * 1e3:>9.3f} {s['total'] * 1e3:>10.2f}")
+    print(f"max messages: {summary['messages_max']}, max content bytes: {summary['content_bytes_max']}")
+    if "alloc_peak_p95" in summary:
+        print(f"p95 allocation peak per iteration: {summary['alloc_peak_p95'] / 1024:.1f} KiB")
+
+
+def compare(summaries: dict, baseline: dict, max_regression: float) -> List[str]:
+    """ regressions of the loop overhead (wall - llm) p50 against a saved baseline """
+    failures = []
+    for name, summary in summaries.items():
+        if name not in baseline:
+            continue
+        current = summary["wall"]["p50"] - summary["llm"]["p50"]
+        previous = baseline[name]["wall"]["p50"] - baseline[name]["llm"]["p50"]
+        if previous > 0 and current > previous * (1 + max_regression):
+            failures.append(f"{name}: loop overhead p50 {previous * 1e3:.3f}ms -> {current * 1e3:.3f}ms")
+    return failures
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="synthetic seconds per scripted LLM call")
+    parser.add_argument("--cassette", help="replay a recorded cassette (sequence match) instead of the script")
+    parser.add_argument("--trace-alloc", action="store_true", help="record per-iteration allocation peaks (slower)")
+    parser.add_argument("--save", help="write summaries as json (use as --baseline later)")
+    parser.add_argument("--baseline", help="json written by --save to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    # keep log formatting cost in the loop but don't flood the terminal
+    logger.remove()
+    logger.add(lambda _: None, level="INFO")
+
+    def make_llm() -> LLMClient:
+        if args.cassette:
+            return ReplayLLMClient(args.cassette, match="sequence", latency=args.llm_latency)
+        return ScriptedLLMClient(latency=args.llm_latency)
+
+    agents = {
+        "v1_simple": (v1_simple.SimpleUnitTesterAgent, v1_simple),
+        "v2_scratchpad": (v2_scratchpad.ScratchpadUnitTesterAgent, v2_scratchpad),
+    }
+    summaries = {}
+    for name, (agent_cls, module) in agents.items():
+        result = run_agent(name, agent_cls, module, make_llm(), args.iterations, args.trace_alloc)
+        summaries[name] = summarize(result)
+        print_report(name, result, summaries[name])
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(summaries, indent=2), encoding="utf-8")
+    if args.baseline:
+        failures = compare(summaries, json.loads(Path(args.baseline).read_text(encoding="utf-8")), args.max_regression)
+        for failure in failures:
+            print(f"REGRESSION {failure}", file=sys.stderr)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
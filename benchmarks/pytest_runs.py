@@ -0,0 +1,78 @@
+"""
+run_pytest_tests latency: fresh subprocess per call vs warm worker pool.
+
+Generates a small suite (like the agents' generated tests) in a temp dir and
+times repeated runs, as the agents do when they force a re-run after writing tests.
+
+run from repo root:
+    python -m benchmarks.pytest_runs --runs 10 --files 5
+"""
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from loguru import logger
+
+from benchmarks.agent_loop import percentile
+from tools.toolkit.builtin import code_tools, pytest_pool
+
+
+def write_suite(directory: Path, files: int, tests_per_file: int):
+    for i in range(files):
+        body = "\n".join(
+            f"def test_{i}_{j}():\n    assert json_is_valid('{{\"n\": {j}}}') is True\n"
+            for j in range(tests_per_file)
+        )
+        (directory / f"test_generated_{i}.py").write_text(
+            "from tools.toolkit.builtin.json_tools import json_is_valid\n\n" + body,
+            encoding="utf-8",
+        )
+
+
+def time_runs(directory: Path, runs: int, use_pool: bool) -> List[float]:
+    previous, code_tools.USE_PYTEST_POOL = code_tools.USE_PYTEST_POOL, use_pool
+    timings = []
+    try:
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = code_tools.run_pytest_tests(str(directory))
+            timings.append(time.perf_counter() - start)
+            if not result["success"]:
+                raise RuntimeError(result.get("result") or result.get("error"))
+    finally:
+        code_tools.USE_PYTEST_POOL = previous
+    return timings
+
+
+def report(name: str, timings: List[float]):
+    steady = timings[1:] or timings
+    print(
+        f"{name:<12} first {timings[0] * 1e3:>8.1f}ms  "
+        f"p50 {percentile(steady, 0.5) * 1e3:>8.1f}ms  p95 {percentile(steady, 0.95) * 1e3:>8.1f}ms"
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--files", type=int, default=5)
+    parser.add_argument("--tests-per-file", type=int, default=10)
+    args = parser.parse_args(argv)
+    logger.remove()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        write_suite(directory, args.files, args.tests_per_file)
+        report("subprocess", time_runs(directory, args.runs, use_pool=False))
+        if pytest_pool.available():
+            report("pool", time_runs(directory, args.runs, use_pool=True))
+        else:
+            print("pool         unavailable on this platform (no os.fork)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,49 +1,325 @@
-from playwright.sync_api import sync_playwright, Browser, Page, Playwright
+import asyncio
+import time
+from collections import deque
+from typing import List, Optional, Tuple
 
-class BrowserManager:
-    """Manages browser lifecycle properly with context manager support."""
+from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page, Playwright
+from playwright.async_api import async_playwright
+from playwright.async_api import Browser as AsyncBrowser, Page as AsyncPage, Playwright as AsyncPlaywright
 
-    def __init__(self):
+from browser_routing import RoutingProfile
+
+
+class _PooledPage:
+    """An isolated browser context with its page (sync or async playwright objects)."""
+
+    def __init__(self, context: BrowserContext, page: Page):
+        self.context = context
+        self.page = page
+        self.last_used = time.monotonic()
+        # checked out and unused for idle_timeout (reported, never closed by the pool)
+        self.expired = False
+
+    def is_closed(self) -> bool:
+        return self.page.is_closed()
+
+    def close(self):
+        try:
+            self.context.close()
+        except Exception:
+            pass  # browser already gone
+
+    async def aclose(self):
+        try:
+            await self.context.close()
+        except Exception:
+            pass
+
+
+class _PagePool:
+    """
+    Pool bookkeeping shared by BrowserManager and AsyncBrowserManager (sizes, warm
+    pages, sessions, eviction). No playwright calls here: the subclasses create,
+    route and close the pages, synchronously or awaiting them.
+    """
+
+    def __init__(self, min_size: int = 1, max_size: int = 8, idle_timeout: float = 300.0,
+                 page_timeout: int = 15000, routing: Optional[RoutingProfile] = None):
+        self.routing = routing
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.page_timeout = page_timeout
+        self._idle: deque[_PooledPage] = deque()
+        self._pages: dict[str, _PooledPage] = {}  # key = agent/session name
+        self._creating = 0  # pages being created (count toward max_size)
+
+    @property
+    def size(self) -> int:
+        return len(self._idle) + len(self._pages) + self._creating
+
+    def _missing(self) -> int:
+        """Warm pages to create to top the idle pool up to min_size."""
+        return min(self.min_size - len(self._idle), self.max_size - self.size)
+
+    def _pop_idle(self) -> Tuple[Optional[_PooledPage], List[_PooledPage]]:
+        """(first open warm page or None, closed ones taken out on the way)."""
+        stale = []
+        while self._idle:
+            pooled = self._idle.popleft()
+            if not pooled.is_closed():
+                return pooled, stale
+            stale.append(pooled)
+        return None, stale
+
+    def _collect_evictions(self) -> Tuple[List[str], List[_PooledPage]]:
+        """
+        (sessions unused for idle_timeout, now marked expired; pages to close: warm
+        pages idle for idle_timeout above min_size and sessions whose page was closed).
+        """
+        deadline = time.monotonic() - self.idle_timeout
+        expired, evicted = [], []
+        for session_id, pooled in list(self._pages.items()):
+            if pooled.is_closed():
+                del self._pages[session_id]
+                evicted.append(pooled)
+            elif pooled.last_used < deadline:
+                pooled.expired = True
+                expired.append(session_id)
+        kept = deque(p for p in self._idle if not p.is_closed())
+        while len(kept) > self.min_size and kept[0].last_used < deadline:
+            evicted.append(kept.popleft())
+        self._idle = kept
+        return expired, evicted
+
+    def _exhausted(self, expired: List[str]) -> RuntimeError:
+        message = f"Browser pool exhausted ({self.max_size} sessions in use)"
+        if expired:
+            message += f"; unused for longer than idle_timeout: {', '.join(expired)} (close_page them to free slots)"
+        return RuntimeError(message)
+
+    @staticmethod
+    def _touch(pooled: _PooledPage):
+        pooled.last_used = time.monotonic()
+        pooled.expired = False
+        return pooled.page
+
+    def _take_all(self) -> List[_PooledPage]:
+        pooled_pages = list(self._pages.values()) + list(self._idle)
+        self._pages.clear()
+        self._idle.clear()
+        return pooled_pages
+
+
+class BrowserManager(_PagePool):
+    """
+    Manages browser lifecycle with a pool of pre-warmed, isolated pages.
+
+    Every session checks out its own browser context (cookies / storage are never
+    shared) with a ready page. Returned contexts are closed, not reused, and the pool
+    is topped back up to `min_size` warm pages so the next session starts instantly.
+    Warm pages idle for `idle_timeout` seconds are evicted when the pool is next used:
+    the sync playwright api is bound to its thread, so there is no background reaper.
+    Checked-out sessions belong to their caller and are never closed by the pool;
+    the ones unused for `idle_timeout` are marked expired and reported instead
+    (evict_idle's result, the pool-exhausted error) so their owner can close_page them.
+    `routing` (browser_routing.RoutingProfile) is applied to each session's context
+    when it is checked out (block resource types / domains, response cache).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
         self._playwright: Playwright = None
         self._browser: Browser = None
-        self._pages: dict[str, Page] = {}  # key = agent/session name
 
     def start(self):
-        """Initialize browser if not already running."""
+        """Initialize browser (and the warm pages) if not already running."""
         if self._browser is None:
             self._playwright = sync_playwright().start()
             self._browser = self._playwright.chromium.launch(headless=True)
+            self._fill()
         return self._browser
-    
-    def get_page(self, session_id: str) -> Page:
-        """Get or create a page for a given session/agent."""
+
+    def _new_page(self) -> _PooledPage:
+        context = self._browser.new_context()
+        page = context.new_page()
+        page.set_default_timeout(self.page_timeout)
+        return _PooledPage(context, page)
+
+    def _fill(self):
+        """Top the idle pool up to min_size."""
+        for _ in range(self._missing()):
+            self._idle.append(self._new_page())
+
+    def evict_idle(self) -> List[str]:
+        """
+        Close warm pages idle for idle_timeout (above min_size) and drop sessions whose
+        page was closed. Returns the sessions unused for idle_timeout (marked expired).
+        """
+        expired, evicted = self._collect_evictions()
+        for pooled in evicted:
+            pooled.close()
+        return expired
+
+    def get_page(self, session_id: str, routing: Optional[RoutingProfile] = None) -> Page:
+        """
+        Get the page of a session, checking a warm one out of the pool on first use
+        (routing overrides the manager's profile for a new session).
+        """
         self.start()
-        if session_id not in self._pages or self._pages[session_id].is_closed():
-            self._pages[session_id] = self._browser.new_page()
-            self._pages[session_id].set_default_timeout(15000)
-        return self._pages[session_id]
-    
+        pooled = self._pages.get(session_id)
+        if pooled is not None and pooled.is_closed():
+            self.close_page(session_id)
+            pooled = None
+        if pooled is None:
+            pooled = self._checkout()
+            profile = routing or self.routing
+            if profile is not None:
+                pooled.context.route("**/*", profile.handle)
+            self._pages[session_id] = pooled
+        return self._touch(pooled)
+
+    def _checkout(self) -> _PooledPage:
+        pooled, stale = self._pop_idle()
+        for closed in stale:
+            closed.close()
+        if pooled is not None:
+            return pooled
+        expired = self.evict_idle() if self.size >= self.max_size else []
+        if self.size >= self.max_size:
+            raise self._exhausted(expired)
+        return self._new_page()
+
     def close_page(self, session_id: str):
-        """Close a single page."""
-        page = self._pages.get(session_id)
-        if page and not page.is_closed():
-            page.close()
-            del self._pages[session_id]
+        """Return a session's page: its context is closed and a fresh warm page replaces it."""
+        pooled = self._pages.pop(session_id, None)
+        if pooled is not None:
+            pooled.close()
+        if self._browser is not None:
+            self.evict_idle()
+            self._fill()
 
     def close_browser(self):
         """Close all pages and the browser."""
-        for page in self._pages.values():
-            if not page.is_closed():
-                page.close()
-        self._pages.clear()
+        for pooled in self._take_all():
+            pooled.close()
         if self._browser:
             self._browser.close()
             self._browser = None
         if self._playwright:
             self._playwright.stop()
             self._playwright = None
+
+
+class AsyncBrowserManager(_PagePool):
+    """
+    BrowserManager on playwright.async_api: same pool of isolated, pre-warmed pages,
+    but one event loop drives every session concurrently. Bound to the event loop
+    it was started on.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._playwright: AsyncPlaywright = None
+        self._browser: AsyncBrowser = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def start(self):
+        """Initialize browser (and the warm pages) if not already running."""
+        async with self._get_lock():
+            if self._browser is None:
+                self._playwright = await async_playwright().start()
+                self._browser = await self._playwright.chromium.launch(headless=True)
+                await self._fill()
+        return self._browser
+
+    async def _new_page(self) -> _PooledPage:
+        context = await self._browser.new_context()
+        page = await context.new_page()
+        page.set_default_timeout(self.page_timeout)
+        return _PooledPage(context, page)
+
+    async def _fill(self):
+        missing = self._missing()
+        if missing > 0:
+            self._creating += missing
+            try:
+                pages = await asyncio.gather(*(self._new_page() for _ in range(missing)))
+            finally:
+                self._creating -= missing
+            self._idle.extend(pages)
+
+    async def evict_idle(self) -> List[str]:
+        """
+        Close warm pages idle for idle_timeout (above min_size) and drop sessions whose
+        page was closed. Returns the sessions unused for idle_timeout (marked expired).
+        """
+        expired, evicted = self._collect_evictions()
+        await asyncio.gather(*(pooled.aclose() for pooled in evicted))
+        return expired
+
+    async def get_page(self, session_id: str, routing: Optional[RoutingProfile] = None) -> AsyncPage:
+        """Get the page of a session, checking a warm one out of the pool on first use."""
+        await self.start()
+        pooled = self._pages.get(session_id)
+        if pooled is not None and pooled.is_closed():
+            await self.close_page(session_id)
+            pooled = None
+        if pooled is None:
+            pooled = await self._checkout()
+            # another coroutine of the same session may have won the race
+            if session_id in self._pages:
+                self._idle.append(pooled)
+                pooled = self._pages[session_id]
+            else:
+                self._pages[session_id] = pooled
+                profile = routing or self.routing
+                if profile is not None:
+                    await pooled.context.route("**/*", profile.ahandle)
+        return self._touch(pooled)
+
+    async def _checkout(self) -> _PooledPage:
+        pooled, stale = self._pop_idle()
+        await asyncio.gather(*(closed.aclose() for closed in stale))
+        if pooled is not None:
+            return pooled
+        expired = await self.evict_idle() if self.size >= self.max_size else []
+        if self.size >= self.max_size:
+            raise self._exhausted(expired)
+        self._creating += 1
+        try:
+            return await self._new_page()
+        finally:
+            self._creating -= 1
+
+    async def close_page(self, session_id: str):
+        """Return a session's page: its context is closed and a fresh warm page replaces it."""
+        pooled = self._pages.pop(session_id, None)
+        if pooled is not None:
+            await pooled.aclose()
+        if self._browser is not None:
+            await self.evict_idle()
+            await self._fill()
+
+    async def close_browser(self):
+        """Close all pages and the browser."""
+        await asyncio.gather(*(pooled.aclose() for pooled in self._take_all()))
+        if self._browser:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright:
+            await self._playwright.stop()
+            self._playwright = None
+
+
 # Singleton  class
 __browser_manager = BrowserManager()
+__async_browser_manager = AsyncBrowserManager()
 
 def get_page(session_id: str) -> Page:
     return __browser_manager.get_page(session_id)
@@ -51,4 +327,30 @@ def get_page(session_id: str) -> Page:
 
 
 def close_page(session_id: str) -> Page:
-    return __browser_manager.close_page(session_id)
\ No newline at end of file
+    return __browser_manager.close_page(session_id)
+
+
+async def aget_page(session_id: str) -> AsyncPage:
+    return await __async_browser_manager.get_page(session_id)
+
+
+async def aclose_page(session_id: str):
+    return await __async_browser_manager.close_page(session_id)
+
+
+def configure_routing(routing: Optional[RoutingProfile]):
+    """Routing profile for sessions checked out from now on (None = no filtering)."""
+    __browser_manager.routing = routing
+    __async_browser_manager.routing = routing
+
+
+def configure_pool(min_size: Optional[int] = None, max_size: Optional[int] = None,
+                   idle_timeout: Optional[float] = None):
+    """Tune the shared page pools (takes effect on the next checkout/return)."""
+    for manager in (__browser_manager, __async_browser_manager):
+        if min_size is not None:
+            manager.min_size = min_size
+        if max_size is not None:
+            manager.max_size = max_size
+        if idle_timeout is not None:
+            manager.idle_timeout = idle_timeout
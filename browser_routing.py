@@ -0,0 +1,199 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+from loguru import logger
+
+# common analytics / ad hosts the agent never needs (matched with their subdomains)
+TRACKER_DOMAINS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "facebook.net",
+    "connect.facebook.net",
+    "hotjar.com",
+    "segment.io",
+    "scorecardresearch.com",
+    "clarity.ms",
+)
+
+
+class RoutingProfile:
+    """
+    Which requests a page may make, applied to a session's browser context with
+    context.route (see BrowserManager.routing).
+
+    - block_resource_types: playwright resource types to abort (image, media, font, ...)
+    - allow_domains: if set, only these hosts (and their subdomains) are reachable
+    - deny_domains: hosts (and subdomains) that are always aborted
+    - cache_dir: optional on-disk cache of successful GET responses of
+      `cache_resource_types`, reused for `cache_ttl` seconds
+    """
+
+    def __init__(
+        self,
+        block_resource_types: Iterable[str] = (),
+        allow_domains: Optional[Iterable[str]] = None,
+        deny_domains: Iterable[str] = (),
+        cache_dir: Optional[str] = None,
+        cache_resource_types: Iterable[str] = ("stylesheet", "script"),
+        cache_ttl: float = 24 * 3600,
+    ):
+        self.block_resource_types = frozenset(block_resource_types)
+        self.allow_domains = tuple(d.lower() for d in allow_domains) if allow_domains is not None else None
+        self.deny_domains = tuple(d.lower() for d in deny_domains)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.cache_resource_types = frozenset(cache_resource_types)
+        self.cache_ttl = cache_ttl
+        self.blocked = 0
+        self.cache_hits = 0
+
+    @staticmethod
+    def _matches(host: str, domains: tuple) -> bool:
+        return any(host == d or host.endswith("." + d) for d in domains)
+
+    def should_block(self, url: str, resource_type: str) -> bool:
+        if resource_type in self.block_resource_types:
+            return True
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https"):
+            return False  # data:, blob:, about: ...
+        host = (parts.hostname or "").lower()
+        if self._matches(host, self.deny_domains):
+            return True
+        return self.allow_domains is not None and not self._matches(host, self.allow_domains)
+
+    # ---------------- response cache ----------------
+    def _cache_paths(self, url: str):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.json", self.cache_dir / f"{key}.body"
+
+    def cacheable(self, method: str, resource_type: str) -> bool:
+        return self.cache_dir is not None and method == "GET" and resource_type in self.cache_resource_types
+
+    def cache_get(self, url: str) -> Optional[dict]:
+        """ fulfill kwargs (status, headers, body) of a fresh cached response """
+        meta_path, body_path = self._cache_paths(url)
+        try:
+            if time.time() - meta_path.stat().st_mtime > self.cache_ttl:
+                return None
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None
+        self.cache_hits += 1
+        return {"status": meta["status"], "headers": meta["headers"], "body": body}
+
+    def cache_put(self, url: str, status: int, headers: dict, body: bytes):
+        if status != 200 or "no-store" in headers.get("cache-control", ""):
+            return
+        # the stored body is already decoded -> drop transfer headers that describe the wire format
+        headers = {k: v for k, v in headers.items() if k.lower() not in ("content-encoding", "content-length")}
+        meta_path, body_path = self._cache_paths(url)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # body first, meta last: a meta file always has its body
+        tmp_body = body_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_body.write_bytes(body)
+        os.replace(tmp_body, body_path)
+        tmp_meta = meta_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_meta.write_text(json.dumps({"url": url, "status": status, "headers": headers}), encoding="utf-8")
+        os.replace(tmp_meta, meta_path)
+
+    # ---------------- route handlers ----------------
+    # a failing fetch / cache write / fulfill must not leave the request hanging:
+    # let the browser load it itself, abort it if even that fails
+    def handle(self, route):
+        """ sync playwright route handler """
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.blocked += 1
+            route.abort()
+            return
+        if not self.cacheable(request.method, request.resource_type):
+            route.continue_()
+            return
+        try:
+            cached = self.cache_get(request.url)
+            if cached is not None:
+                route.fulfill(**cached)
+                return
+            response = route.fetch()
+            body = response.body()
+        except Exception as e:
+            logger.debug(f"routing {request.url} failed, passing it through: {e}")
+            self._fallback(route)
+            return
+        self._store(request.url, response, body)
+        try:
+            route.fulfill(response=response, body=body)
+        except Exception as e:
+            logger.debug(f"fulfilling {request.url} failed, passing it through: {e}")
+            self._fallback(route)
+
+    async def ahandle(self, route):
+        """ async playwright route handler """
+        request = route.request
+        if self.should_block(request.url, request.resource_type):
+            self.blocked += 1
+            await route.abort()
+            return
+        if not self.cacheable(request.method, request.resource_type):
+            await route.continue_()
+            return
+        try:
+            cached = self.cache_get(request.url)
+            if cached is not None:
+                await route.fulfill(**cached)
+                return
+            response = await route.fetch()
+            body = await response.body()
+        except Exception as e:
+            logger.debug(f"routing {request.url} failed, passing it through: {e}")
+            await self._afallback(route)
+            return
+        self._store(request.url, response, body)
+        try:
+            await route.fulfill(response=response, body=body)
+        except Exception as e:
+            logger.debug(f"fulfilling {request.url} failed, passing it through: {e}")
+            await self._afallback(route)
+
+    def _store(self, url: str, response, body: bytes):
+        try:
+            self.cache_put(url, response.status, response.headers, body)
+        except Exception as e:  # a cache write error only costs the cache entry
+            logger.debug(f"caching {url} failed: {e}")
+
+    @staticmethod
+    def _fallback(route):
+        try:
+            route.continue_()
+        except Exception:
+            try:
+                route.abort()
+            except Exception:
+                pass  # already handled, or the page is gone
+
+    @staticmethod
+    async def _afallback(route):
+        try:
+            await route.continue_()
+        except Exception:
+            try:
+                await route.abort()
+            except Exception:
+                pass
+
+
+def text_only_profile(cache_dir: Optional[str] = None) -> RoutingProfile:
+    """ for get_page_content(mode="text") exploration: no images / media / fonts / trackers """
+    return RoutingProfile(
+        block_resource_types=("image", "media", "font"),
+        deny_domains=TRACKER_DOMAINS,
+        cache_dir=cache_dir,
+    )
@@ -1,5 +1,6 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Iterator, Optional, Any, List
+from typing import AsyncIterator, Iterator, Optional, Any, List
 
 from .config import LLMConfig
 
@@ -15,6 +16,8 @@ class LLMClient(ABC):
     Implementations must provide both:
       - generate(messages): full response
       - stream(messages): incremental chunks
+    and may override the async counterparts (agenerate / astream); by default
+    those run the sync methods in a worker thread.
 
     messages format:
     [
@@ -44,9 +47,30 @@ class LLMClient(ABC):
         Yields events shaped like: {"type": "reasoning", "token": "..."}
         or
         { "type": "content", "token": "..."}
+        plus tool call events and a final "done" event (see llm/streaming.py)
         """
         raise NotImplementedError
 
+    async def agenerate(self, messages: List[dict[str, Any]], tools: Optional[list] = None) -> list[dict]:
+        """
+        Async counterpart of generate.
+        Default: run generate in a worker thread so the event loop is not blocked.
+        """
+        return await asyncio.to_thread(self.generate, messages, tools=tools)
+
+    async def astream(self, messages: List[dict[str, Any]], tools: Optional[list] = None) -> AsyncIterator[dict]:
+        """
+        Async counterpart of stream (same events).
+        Default: pull each chunk of the sync stream in a worker thread.
+        """
+        iterator = iter(self.stream(messages, tools=tools))
+        done = object()
+        while True:
+            chunk = await asyncio.to_thread(next, iterator, done)
+            if chunk is done:
+                break
+            yield chunk
+
     def observed_generate(self, messages: List[dict[str, Any]], tools: Optional[list] = None):
         """
         Optional langfuse-traced generate. Falls back to plain generate when langfuse
@@ -0,0 +1,200 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterator, List, Optional
+
+from loguru import logger
+
+from .base import LLMClient
+from .config import LLMConfig
+
+
+SAMPLING_FIELDS = ("provider", "base_url", "model_name", "temperature", "top_p", "max_tokens", "reasoning_effort")
+
+
+def request_fingerprint(
+    messages: List[Any],
+    tools_json: str,
+    config: LLMConfig,
+    format_messages: Optional[Callable[[List[Any]], list]] = None,
+) -> str:
+    """
+    sha256 of the normalized messages, the serialized tool schema list and the
+    sampling fields of config. Messages go through format_messages (e.g. the
+    provider formatting of a client) when given, else plain dict/model_dump.
+    """
+    if format_messages is not None:
+        normalized = format_messages(messages)
+    else:
+        normalized = [m if isinstance(m, dict) else m.model_dump() for m in messages]
+
+    sampling = {field: getattr(config, field, None) for field in SAMPLING_FIELDS}
+    payload = json.dumps(
+        {"messages": normalized, "sampling": sampling},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    digest = hashlib.sha256(payload.encode("utf-8"))
+    digest.update(tools_json.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def tools_json(tools: Optional[list]) -> str:
+    """
+    Compact, key-sorted JSON of a tool schema list. Lists compiled by ToolRegistry
+    carry it already (ClientTools.json), anything else is encoded on every call.
+    """
+    encoded = getattr(tools, "json", None)
+    if isinstance(encoded, str):
+        return encoded
+    return json.dumps(tools, sort_keys=True, separators=(",", ":"))
+
+
+class ResponseStore:
+    """
+    On-disk sqlite store for LLM responses with LRU eviction.
+    Evicts least recently used entries once max_entries or max_bytes is exceeded.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10_000, max_bytes: int = 256 * 1024 * 1024):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # agents call the llm from worker threads -> one shared connection guarded by a lock
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+            " size INTEGER NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON responses(last_access)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, len(value.encode("utf-8")), time.time()),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM responses ORDER BY last_access ASC").fetchall()
+        evicted = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM responses WHERE key = ?", evicted)
+        logger.debug(f"llm cache evicted {len(evicted)} entries")
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedLLMClient(LLMClient):
+    """
+    Wraps any LLMClient and serves identical `generate` requests from disk.
+
+    Cache key = sha256 of:
+      - the provider-formatted messages (llm.format_messages when available)
+      - the tool schema list
+      - the sampling fields of LLMConfig
+    Sampling with temperature > 0 is not deterministic, so those requests bypass
+    the cache unless allow_nondeterministic=True (useful for dev/CI replays).
+    """
+
+    def __init__(
+        self,
+        llm: LLMClient,
+        path: str = ".llm_cache/responses.sqlite",
+        max_entries: int = 10_000,
+        max_bytes: int = 256 * 1024 * 1024,
+        allow_nondeterministic: bool = False,
+    ):
+        self.llm = llm
+        self.config = llm.config
+        self.langfuse_client = llm.langfuse_client
+        self.store = ResponseStore(path, max_entries=max_entries, max_bytes=max_bytes)
+        self.allow_nondeterministic = allow_nondeterministic
+        self.hits = 0
+        self.misses = 0
+
+    def is_cacheable(self) -> bool:
+        return self.allow_nondeterministic or self.config.temperature == 0
+
+    def cache_key(self, messages: List[Any], tools: Optional[list] = None) -> str:
+        return request_fingerprint(
+            messages, tools_json(tools), self.config, getattr(self.llm, "format_messages", None)
+        )
+
+    def _lookup(self, key: str) -> Optional[list[dict]]:
+        cached = self.store.get(key)
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logger.debug(f"llm cache hit {key[:12]}")
+        return json.loads(cached)
+
+    def _save(self, key: str, response: list[dict]):
+        try:
+            self.store.put(key, json.dumps(response))
+        except TypeError as e:
+            logger.debug(f"llm cache skipped non-serializable response: {e}")
+
+    def generate(self, messages: List[Any], tools: Optional[list] = None) -> list[dict]:
+        if not self.is_cacheable():
+            return self.llm.generate(messages, tools=tools)
+        key = self.cache_key(messages, tools)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = self.llm.generate(messages, tools=tools)
+        self._save(key, response)
+        return response
+
+    async def agenerate(self, messages: List[Any], tools: Optional[list] = None) -> list[dict]:
+        if not self.is_cacheable():
+            return await self.llm.agenerate(messages, tools=tools)
+        key = self.cache_key(messages, tools)
+        cached = self._lookup(key)
+        if cached is not None:
+            return cached
+        response = await self.llm.agenerate(messages, tools=tools)
+        self._save(key, response)
+        return response
+
+    def stream(self, messages: List[Any], tools: Optional[list] = None) -> Iterator[dict]:
+        # streams are consumed incrementally -> not cached
+        return self.llm.stream(messages, tools=tools)
+
+    def astream(self, messages: List[Any], tools: Optional[list] = None):
+        return self.llm.astream(messages, tools=tools)
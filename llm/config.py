@@ -47,4 +47,11 @@ class LLMConfig(BaseModel):
             "(e.g., Groq 'reasoning' mode). Examples: 'low', 'medium', 'high'. "
             "Not all models or providers use this field."
         )
-    )
\ No newline at end of file
+    )
+    context_window: Optional[int] = Field(
+        default=None,
+        description=(
+            "Model context window in tokens (prompt + completion). "
+            "None -> looked up from known models, used to budget the prompt."
+        )
+    )
@@ -1,9 +1,10 @@
 import os
 from typing import Iterator, List
 from dotenv import load_dotenv
-from groq import Groq
+from groq import AsyncGroq, Groq
 from .base import LLMClient
 from .config import LLMConfig
+from .streaming import ToolCallAssembler
 from messages.base import Message
 from messages.human import HumanMessage
 from messages.ai import AIMessage
@@ -18,7 +19,9 @@ class GroqClient(LLMClient):
         super().__init__(config)
         # TODO 2: create groq client and set api_key from .env
         self.client = Groq(api_key=os.environ.get("GROQ_API_KEY"))
-    
+        # async client for agenerate/astream -> many agents on one event loop
+        self.async_client = AsyncGroq(api_key=os.environ.get("GROQ_API_KEY"))
+
     def generate(self, messages: List[Message], tools=None) -> List[Message]:
         formatted = self.format_messages(messages)
 
@@ -27,6 +30,7 @@ class GroqClient(LLMClient):
         - content: The LLM's generated text
         - role: 'assistant' (mapped internally by Groq)
         - reasoning: optional chain-of-thought (only for reasoning models)
+        - usage: token counts of the request
         """
         # TODO 3: call `client.chat.completions.create` with configurations in self.config
         # TODO 3: search difference between max_tokens and max_compeletion_tokens:
@@ -34,13 +38,32 @@ class GroqClient(LLMClient):
         # max_completion_tokens -> Groq style: specifically for completion output only.
         # TODO 3: now you can pass tools=tools but search about format later when move to tools sections
         response = self.client.chat.completions.create(
-        model=self.config.model_name,
-        messages=formatted,
-        temperature=self.config.temperature,
-        top_p=self.config.top_p,
-        max_tokens=self.config.max_tokens,
-        tools=tools,
+            **self._completion_kwargs(formatted, tools)
+        )
+        return self._parse_response(response)
+
+    async def agenerate(self, messages: List[Message], tools=None) -> List[Message]:
+        formatted = self.format_messages(messages)
+        response = await self.async_client.chat.completions.create(
+            **self._completion_kwargs(formatted, tools)
         )
+        return self._parse_response(response)
+
+    def _completion_kwargs(self, formatted: list, tools=None, stream: bool = False) -> dict:
+        """ shared request options for sync/async generate and stream """
+        kwargs = dict(
+            model=self.config.model_name,
+            messages=formatted,
+            temperature=self.config.temperature,
+            top_p=self.config.top_p,
+            max_tokens=self.config.max_tokens,
+            tools=tools,
+        )
+        if stream:
+            kwargs["stream"] = True
+        return kwargs
+
+    def _parse_response(self, response) -> List[dict]:
         resp_msg = response.choices[0].message
         ai_text = resp_msg.content or ""
         tool_calls = getattr(resp_msg, "tool_calls", None) or []
@@ -59,25 +82,77 @@ class GroqClient(LLMClient):
             "role": "ai",
             "content": ai_text,
             "tool_calls": formatted_tool_calls,
+            # token accounting (prompt_tokens, completion_tokens, total_tokens)
+            "usage": self._usage_dict(getattr(response, "usage", None)),
         }]
-    
+
+    @staticmethod
+    def _usage_dict(usage) -> dict:
+        return {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+        }
+
+    def _chunk_events(self, assembler: ToolCallAssembler, chunk, final: dict) -> list[dict]:
+        """ typed events (see llm/streaming.py) for one streamed chunk """
+        # groq reports usage on the last chunk under x_groq
+        usage = getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+        if usage:
+            final["usage"] = self._usage_dict(usage)
+        if not chunk.choices:
+            return []
+        choice = chunk.choices[0]
+        if getattr(choice, "finish_reason", None):
+            final["finish_reason"] = choice.finish_reason
+
+        delta = choice.delta
+        events = []
+        if getattr(delta, "reasoning", None):
+            events.append({"type": "reasoning", "token": delta.reasoning})
+        if getattr(delta, "content", None):
+            events.extend(assembler.add_content(delta.content))
+        for tc in getattr(delta, "tool_calls", None) or []:
+            function = getattr(tc, "function", None)
+            events.extend(assembler.add_tool_delta(
+                tc.index,
+                getattr(tc, "id", None),
+                getattr(function, "name", None),
+                getattr(function, "arguments", None),
+            ))
+        return events
+
     def stream(self, messages: List[Message], tools=None):
+        """
+        Yields typed events: content / reasoning tokens, tool_call_start,
+        tool_call_args_delta, tool_call_done (arguments complete -> tool can run)
+        and a final done event carrying the full message.
+        """
         formatted = self.format_messages(messages)
 
         # TODO 3: call `client.chat.completions.create` with stream options configurations in self.config
         stream = self.client.chat.completions.create(
-        model=self.config.model_name,
-        messages=formatted,
-        temperature=self.config.temperature,
-        top_p=self.config.top_p,
-        max_tokens=self.config.max_tokens,
-        stream=True,
-        tools=tools,
+            **self._completion_kwargs(formatted, tools, stream=True)
         )
+        assembler = ToolCallAssembler()
+        final = {}
         for chunk in stream:
-            delta = chunk.choices[0].delta
-            if getattr(delta, "content", None):
-                yield AIMessage(content=delta.content)
+            yield from self._chunk_events(assembler, chunk, final)
+        yield from assembler.finish(usage=final.get("usage"), finish_reason=final.get("finish_reason"))
+
+    async def astream(self, messages: List[Message], tools=None):
+        formatted = self.format_messages(messages)
+        stream = await self.async_client.chat.completions.create(
+            **self._completion_kwargs(formatted, tools, stream=True)
+        )
+        assembler = ToolCallAssembler()
+        final = {}
+        async for chunk in stream:
+            for event in self._chunk_events(assembler, chunk, final):
+                yield event
+        for event in assembler.finish(usage=final.get("usage"), finish_reason=final.get("finish_reason")):
+            yield event
+
     def format_messages(self, messages: List[Message]):
         formatted = []
         for msg in messages:
@@ -0,0 +1,173 @@
+"""
+Record/replay of LLM exchanges for deterministic offline runs.
+
+Cassette format (JSONL):
+    {"kind": "header", "config": {...LLMConfig...}}
+    {"kind": "generate", "key": "<sha256>", "latency": 1.2, "response": [...]}
+    {"kind": "stream", "key": "<sha256>", "latency": 2.3, "events": [{"offset": 0.4, "event": {...}}, ...]}
+"""
+import asyncio
+import copy
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Union
+
+from loguru import logger
+
+from .base import LLMClient
+from .cache import request_fingerprint, tools_json
+from .config import LLMConfig
+
+
+class RecordingLLMClient(LLMClient):
+    """
+    Wraps a live client and appends every generate/stream exchange
+    (request fingerprint, response, latency) to a cassette file.
+    """
+
+    def __init__(self, llm: LLMClient, path: str):
+        self.llm = llm
+        self.config = llm.config
+        self.langfuse_client = llm.langfuse_client
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = self.path.open("w", encoding="utf-8")
+        self._write({"kind": "header", "config": self.config.model_dump(mode="json")})
+
+    def _write(self, entry: dict):
+        with self._lock:
+            self._file.write(json.dumps(entry) + "\n")
+            self._file.flush()
+
+    def _key(self, messages, tools) -> str:
+        # client-independent normalization so ReplayLLMClient can rebuild the same key
+        return request_fingerprint(messages, tools_json(tools), self.config)
+
+    def generate(self, messages: List[Any], tools: Optional[list] = None) -> list[dict]:
+        key = self._key(messages, tools)
+        start = time.perf_counter()
+        response = self.llm.generate(messages, tools=tools)
+        self._write({"kind": "generate", "key": key, "latency": time.perf_counter() - start, "response": response})
+        return response
+
+    async def agenerate(self, messages: List[Any], tools: Optional[list] = None) -> list[dict]:
+        key = self._key(messages, tools)
+        start = time.perf_counter()
+        response = await self.llm.agenerate(messages, tools=tools)
+        self._write({"kind": "generate", "key": key, "latency": time.perf_counter() - start, "response": response})
+        return response
+
+    def stream(self, messages: List[Any], tools: Optional[list] = None) -> Iterator[Any]:
+        key = self._key(messages, tools)
+        start = time.perf_counter()
+        events = []
+        for event in self.llm.stream(messages, tools=tools):
+            events.append({"offset": time.perf_counter() - start, "event": event})
+            yield event
+        self._write({"kind": "stream", "key": key, "latency": time.perf_counter() - start, "events": events})
+
+    async def astream(self, messages: List[Any], tools: Optional[list] = None):
+        key = self._key(messages, tools)
+        start = time.perf_counter()
+        events = []
+        async for event in self.llm.astream(messages, tools=tools):
+            events.append({"offset": time.perf_counter() - start, "event": event})
+            yield event
+        self._write({"kind": "stream", "key": key, "latency": time.perf_counter() - start, "events": events})
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class ReplayLLMClient(LLMClient):
+    """
+    Serves a cassette recorded by RecordingLLMClient back without any network.
+
+    match:
+      - "key": responses are looked up by request fingerprint (exact same prompts)
+      - "sequence": responses are served in recorded order (tolerates prompts that
+        differ between runs, e.g. pytest timings inside tool outputs)
+    latency:
+      - float: fixed synthetic latency in seconds per call
+      - "recorded": sleep as long as the live call took (streams keep chunk timing)
+    """
+
+    def __init__(
+        self,
+        path: str,
+        config: Optional[LLMConfig] = None,
+        match: str = "key",
+        latency: Union[float, str] = 0.0,
+    ):
+        if match not in {"key", "sequence"}:
+            raise ValueError(f"Unsupported match mode {match}")
+        entries = [json.loads(line) for line in Path(path).read_text(encoding="utf-8").splitlines() if line]
+        header = entries[0] if entries and entries[0].get("kind") == "header" else {}
+        self.config = config or LLMConfig(**header.get("config", {}))
+        self.langfuse_client = None
+        self.match = match
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._by_key = {"generate": defaultdict(deque), "stream": defaultdict(deque)}
+        self._sequence = {"generate": deque(), "stream": deque()}
+        for entry in entries:
+            kind = entry.get("kind")
+            if kind in self._sequence:
+                self._by_key[kind][entry["key"]].append(entry)
+                self._sequence[kind].append(entry)
+        logger.debug(
+            f"loaded cassette {path}: {len(self._sequence['generate'])} generate, "
+            f"{len(self._sequence['stream'])} stream"
+        )
+
+    def _next(self, kind: str, messages, tools) -> dict:
+        with self._lock:
+            if self.match == "sequence":
+                queue = self._sequence[kind]
+            else:
+                key = request_fingerprint(
+                    messages, tools_json(tools), self.config
+                )
+                queue = self._by_key[kind].get(key)
+            if not queue:
+                raise LookupError(f"No recorded {kind} response left in cassette (match={self.match})")
+            # keep the last entry of a key around so repeated identical prompts still replay
+            return queue.popleft() if len(queue) > 1 or self.match == "sequence" else queue[0]
+
+    def _delay(self, entry: dict) -> float:
+        return entry.get("latency", 0.0) if self.latency == "recorded" else float(self.latency)
+
+    def generate(self, messages: List[Any], tools: Optional[list] = None) -> list[dict]:
+        entry = self._next("generate", messages, tools)
+        time.sleep(self._delay(entry))
+        return copy.deepcopy(entry["response"])
+
+    async def agenerate(self, messages: List[Any], tools: Optional[list] = None) -> list[dict]:
+        entry = self._next("generate", messages, tools)
+        await asyncio.sleep(self._delay(entry))
+        return copy.deepcopy(entry["response"])
+
+    def _stream_delays(self, entry: dict) -> list[float]:
+        events = entry.get("events", [])
+        if self.latency == "recorded":
+            offsets = [e["offset"] for e in events]
+            return [b - a for a, b in zip([0.0] + offsets, offsets)]
+        # spread the fixed latency evenly over the chunks
+        return [float(self.latency) / max(len(events), 1)] * len(events)
+
+    def stream(self, messages: List[Any], tools: Optional[list] = None) -> Iterator[Any]:
+        entry = self._next("stream", messages, tools)
+        for delay, event in zip(self._stream_delays(entry), entry.get("events", [])):
+            time.sleep(delay)
+            yield copy.deepcopy(event["event"])
+
+    async def astream(self, messages: List[Any], tools: Optional[list] = None):
+        entry = self._next("stream", messages, tools)
+        for delay, event in zip(self._stream_delays(entry), entry.get("events", [])):
+            await asyncio.sleep(delay)
+            yield copy.deepcopy(event["event"])
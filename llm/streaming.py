@@ -0,0 +1,110 @@
+"""
+Typed stream events shared by every client:
+
+    {"type": "content", "token": "..."}
+    {"type": "reasoning", "token": "..."}
+    {"type": "tool_call_start", "index": 0, "id": "call_1", "name": "read_file"}
+    {"type": "tool_call_args_delta", "index": 0, "delta": "{\"file_pa"}
+    {"type": "tool_call_done", "index": 0, "tool_call": {"type": "function", "id": ..., "function": {"name": ..., "arguments": "..."}}}
+    {"type": "done", "message": {"role": "ai", "content": ..., "tool_calls": [...], "usage": {...}}, "finish_reason": ...}
+
+tool_call_done is emitted as soon as a call's arguments are complete (they parse as a
+JSON object, or the stream finishes) so callers can start the tool before the rest of
+the response arrives. Fragments of different calls may arrive interleaved.
+"""
+import json
+from typing import Iterable, Iterator, List, Optional
+
+
+class ToolCallAssembler:
+    """ assembles tool_call argument fragments (OpenAI-style deltas keyed by index) into events """
+
+    def __init__(self):
+        self._calls: dict[int, dict] = {}
+        self._done: set[int] = set()
+        self.content: List[str] = []
+
+    def add_content(self, token: str) -> List[dict]:
+        self.content.append(token)
+        return [{"type": "content", "token": token}]
+
+    def add_tool_delta(self, index: int, id: Optional[str] = None, name: Optional[str] = None,
+                       arguments: Optional[str] = None) -> List[dict]:
+        events = []
+        if index not in self._calls:
+            # calls may start and receive fragments in any order (interleaved by index)
+            self._calls[index] = {"id": id, "name": name or "", "arguments": ""}
+            events.append({"type": "tool_call_start", "index": index, "id": id, "name": name or ""})
+        call = self._calls[index]
+        if id and not call["id"]:
+            call["id"] = id
+        if name and not call["name"]:
+            call["name"] = name
+        if arguments:
+            call["arguments"] += arguments
+            if index not in self._done:
+                events.append({"type": "tool_call_args_delta", "index": index, "delta": arguments})
+                if self._is_complete(call["arguments"]):
+                    events.extend(self._finish(index))
+        return events
+
+    @staticmethod
+    def _is_complete(arguments: str) -> bool:
+        # a top-level JSON object cannot grow once it parses
+        if not arguments.rstrip().endswith("}"):
+            return False
+        try:
+            return isinstance(json.loads(arguments), dict)
+        except ValueError:
+            return False
+
+    def _tool_call(self, index: int) -> dict:
+        call = self._calls[index]
+        return {
+            "type": "function",
+            "id": call["id"],
+            "function": {"name": call["name"], "arguments": call["arguments"] or "{}"},
+        }
+
+    def _finish(self, index: int) -> List[dict]:
+        if index in self._done:
+            return []
+        self._done.add(index)
+        return [{"type": "tool_call_done", "index": index, "tool_call": self._tool_call(index)}]
+
+    def finish(self, usage: Optional[dict] = None, finish_reason: Optional[str] = None) -> List[dict]:
+        """ close pending calls and emit the final `done` event (same message shape as generate) """
+        events = []
+        for index in sorted(self._calls):
+            events.extend(self._finish(index))
+        message = {
+            "role": "ai",
+            "content": "".join(self.content),
+            "tool_calls": [self._tool_call(i) for i in sorted(self._calls)],
+        }
+        if usage is not None:
+            message["usage"] = usage
+        events.append({"type": "done", "message": message, "finish_reason": finish_reason})
+        return events
+
+
+def message_to_events(message: dict) -> Iterator[dict]:
+    """ replay a generate-style response as stream events (useful for fakes and tests) """
+    assembler = ToolCallAssembler()
+    if message.get("content"):
+        yield from assembler.add_content(message["content"])
+    for index, tool_call in enumerate(message.get("tool_calls") or []):
+        function = tool_call.get("function", {})
+        arguments = function.get("arguments", "")
+        if not isinstance(arguments, str):
+            arguments = json.dumps(arguments)
+        yield from assembler.add_tool_delta(index, tool_call.get("id"), function.get("name"), arguments)
+    yield from assembler.finish(usage=message.get("usage"))
+
+
+def collect_stream(events: Iterable[dict]) -> List[dict]:
+    """ consume a typed event stream and return the generate-style response list """
+    for event in events:
+        if isinstance(event, dict) and event.get("type") == "done":
+            return [event["message"]]
+    raise ValueError("stream ended without a `done` event")
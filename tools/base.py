@@ -1,7 +1,34 @@
-from typing import Callable
+import asyncio
+import inspect
+import threading
+from typing import Callable, Union
 from loguru import logger
 from llm.config import LLMProvider
 
+_tool_loop = None
+_tool_loop_lock = threading.Lock()
+
+
+def tool_event_loop() -> asyncio.AbstractEventLoop:
+    """
+    Event loop (own daemon thread) that runs every async tool, so async resources
+    they keep (e.g. playwright pages) stay bound to a single loop whoever calls them.
+    """
+    global _tool_loop
+    with _tool_loop_lock:
+        if _tool_loop is None:
+            _tool_loop = asyncio.new_event_loop()
+            threading.Thread(target=_tool_loop.run_forever, name="tool-event-loop", daemon=True).start()
+        return _tool_loop
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
 class Tool:
     """
     A class representing a reusable piece of code (Tool).
@@ -13,6 +40,15 @@ class Tool:
         arguments (list): A list of arguments.
         outputs (str or list): The return type(s) of the wrapped function.
         session_id (str): Optional id for session *advanced to use for playwright or code etc...*
+        optional_arguments (list): Names of arguments that have a default (not required in schemas).
+        serial (bool): If True the tool mutates shared state (files, browser page...) and must
+            never run concurrently with other tool calls of the same turn.
+        max_concurrency (int): Optional cap on how many calls of this tool may run at once.
+        side_effect_free (bool | callable): If True the tool only reads state, so the agent may start it
+            speculatively while the LLM response is still streaming. A callable gets the call
+            arguments and decides per call (e.g. only some modes of a tool are read-only).
+        is_async (bool): True for `async def` tools. They run on tool_event_loop(): calling the
+            tool blocks until done (works from agent worker threads), `await tool.acall()` doesn't.
     """
     def __init__(self,
                  name: str,
@@ -20,13 +56,28 @@ class Tool:
                  func: Callable,
                  arguments: list,
                  outputs: str,
-                 session_id: str = None):
+                 session_id: str = None,
+                 optional_arguments: list = None,
+                 serial: bool = False,
+                 max_concurrency: int = None,
+                 side_effect_free: Union[bool, Callable[[dict], bool]] = False):
         self.name = name
         self.description = description
         self.func = func
         self.arguments = arguments
         self.outputs = outputs
         self.session_id = session_id
+        self.optional_arguments = list(optional_arguments or [])
+        self.serial = serial
+        self.max_concurrency = max_concurrency
+        self.side_effect_free = side_effect_free
+        self.is_async = inspect.iscoroutinefunction(func)
+
+    def is_side_effect_free(self, arguments: dict) -> bool:
+        """ whether a call with these arguments only reads state (see side_effect_free) """
+        if callable(self.side_effect_free):
+            return bool(self.side_effect_free(arguments))
+        return bool(self.side_effect_free)
 
     def to_string(self) -> str:
         """
@@ -54,28 +105,6 @@ class Tool:
         Return a OpenAI-compatible tool schema for chat completion calls.
         Converts argument list to JSON Schema format.
         """
-        # Hacky compatibility: allow legacy calls that pass `path` instead of `file_path`
-        # for the read_file tool (some prompts/tools send that shape).
-        if self.name == "read_file":
-            return {
-                "type": "function",
-                "function": {
-                    "name": self.name,
-                    "description": self.description,
-                    "parameters": {
-                        "type": "object",
-                        "properties": {
-                            "file_path": {"type": "string"},
-                            "path": {"type": "string"},
-                            "line_start": {"type": "integer"},
-                            "line_end": {"type": "integer"},
-                        },
-                        # Make all optional to avoid schema rejection when only path is sent.
-                        "required": [],
-                    },
-                },
-            }
-
         properties = {}
         required_args = []
 
@@ -96,7 +125,10 @@ class Tool:
                 schema_type = "string"
 
             properties[arg_name] = {"type": schema_type}
-            required_args.append(arg_name)
+            if schema_type == "array":
+                properties[arg_name]["items"] = {"type": "string"}
+            if arg_name not in self.optional_arguments:
+                required_args.append(arg_name)
 
         return {
             "type": "function",
@@ -138,7 +170,10 @@ class Tool:
             properties[arg_name] = {
                 "type": schema_type,
             }
-            required_args.append(arg_name)
+            if schema_type == "array":
+                properties[arg_name]["items"] = {"type": "string"}
+            if arg_name not in self.optional_arguments:
+                required_args.append(arg_name)
 
         return {
             "name": self.name,
@@ -165,7 +200,28 @@ class Tool:
             kwargs.setdefault("session_id", self.session_id)
             
         logger.debug(f"calling tool {self.name} with {args} {kwargs}")
+        if self.is_async:
+            loop = tool_event_loop()
+            if _running_loop() is loop:
+                raise RuntimeError(f"async tool {self.name} called from its own event loop, use `await tool.acall()`")
+            return asyncio.run_coroutine_threadsafe(self.func(*args, **kwargs), loop).result()
         return self.func(*args, **kwargs)
+
+    async def acall(self, *args, **kwargs):
+        """
+        Awaitable invocation (sync tools run in a worker thread).
+        """
+        if not self.is_async:
+            return await asyncio.to_thread(self.__call__, *args, **kwargs)
+        if self.session_id is not None:
+            kwargs.setdefault("session_id", self.session_id)
+
+        logger.debug(f"calling tool {self.name} with {args} {kwargs}")
+        loop = tool_event_loop()
+        coroutine = self.func(*args, **kwargs)
+        if _running_loop() is loop:
+            return await coroutine
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
         
     def __str__(self) -> str:
         return self.to_string()
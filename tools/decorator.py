@@ -1,7 +1,8 @@
 import inspect
 from .base import Tool
 
-def tool(name: str = None, description: str = None):
+def tool(name: str = None, description: str = None, serial: bool = False, max_concurrency: int = None,
+         side_effect_free=False):
     def wrapper(func):
         """
         A decorator that creates a Tool instance from the given function.
@@ -11,7 +12,10 @@ def tool(name: str = None, description: str = None):
 
         # Extract (param_name, param_annotation) pairs for inputs
         arguments = []
+        optional_arguments = []
         for param in signature.parameters.values():
+            if param.default is not inspect.Parameter.empty:
+                optional_arguments.append(param.name)
             annotation_name = (
                 param.annotation.__name__
                 if hasattr(param.annotation, '__name__')
@@ -46,5 +50,9 @@ def tool(name: str = None, description: str = None):
             func=func,
             arguments=arguments,
             outputs=outputs,
+            optional_arguments=optional_arguments,
+            serial=serial,
+            max_concurrency=max_concurrency,
+            side_effect_free=side_effect_free,
         )
     return wrapper
@@ -0,0 +1,397 @@
+import sys
+from pathlib import Path
+
+# Add repo root to sys.path for imports
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import asyncio
+import re
+import time
+import types
+
+import pytest
+
+from browser_manager import AsyncBrowserManager, BrowserManager
+from browser_routing import RoutingProfile, text_only_profile
+from tools.toolkit import action_steps, screenshots, web_explorer
+from tools.toolkit.locators import CompiledSelector, compile_selector, locate
+from tools.toolkit.page_outline import format_outline, reads_only, short_id_selector, split_parts
+from tools.toolkit.page_waits import Settled
+
+
+# ---------------- fakes (no real browser) ----------------
+class FakePage:
+    def __init__(self):
+        self.closed = False
+
+    def is_closed(self):
+        return self.closed
+
+    def set_default_timeout(self, timeout):
+        pass
+
+
+class FakeContext:
+    def __init__(self):
+        self.page = FakePage()
+        self.closed = False
+
+    def new_page(self):
+        return self.page
+
+    def close(self):
+        self.closed = self.page.closed = True
+
+
+class FakeBrowser:
+    def new_context(self):
+        return FakeContext()
+
+
+class AsyncFakeContext(FakeContext):
+    async def new_page(self):
+        return self.page
+
+    async def close(self):
+        self.closed = self.page.closed = True
+
+
+class AsyncFakeBrowser:
+    async def new_context(self):
+        return AsyncFakeContext()
+
+
+def age(manager, session_id: str, seconds: float):
+    manager._pages[session_id].last_used = time.monotonic() - seconds
+
+
+# ---------------- page pool ----------------
+def test_evict_idle_reports_expired_sessions_instead_of_closing_them():
+    manager = BrowserManager(min_size=0, max_size=2, idle_timeout=10)
+    manager._browser = FakeBrowser()
+    page = manager.get_page("agent-1")
+    manager.get_page("agent-2")
+    age(manager, "agent-1", 60)
+
+    assert manager.evict_idle() == ["agent-1"]
+    assert not page.is_closed()
+    assert manager._pages["agent-1"].expired
+    with pytest.raises(RuntimeError, match="agent-1"):
+        manager.get_page("agent-3")
+
+    # using the session again clears the mark, closing it frees the slot
+    assert manager.get_page("agent-1") is page and not manager._pages["agent-1"].expired
+    manager.close_page("agent-1")
+    assert page.is_closed()
+    manager.get_page("agent-3")
+
+
+def test_evict_idle_closes_only_warm_pages_above_min_size():
+    manager = BrowserManager(min_size=1, max_size=4, idle_timeout=10)
+    manager._browser = FakeBrowser()
+    manager._fill()
+    manager._idle.append(manager._new_page())
+    warm = list(manager._idle)
+    for pooled in warm:
+        pooled.last_used -= 60
+
+    manager.evict_idle()
+    assert [p.is_closed() for p in warm] == [True, False]
+    assert list(manager._idle) == warm[1:]
+
+
+def test_async_pool_reports_expired_sessions_instead_of_closing_them():
+    async def scenario():
+        manager = AsyncBrowserManager(min_size=0, max_size=1, idle_timeout=10)
+        manager._browser = AsyncFakeBrowser()
+        page = await manager.get_page("agent-1")
+        age(manager, "agent-1", 60)
+        with pytest.raises(RuntimeError, match="agent-1"):
+            await manager.get_page("agent-2")
+        assert not page.is_closed()
+        await manager.close_page("agent-1")
+        await manager.get_page("agent-2")
+        assert page.is_closed()
+
+    asyncio.run(scenario())
+
+
+# ---------------- request routing ----------------
+def test_should_block_resource_types_and_domains():
+    profile = RoutingProfile(block_resource_types=("image",), allow_domains=["example.com"],
+                             deny_domains=["ads.example.com"])
+    assert profile.should_block("https://example.com/a.png", "image")
+    assert not profile.should_block("https://docs.example.com/page", "document")
+    assert profile.should_block("https://ads.example.com/x.js", "script")
+    assert profile.should_block("https://notexample.com/", "document")
+    assert not profile.should_block("data:text/plain,hi", "document")
+    assert text_only_profile().should_block("https://www.google-analytics.com/g.js", "script")
+
+
+def test_response_cache_round_trip(tmp_path):
+    profile = RoutingProfile(cache_dir=str(tmp_path))
+    assert profile.cacheable("GET", "script") and not profile.cacheable("POST", "script")
+    headers = {"content-type": "text/css", "content-encoding": "gzip"}
+    profile.cache_put("https://a.com/x.css", 200, headers, b"body{}")
+    profile.cache_put("https://a.com/private.css", 200, {"cache-control": "no-store"}, b"secret")
+    profile.cache_put("https://a.com/missing.css", 404, {}, b"")
+
+    assert profile.cache_get("https://a.com/x.css") == {
+        "status": 200, "headers": {"content-type": "text/css"}, "body": b"body{}"
+    }
+    assert profile.cache_get("https://a.com/private.css") is None
+    assert profile.cache_get("https://a.com/missing.css") is None
+    assert profile._cache_paths("https://a.com/x.css") != profile._cache_paths("https://a.com/y.css")
+
+
+class FakeRequest:
+    def __init__(self, url="https://a.com/app.js", resource_type="script", method="GET"):
+        self.url, self.resource_type, self.method = url, resource_type, method
+
+
+class FakeResponse:
+    status, headers = 200, {"content-type": "text/javascript"}
+
+    def body(self):
+        return b"js"
+
+
+class FakeRoute:
+    def __init__(self, fail=()):
+        self.request = FakeRequest()
+        self.fail = set(fail)
+        self.calls = []
+
+    def _call(self, name, result=None):
+        self.calls.append(name)
+        if name in self.fail:
+            raise RuntimeError(f"{name} failed")
+        return result
+
+    def fetch(self):
+        return self._call("fetch", FakeResponse())
+
+    def fulfill(self, **kwargs):
+        self._call("fulfill")
+
+    def continue_(self):
+        self._call("continue")
+
+    def abort(self):
+        self._call("abort")
+
+
+@pytest.mark.parametrize("fail, calls", [
+    ((), ["fetch", "fulfill"]),
+    (("fetch",), ["fetch", "continue"]),
+    (("fetch", "continue"), ["fetch", "continue", "abort"]),
+    (("fulfill",), ["fetch", "fulfill", "continue"]),
+])
+def test_route_handler_falls_back_when_fetching_fails(tmp_path, fail, calls):
+    route = FakeRoute(fail)
+    RoutingProfile(cache_dir=str(tmp_path)).handle(route)
+    assert route.calls == calls
+
+
+def test_route_handler_serves_even_when_the_cache_cannot_be_written(tmp_path):
+    blocker = tmp_path / "file"
+    blocker.write_text("")
+    route = FakeRoute()
+    RoutingProfile(cache_dir=str(blocker / "cache")).handle(route)  # mkdir fails
+    assert route.calls == ["fetch", "fulfill"]
+
+
+def test_async_route_handler_falls_back_when_fetching_fails(tmp_path):
+    class AsyncRoute(FakeRoute):
+        async def fetch(self):
+            return self._call("fetch", FakeResponse())
+
+        async def fulfill(self, **kwargs):
+            self._call("fulfill")
+
+        async def continue_(self):
+            self._call("continue")
+
+        async def abort(self):
+            self._call("abort")
+
+    route = AsyncRoute(fail=("fetch", "continue"))
+    asyncio.run(RoutingProfile(cache_dir=str(tmp_path)).ahandle(route))
+    assert route.calls == ["fetch", "continue", "abort"]
+
+
+# ---------------- page outline ----------------
+def test_split_parts_keeps_lines_whole_and_under_the_limit():
+    lines = ["a" * 4, "b" * 4, "c" * 4, "d" * 20]
+    parts = split_parts(lines, part_chars=10)
+    assert parts == ["aaaa\nbbbb", "cccc", "d" * 20]  # an over-long line gets its own part
+    assert split_parts([], part_chars=10) == [""]
+
+
+def test_format_outline_pages_through_parts():
+    lines = [f"- item {i}" for i in range(6)]
+    first = format_outline("Shop", "https://shop.test", lines, part=1, part_chars=20)
+    assert first.splitlines()[0] == "Title: Shop | URL: https://shop.test | part 1/3 (part=2 for more)"
+    last = format_outline("Shop", "https://shop.test", lines, part=99, part_chars=20)
+    assert last.splitlines()[0] == "Title: Shop | URL: https://shop.test | part 3/3"
+    assert last.splitlines()[1:] == lines[4:]
+
+
+def test_short_id_selector_and_read_only_modes():
+    assert short_id_selector("e12") == '[data-agent-id="e12"]'
+    assert short_id_selector(" [e3] ") == '[data-agent-id="e3"]'
+    assert short_id_selector("#e12") is None and short_id_selector("text=e1") is None
+    assert reads_only({}) and reads_only({"mode": "html"})
+    assert not reads_only({"mode": "outline"})
+
+
+# ---------------- screenshots ----------------
+METRICS = [0, 500, 1000, 800, 1000, 5000]  # scrolled to y=500, 1000x800 viewport, 5000px tall page
+
+
+def test_capture_params_viewport_full_page_and_element():
+    viewport = screenshots.capture_params(METRICS, max_dimension=500)
+    assert viewport["clip"] == {"x": 0, "y": 500, "width": 1000, "height": 800, "scale": 0.5}
+    assert viewport["quality"] == screenshots.DEFAULT_QUALITY
+
+    full = screenshots.capture_params(METRICS, full_page=True, image_format="png", max_dimension=0)
+    assert full["clip"] == {"x": 0, "y": 0, "width": 1000, "height": 5000, "scale": 1.0}
+    assert "quality" not in full
+
+    element = screenshots.capture_params(METRICS, box=(10, 20, 100, 50), image_format="webp", quality=500)
+    assert element["clip"] == {"x": 10, "y": 520, "width": 100, "height": 50, "scale": 1.0}
+    assert element["quality"] == 100
+    with pytest.raises(ValueError):
+        screenshots.capture_params(METRICS, image_format="gif")
+    assert screenshots.parse_region("1, 2, 30, 40") == (1, 2, 30, 40)
+    with pytest.raises(ValueError):
+        screenshots.parse_region("1,2,0,40")
+
+
+def test_screenshot_history_only_dedups_the_last_image():
+    history = screenshots.ScreenshotHistory()
+    assert history.record("aaa") == (1, False)
+    assert history.record("aaa") == (1, True)
+    assert history.record("bbb") == (2, False)
+    # an older image may be gone from the context -> sent again with a new number
+    assert history.record("aaa") == (3, False)
+    assert history.record("aaa", force=True) == (4, False)
+
+
+def test_format_result_labels_every_image():
+    params = {"format": "jpeg"}
+    screenshots.forget("shots")
+    try:
+        first = screenshots.format_result("shots", "aaa", params)
+        assert first == "Screenshot #1\ndata:image/jpeg;base64,aaa"
+        assert "unchanged since screenshot #1" in screenshots.format_result("shots", "aaa", params)
+        assert screenshots.format_result("shots", "bbb", params).startswith("Screenshot #2\n")
+    finally:
+        screenshots.forget("shots")
+
+
+# ---------------- smart waits ----------------
+@pytest.mark.parametrize("settled, text", [
+    (Settled("navigated", 850), "navigated, page loaded in 850ms"),
+    (Settled("updated", 320, mutations=12), "page updated (12 DOM changes), stable after 320ms"),
+    (Settled("unchanged", 300), "no page change (300ms)"),
+    (Settled("busy", 3000, mutations=400), "page still changing after 3000ms"),
+    (Settled("timeout", 10000), "navigation not finished after 10000ms"),
+])
+def test_settled_describes_what_happened(settled, text):
+    assert str(settled) == text
+
+
+# ---------------- batched actions ----------------
+def test_parse_steps_accepts_objects_and_json_strings():
+    steps = action_steps.parse_steps([
+        '{"action": "goto", "url": "https://a.test"}',
+        {"action": "fill", "selector": "e3", "value": "alice"},
+        {"action": "content", "mode": "text", "part": 2},
+        {"action": "content"},
+    ])
+    assert [s["action"] for s in steps] == ["goto", "fill", "content", "content"]
+
+
+@pytest.mark.parametrize("step, message", [
+    ("not json", "step 1 is not a json object"),
+    ('["goto"]', "step 1 is not a json object"),
+    ({"action": "hover", "selector": "e1"}, "unknown action 'hover'"),
+    ({"action": "fill", "selector": "e1"}, "step 1 (fill) needs value"),
+    ({"action": "content", "mode": "outlne"}, "unknown content mode 'outlne'"),
+    ({"action": "content", "part": 0}, "part must be a positive integer"),
+])
+def test_parse_steps_rejects_bad_steps(step, message):
+    with pytest.raises(ValueError, match=re.escape(message)):
+        action_steps.parse_steps([step])
+
+
+def test_format_results_clips_all_but_the_last_output_and_reports_skipped_steps():
+    steps = action_steps.parse_steps([
+        {"action": "goto", "url": "https://a.test"},
+        {"action": "fill", "selector": "e3", "value": "secret"},
+        {"action": "click", "selector": "e4"},
+        {"action": "content"},
+    ])
+    text = action_steps.format_results(steps, ["x" * 500, "FAILED: timeout"], failed=True)
+    lines = text.splitlines()
+    assert lines[0] == f"1. goto https://a.test: {'x' * action_steps.MAX_STEP_OUTPUT}…"
+    assert lines[1] == "2. fill e3: FAILED: timeout"
+    assert lines[2] == "aborted: steps 3-4 not run"
+    assert "secret" not in text
+    assert action_steps.format_results(steps[:1], ["y" * 500], failed=False).endswith("y" * 500)
+    assert action_steps.error_line(RuntimeError("Timeout 100ms\ncall log:\n...")) == "Timeout 100ms"
+
+
+def test_browser_actions_reports_a_page_that_cannot_be_opened(monkeypatch):
+    def exhausted(session_id):
+        raise RuntimeError("Browser pool exhausted (8 sessions in use)")
+
+    monkeypatch.setattr(web_explorer, "get_page", exhausted)
+    result = web_explorer.browser_actions([{"action": "goto", "url": "https://a.test"}])
+    assert result == "Failed to get the page: Browser pool exhausted (8 sessions in use)"
+
+
+# ---------------- selectors ----------------
+@pytest.mark.parametrize("selector, compiled", [
+    ("e3", CompiledSelector("css", '[data-agent-id="e3"]')),
+    ("[e3]", CompiledSelector("css", '[data-agent-id="e3"]')),
+    ("text=Sign in", CompiledSelector("text", "Sign in")),
+    ("role=button name=Sign in", CompiledSelector("role", "button", "Sign in")),
+    ("role=link", CompiledSelector("role", "link", None)),
+    ("#login > button", CompiledSelector("css", "#login > button")),
+])
+def test_compile_selector(selector, compiled):
+    assert compile_selector(selector) == compiled
+
+
+class LocatorPage:
+    """ records how locate() resolves selectors """
+
+    def __init__(self):
+        self.calls = []
+
+    def locator(self, css):
+        self.calls.append(("css", css))
+        return types.SimpleNamespace(first=f"first:{css}")
+
+    def get_by_text(self, text, exact):
+        self.calls.append(("text", text, exact))
+        return types.SimpleNamespace(first=f"first:{text}")
+
+    def get_by_role(self, role, name=None):
+        self.calls.append(("role", role, name))
+        return types.SimpleNamespace(first=f"first:{role}")
+
+
+def test_locate_builds_the_first_match_from_the_compiled_selector():
+    page = LocatorPage()
+    assert locate(page, "e3") == 'first:[data-agent-id="e3"]'
+    assert locate(page, "text=Welcome") == "first:Welcome"
+    assert locate(page, "role=button name=Go") == "first:button"
+    # nothing is cached per page: a locator is rebuilt (lazily, no DOM query) on every call
+    locate(page, "e3")
+    assert page.calls == [
+        ("css", '[data-agent-id="e3"]'), ("text", "Welcome", False), ("role", "button", "Go"),
+        ("css", '[data-agent-id="e3"]'),
+    ]
@@ -7,6 +7,8 @@ import pytest
 
 # Import the functions to test
 from tools.toolkit.builtin.code_tools import run_python_file, run_pytest_tests
+from tools.toolkit.builtin import pytest_pool, pytest_shards
+from tools.toolkit.builtin.pytest_report import report_passed
 
 
 def test_run_python_file_success(tmp_path: Path):
@@ -46,9 +48,23 @@ def test_run_pytest_tests_success(tmp_path: Path):
 
     result = run_pytest_tests(str(test_dir))
     assert result["success"] is True
-    output = result["result"]
+    report = result["result"]
     # Ensure pytest ran and reported the passed test
-    assert "1 passed" in output
+    assert report["collected"] == 1
+    assert report["passed"] == 1
+    assert report["tests"][0][1] == "passed"
+
+
+def test_run_pytest_tests_reports_failures(tmp_path: Path):
+    (tmp_path / "test_fail.py").write_text("def test_ok():\n    assert True\n\ndef test_bad():\n    assert 1 == 2\n")
+
+    result = run_pytest_tests(str(tmp_path))
+    assert result["success"] is False
+    report = result["result"]
+    assert (report["passed"], report["failed"]) == (1, 1)
+    assert report["failures"][0]["test"].endswith("test_fail.py::test_bad")
+    assert "assert 1 == 2" in report["failures"][0]["traceback"]
+    assert report_passed(result) is False
 
 
 def test_run_pytest_tests_not_directory(tmp_path: Path):
@@ -58,3 +74,69 @@ def test_run_pytest_tests_not_directory(tmp_path: Path):
     result = run_pytest_tests(str(test_file))
     assert result["success"] is False
     assert "Not a directory" in result["error"]
+
+
+@pytest.mark.skipif(not pytest_pool.available(), reason="worker pool needs os.fork")
+def test_pytest_pool_sees_edited_modules(tmp_path: Path):
+    # Warm workers must not keep test modules imported between runs
+    test_file = tmp_path / "test_edit.py"
+    pool = pytest_pool.PytestWorkerPool(size=1)
+    try:
+        test_file.write_text("def test_value():\n    assert 1 == 1\n")
+        returncode, output = pool.run(str(tmp_path))
+        assert returncode == 0
+        assert "1 passed" in output
+
+        test_file.write_text("def test_value():\n    assert 1 == 2\n")
+        returncode, output = pool.run(str(tmp_path))
+        assert returncode == 1
+        assert "1 failed" in output
+    finally:
+        pool.close()
+
+
+def test_run_pytest_tests_only_runs_affected_tests(tmp_path: Path):
+    (tmp_path / "helper.py").write_text("def value():\n    return 1\n")
+    (tmp_path / "test_uses_helper.py").write_text(
+        "from helper import value\n\ndef test_value():\n    assert value() == 1\n"
+    )
+    (tmp_path / "test_other.py").write_text("def test_other():\n    assert True\n")
+
+    result = run_pytest_tests(str(tmp_path), changed_files=[str(tmp_path / "helper.py")])
+    assert result["success"] is True
+    assert result["result"]["selected_tests"] == ["test_uses_helper.py"]
+    assert result["result"]["passed"] == 1
+
+    result = run_pytest_tests(str(tmp_path), changed_files=[str(tmp_path / "helper.py")], full_run=True)
+    assert "selected_tests" not in result["result"]
+    assert result["result"]["passed"] == 2
+
+
+def test_run_pytest_tests_shards_and_merges(tmp_path: Path):
+    for i in range(3):
+        (tmp_path / f"test_shard_{i}.py").write_text(f"def test_{i}():\n    assert {i} != 2\n")
+
+    result = run_pytest_tests(str(tmp_path), workers=3)
+    report = result["result"]
+    assert result["success"] is False
+    assert report["shards"] == 3
+    assert (report["collected"], report["passed"], report["failed"]) == (3, 2, 1)
+    assert report["failures"][0]["test"].endswith("test_shard_2.py::test_2")
+
+
+def test_run_pytest_tests_splits_tests_when_there_are_few_files(tmp_path: Path):
+    (tmp_path / "test_one_file.py").write_text(
+        "import pytest\n\n@pytest.mark.parametrize('n', range(4))\ndef test_n(n):\n    assert n != 3\n"
+    )
+    result = run_pytest_tests(str(tmp_path), workers=2)
+    report = result["result"]
+    assert report["shards"] == 2
+    assert (report["collected"], report["passed"], report["failed"]) == (4, 3, 1)
+    assert report["failures"][0]["test"].endswith("test_one_file.py::test_n[3]")
+
+
+def test_plan_shards_balances_by_duration():
+    durations = {"a": 3.0, "b": 2.0, "c": 2.0, "d": 1.0}
+    shards = pytest_shards.plan_shards(durations, workers=2)
+    assert sorted(sum(durations[t] for t in shard) for shard in shards) == [4.0, 4.0]
+    assert pytest_shards.plan_shards(durations, workers=8) == [["a"], ["b"], ["c"], ["d"]]
@@ -0,0 +1,41 @@
+import json
+
+from llm.config import LLMProvider
+from tools.decorator import tool
+from tools.registry import ToolRegistry
+
+
+@tool()
+def read_notes(path: str, limit: int = 10) -> str:
+    """Read notes from a file."""
+    return path
+
+
+@tool()
+def write_notes(path: str, text: str) -> str:
+    """Write notes to a file."""
+    return path
+
+
+def test_client_tools_are_reused_until_the_next_register():
+    registry = ToolRegistry()
+    registry.register(read_notes)
+
+    tools = registry.to_client_tools(LLMProvider.GROQ)
+    assert registry.to_client_tools(LLMProvider.GROQ) is tools
+    assert registry.to_client_tools(LLMProvider.GROQ.value) is tools  # plain provider string hits the same entry
+    assert registry.to_client_tools_json(LLMProvider.GROQ) is tools.json
+    assert json.loads(tools.json) == list(tools)
+    assert tools[0]["function"]["parameters"]["required"] == ["path"]
+
+    gemini = registry.to_client_tools(LLMProvider.GEMINI)
+    assert gemini is not tools and gemini[0]["name"] == "read_notes"
+
+    registry.register(write_notes)
+    rebuilt = registry.to_client_tools(LLMProvider.GROQ)
+    assert rebuilt is not tools
+    assert [t["function"]["name"] for t in rebuilt] == ["read_notes", "write_notes"]
+    assert [t["function"]["name"] for t in json.loads(registry.to_client_tools_json(LLMProvider.GROQ))] == [
+        "read_notes", "write_notes"
+    ]
+    assert registry.to_client_tools(LLMProvider.GEMINI) is not gemini
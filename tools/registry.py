@@ -1,10 +1,23 @@
 import importlib
+import json
 from types import ModuleType
 from typing import Dict, List
 from loguru import logger
 from .base import Tool
 from llm.config import LLMProvider
 
+class ClientTools(list):
+    """
+    Compiled provider schemas (a plain list of dicts for the clients) carrying
+    their compact, key-sorted JSON in `.json`, so it can be sent/hashed without
+    re-encoding. Built once per provider by ToolRegistry -> treat as read-only.
+    """
+
+    def __init__(self, schemas: List[dict]):
+        super().__init__(schemas)
+        self.json = json.dumps(schemas, sort_keys=True, separators=(",", ":"))
+
+
 class ToolRegistry:
     """
     Registry for all tools in the system.
@@ -14,7 +27,9 @@ class ToolRegistry:
     def __init__(self, session_id: str = None):
         self._tools: Dict[str, Tool] = {}
         self._session_id = session_id
-        
+        # compiled provider schemas (with their json form), rebuilt only after register()
+        self._client_tools_cache: Dict[LLMProvider, ClientTools] = {}
+
     def register(self, tool: Tool):
         """
         Register a single Tool instance & inject session_id.
@@ -24,6 +39,7 @@ class ToolRegistry:
         logger.debug(f"register new tool {tool.name} and inject session `{self._session_id}`")
         tool.session_id = self._session_id
         self._tools[tool.name] = tool
+        self._client_tools_cache.clear()
 
     def register_from_module(self, module: ModuleType):
         """
@@ -49,7 +65,7 @@ class ToolRegistry:
             for tool in self._tools.values()
         ]
 
-    def to_client_tools(self, llm_provider: LLMProvider) -> List[dict]:
+    def to_client_tools(self, llm_provider: LLMProvider) -> ClientTools:
         """
         Convert registered tools to OpenAI-compatible tools schema:
         [
@@ -62,8 +78,22 @@ class ToolRegistry:
                 }
             }
         ]
+        The list is compiled once per provider and reused until the next register(),
+        so treat it as read-only.
+        """
+        llm_provider = LLMProvider(llm_provider)
+        cached = self._client_tools_cache.get(llm_provider)
+        if cached is None:
+            cached = ClientTools([tool.to_client_format(llm_provider) for tool in self._tools.values()])
+            self._client_tools_cache[llm_provider] = cached
+        return cached
+
+    def to_client_tools_json(self, llm_provider: LLMProvider) -> str:
+        """
+        Pre-serialized (compact, key-sorted) JSON of `to_client_tools`.
+        Stable across calls, so it can be sent/hashed/logged without re-encoding.
         """
-        return [tool.to_client_format(llm_provider) for tool in self._tools.values()]
+        return self.to_client_tools(llm_provider).json
     
     def to_string(self) -> [str]:
         """
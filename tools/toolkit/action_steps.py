@@ -0,0 +1,83 @@
+"""
+Step parsing / result formatting for the batched browser_actions tool.
+
+A step is a json object (or its json string, tool arguments are arrays of strings):
+
+    {"action": "goto", "url": "https://example.com/login"}
+    {"action": "fill", "selector": "e3", "value": "alice"}
+    {"action": "press", "selector": "e3", "key": "Enter"}
+    {"action": "click", "selector": "role=button name=Sign in"}
+    {"action": "wait_for", "selector": "text=Welcome"}
+    {"action": "content", "mode": "outline"}
+"""
+import json
+from typing import List, Union
+
+# action -> required fields
+ACTIONS = {
+    "goto": ("url",),
+    "click": ("selector",),
+    "fill": ("selector", "value"),
+    "press": ("selector", "key"),
+    "wait_for": ("selector",),
+    "content": (),
+}
+# modes of a "content" step (as in get_page_content)
+CONTENT_MODES = ("outline", "text", "html")
+# characters of a step's output kept in the result (the last step is never clipped)
+MAX_STEP_OUTPUT = 200
+
+
+def parse_steps(steps: List[Union[str, dict]]) -> List[dict]:
+    """ validate every step up front, so a bad step 4 never leaves steps 1-3 half applied """
+    parsed = []
+    for number, step in enumerate(steps, 1):
+        if isinstance(step, str):
+            try:
+                step = json.loads(step)
+            except ValueError:
+                raise ValueError(f"step {number} is not a json object: {step!r}")
+        if not isinstance(step, dict):
+            raise ValueError(f"step {number} is not a json object: {step!r}")
+        action = step.get("action")
+        if action not in ACTIONS:
+            raise ValueError(f"step {number}: unknown action {action!r} (expected one of {', '.join(ACTIONS)})")
+        missing = [field for field in ACTIONS[action] if field not in step]
+        if missing:
+            raise ValueError(f"step {number} ({action}) needs {', '.join(missing)}")
+        if action == "content":
+            if step.get("mode", "outline") not in CONTENT_MODES:
+                raise ValueError(
+                    f"step {number}: unknown content mode {step['mode']!r} (expected one of {', '.join(CONTENT_MODES)})"
+                )
+            part = step.get("part", 1)
+            if not isinstance(part, int) or isinstance(part, bool) or part < 1:
+                raise ValueError(f"step {number}: part must be a positive integer, got {part!r}")
+        parsed.append(step)
+    return parsed
+
+
+def describe(step: dict) -> str:
+    """ short label of a step for the result lines (fill values are left out) """
+    target = step.get("url") or step.get("selector") or step.get("mode", "")
+    return f"{step['action']} {target}".strip()
+
+
+def error_line(error: Exception) -> str:
+    """ playwright errors carry a multi-line call log -> first line only """
+    message = str(error).strip()
+    return message.splitlines()[0] if message else type(error).__name__
+
+
+def format_results(steps: List[dict], results: List[str], failed: bool) -> str:
+    lines = []
+    for number, (step, output) in enumerate(zip(steps, results), 1):
+        if number < len(results) and len(output) > MAX_STEP_OUTPUT:
+            output = output[:MAX_STEP_OUTPUT] + "…"
+        separator = "\n" if "\n" in output else " "
+        lines.append(f"{number}. {describe(step)}:{separator}{output}")
+    if failed and len(results) < len(steps):
+        first = len(results) + 1
+        skipped = f"step {first}" if first == len(steps) else f"steps {first}-{len(steps)}"
+        lines.append(f"aborted: {skipped} not run")
+    return "\n".join(lines)
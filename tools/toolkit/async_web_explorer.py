@@ -0,0 +1,188 @@
+from tools.decorator import tool
+from typing import Literal
+from browser_manager import aget_page, aclose_page
+from loguru import logger
+
+from tools.toolkit.locators import locate
+from tools.toolkit.page_outline import MAX_TEXT_CHARS, OUTLINE_JS, format_outline, reads_only
+from tools.toolkit import screenshots
+from tools.toolkit import action_steps
+from tools.toolkit.page_waits import asettle_after
+
+# Async twins of web_explorer.py (same tool names / arguments -> register one module or the other).
+# They run on the shared tool event loop (tools/base.py), so calls for different sessions
+# from different agents / threads drive their pages concurrently on one loop.
+# Still serial within a turn: calls of one session must keep their order.
+
+@tool(serial=True)
+async def goto_url(url: str, session_id: str = "default") -> str:
+    """Go to a URL and return page title + status."""
+    logger.debug(f"[goto_url] url={url}, session_id={session_id}")
+    page = await aget_page(session_id)
+    try:
+        response = await page.goto(url, wait_until="domcontentloaded")
+        status = response.status if response else "unknown"
+        return f"Navigated to: {await page.title()}\nURL: {page.url}\nHTTP Status: {status}"
+    except Exception as e:
+        return f"Failed to navigate to {url}: {str(e)}"
+
+
+@tool(serial=True, side_effect_free=reads_only)
+async def get_page_content(mode: Literal["text", "html", "outline"] = "text", part: int = 1,
+                           session_id: str = "default") -> str:
+    """
+    Get the current page content in different formats.
+
+    Args:
+        mode: "text" (clean readable text), "html" (full source),
+              "outline" (compact: headings, text blocks and interactive elements with ids like [e3]
+              that click_element / fill_input accept; long pages come in parts)
+        part: which part of a long outline to return (1-based)
+    """
+    logger.debug(f"[get_page_content] mode={mode}, part={part}, session_id={session_id}")
+    page = await aget_page(session_id)
+    if mode == "outline":
+        lines = await page.evaluate(OUTLINE_JS, MAX_TEXT_CHARS)
+        return format_outline(await page.title(), page.url, lines, part)
+    if mode == "text":
+        return await page.locator("body").inner_text()
+    elif mode == "html":
+        return await page.content()
+    else:
+        return "Invalid mode"
+
+
+@tool(serial=True)
+async def click_element(selector: str, session_id: str = "default") -> str:
+    """Click an element by outline id (e.g. "e3"), visible text, role, or CSS selector."""
+    logger.debug(f"[click_element] selector={selector}, session_id={session_id}")
+    page = await aget_page(session_id)
+    try:
+        settled = await asettle_after(page, locate(page, selector).click)
+        return f"Clicked: {selector} → New URL: {page.url} ({settled})"
+    except Exception as e:
+        return f"Failed to click '{selector}': {str(e)}"
+
+
+@tool(serial=True)
+async def fill_input(selector: str, value: str, session_id: str = "default") -> str:
+    "Fill a form input field."
+    logger.debug(f"[fill_input] selector={selector}, value={value}, session_id={session_id}")
+    page = await aget_page(session_id)
+    try:
+        await locate(page, selector).fill(value)
+        return f"Filled '{selector}' with '{value}'"
+    except Exception as e:
+        return f"Failed to fill input '{selector}': {str(e)}"
+
+
+@tool(serial=True)
+async def screenshot(full_page: bool = False, selector: str = None, region: str = None,
+                     max_dimension: int = screenshots.DEFAULT_MAX_DIMENSION,
+                     image_format: Literal["jpeg", "png", "webp"] = "jpeg",
+                     quality: int = screenshots.DEFAULT_QUALITY, force: bool = False,
+                     session_id: str = "default") -> str:
+    """
+    Take a screenshot of the current page (or of one element / region) and return it as a base64 data URI
+    on the line after its label "Screenshot #N" (numbered per session). An image identical to the previous
+    screenshot is not sent again, the result names that screenshot instead.
+
+    Args:
+        selector: only this element (outline id, text=, role= or CSS selector)
+        region: only this part of the viewport, "x,y,width,height" in CSS pixels
+        max_dimension: downscale so the longest side is at most this many pixels (0 = full size)
+        image_format: "jpeg" / "webp" (with quality 1-100) are much smaller than "png"
+        force: send the image even if it is unchanged
+    """
+    logger.debug(f"[screenshot] full_page={full_page}, selector={selector}, region={region}, "
+                 f"max_dimension={max_dimension}, image_format={image_format}, session_id={session_id}")
+    page = await aget_page(session_id)
+    try:
+        box = None
+        if selector:
+            bounding = await locate(page, selector).bounding_box()
+            if bounding is None:
+                return f"Failed to take screenshot: '{selector}' is not visible"
+            box = (bounding["x"], bounding["y"], bounding["width"], bounding["height"])
+        elif region:
+            box = screenshots.parse_region(region)
+        params = screenshots.capture_params(await page.evaluate(screenshots.PAGE_METRICS_JS), full_page, box,
+                                            image_format, quality, max_dimension)
+        cdp = await page.context.new_cdp_session(page)
+        try:
+            data = (await cdp.send("Page.captureScreenshot", params))["data"]
+        finally:
+            await cdp.detach()
+        return screenshots.format_result(session_id, data, params, force)
+    except Exception as e:
+        return f"Failed to take screenshot: {str(e)}"
+
+
+async def _run_step(page, step: dict) -> str:
+    action = step["action"]
+    if action == "goto":
+        response = await page.goto(step["url"], wait_until="domcontentloaded")
+        return f"{await page.title()} (HTTP {response.status if response else 'unknown'})"
+    if action == "click":
+        return str(await asettle_after(page, locate(page, step["selector"]).click))
+    if action == "fill":
+        await locate(page, step["selector"]).fill(str(step["value"]))
+        return "ok"
+    if action == "press":
+        return str(await asettle_after(page, lambda: locate(page, step["selector"]).press(step["key"])))
+    if action == "wait_for":
+        await locate(page, step["selector"]).wait_for(state="visible", timeout=step.get("timeout", 10000))
+        return "ok"
+    mode = step.get("mode", "outline")
+    if mode == "outline":
+        lines = await page.evaluate(OUTLINE_JS, MAX_TEXT_CHARS)
+        return format_outline(await page.title(), page.url, lines, step.get("part", 1))
+    if mode == "html":
+        return await page.content()
+    return await page.locator("body").inner_text()
+
+
+@tool(serial=True)
+async def browser_actions(steps: list, stop_on_error: bool = True, session_id: str = "default") -> str:
+    """
+    Run several browser steps in order in one call (e.g. a login: goto, fill, fill, click, content)
+    and return one short result line per step. Steps are json objects:
+        {"action": "goto", "url": "..."}
+        {"action": "click", "selector": "..."}
+        {"action": "fill", "selector": "...", "value": "..."}
+        {"action": "press", "selector": "...", "key": "Enter"}
+        {"action": "wait_for", "selector": "..."}
+        {"action": "content", "mode": "outline" | "text" | "html", "part": 1}
+    Selectors work as in click_element. Stops at the first failing step unless stop_on_error is false.
+    """
+    logger.debug(f"[browser_actions] steps={len(steps)}, session_id={session_id}")
+    try:
+        parsed = action_steps.parse_steps(steps)
+    except ValueError as e:
+        return f"Invalid steps: {e}"
+    try:
+        page = await aget_page(session_id)
+    except Exception as e:
+        return f"Failed to get the page: {action_steps.error_line(e)}"
+    results, failed = [], False
+    for step in parsed:
+        try:
+            results.append(await _run_step(page, step))
+        except Exception as e:
+            failed = True
+            results.append(f"FAILED: {action_steps.error_line(e)}")
+            if stop_on_error:
+                break
+    return action_steps.format_results(parsed, results, failed)
+
+
+@tool(serial=True)
+async def end_browsing_page(session_id: str = "default") -> str:
+    "Close the page (use only when done browsing)."
+    logger.debug(f"[end_browsing_page] session_id={session_id}")
+    try:
+        await aclose_page(session_id)
+        screenshots.forget(session_id)
+        return f"Closed browser page for session '{session_id}'"
+    except Exception as e:
+        return f"Failed to close page: {str(e)}"
@@ -1,9 +1,25 @@
 from tools.decorator import tool
+import json
 import os
 from pathlib import Path
 import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from loguru import logger
 
-@tool()
+from . import pytest_pool, pytest_report, pytest_selection, pytest_shards
+
+# run pytest in warm forked workers (pytest_pool.py) instead of a fresh process per call
+USE_PYTEST_POOL = True
+# output lines kept when pytest could not write a report (usage / internal errors)
+RAW_OUTPUT_LINES = 40
+# import graph of the repo, shared by every run (files are re-parsed only when they change)
+_import_index = pytest_selection.ImportIndex()
+# per test file durations of previous runs, used to balance shards
+_durations = pytest_shards.DurationStore()
+
+@tool(serial=True)
 def run_python_file(file_path: str) -> dict:
     """
     Run a Python file and return its stdout and stderr.
@@ -26,10 +42,15 @@ def run_python_file(file_path: str) -> dict:
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-@tool()
-def run_pytest_tests(directory: str = ".") -> dict:
+@tool(max_concurrency=1)
+def run_pytest_tests(directory: str = ".", changed_files: list = None, full_run: bool = False,
+                     workers: int = 1) -> dict:
     """
-    Run pytest in the given directory and return its output.
+    Run pytest in the given directory and return a structured report
+    (counts, per-test outcome and duration, truncated failure tracebacks).
+    With changed_files only the tests importing them (directly or not) run; full_run forces every test.
+    workers > 1 splits the test files (or the tests, when there are fewer files) into that many
+    shards running in parallel.
     Returns output as a dictionary with success/error status and result/message.
     """
     try:
@@ -37,20 +58,95 @@ def run_pytest_tests(directory: str = ".") -> dict:
         if not p.exists() or not p.is_dir():
             return {"success": False, "error": f"Not a directory: {directory}"}
 
-        # Ensure imports from repo root work during pytest execution
-        env = dict(**os.environ)
-        repo_root = Path(__file__).resolve().parents[3]
-        env["PYTHONPATH"] = str(repo_root)
+        selected = None
+        if changed_files and not full_run:
+            selected = pytest_selection.affected_tests(p, changed_files, _import_index)
 
-        proc = subprocess.run(
-            ["pytest", "."],
-            capture_output=True,
-            text=True,
-            cwd=str(p),
-            env=env,
-        )
-        output = proc.stdout + "\n" + proc.stderr
+        shards = []
+        if workers > 1:
+            units = selected or pytest_selection.find_test_files(p.resolve())
+            if len(units) < workers:
+                # too few files to keep every worker busy -> split their tests instead
+                units = _collect_tests(p, units) or units
+            shards = pytest_shards.plan_shards(_durations.get(units), workers)
+        if len(shards) > 1:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix="pytest-shard") as executor:
+                reports = list(executor.map(lambda shard: _run_report(p, _targets(p, shard)), shards))
+            report = pytest_shards.merge_reports(reports, time.perf_counter() - start)
+        else:
+            report = _run_report(p, _targets(p, selected) if selected else ["."])
 
-        return {"success": proc.returncode == 0, "result": output.strip()}
+        if selected:
+            report["selected_tests"] = _targets(p, selected)
+        return {"success": report["exit_code"] == 0, "result": report}
     except Exception as e:
         return {"success": False, "error": str(e)}
+
+
+def _targets(directory: Path, items: list) -> list:
+    """ test files (Path) or tests ("absolute path::name") -> pytest args relative to directory """
+    targets = []
+    for item in items:
+        file_part, sep, name = str(item).partition("::")
+        targets.append(f"{Path(file_part).relative_to(directory.resolve())}{sep}{name}")
+    return targets
+
+
+def _pytest_with_report(directory: Path, args: list) -> tuple:
+    """ (exit code, output, report text) of a pytest run with the report plugin """
+    fd, report_path = tempfile.mkstemp(prefix="pytest-report-", suffix=".json")
+    os.close(fd)
+    try:
+        returncode, output = _run_pytest(
+            directory, ["-p", pytest_report.PLUGIN, "--tool-report", report_path, *args]
+        )
+        return returncode, output, Path(report_path).read_text(encoding="utf-8")
+    finally:
+        os.unlink(report_path)
+
+
+def _collect_tests(directory: Path, files: list) -> list:
+    """ tests ("absolute path::name") in files, [] when collection fails """
+    returncode, _, report_text = _pytest_with_report(directory, ["--collect-only", "-q", *_targets(directory, files)])
+    if returncode != 0 or not report_text:
+        return []
+    report = json.loads(report_text)
+    return [pytest_shards.absolute_nodeid(report["rootdir"], nodeid) for nodeid in report.get("nodeids", [])]
+
+
+def _run_report(directory: Path, targets: list) -> dict:
+    """ one pytest run with the report plugin -> pytest_report.py report (durations recorded) """
+    returncode, output, report_text = _pytest_with_report(directory, targets)
+    if not report_text:
+        # pytest stopped before the session finished -> the output is all there is
+        return {
+            "exit_code": returncode,
+            "collected": 0,
+            "output": pytest_report.truncate_lines(output, RAW_OUTPUT_LINES),
+        }
+    report = json.loads(report_text)
+    _durations.record(report, report.pop("rootdir"))
+    return report
+
+
+def _run_pytest(directory: Path, args: list) -> tuple:
+    """ (exit code, output) of pytest `args` run inside directory """
+    if USE_PYTEST_POOL and pytest_pool.available():
+        try:
+            return pytest_pool.default_pool().run(str(directory), args)
+        except Exception as e:
+            logger.warning(f"pytest worker failed, falling back to a subprocess: {e}")
+
+    # Ensure imports from repo root work during pytest execution
+    env = dict(**os.environ)
+    env["PYTHONPATH"] = str(pytest_pool.REPO_ROOT)
+
+    proc = subprocess.run(
+        ["pytest", *args],
+        capture_output=True,
+        text=True,
+        cwd=str(directory),
+        env=env,
+    )
+    return proc.returncode, proc.stdout + "\n" + proc.stderr
@@ -2,7 +2,7 @@ from tools.decorator import tool
 from pathlib import Path
 import shutil
 
-@tool()
+@tool(side_effect_free=True)
 def list_directory_files(path: str = ".", depth: int = 1) -> dict:
     """
     List files and directories in the given path up to a certain depth using pathlib.
@@ -31,24 +31,129 @@ def list_directory_files(path: str = ".", depth: int = 1) -> dict:
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-@tool()
-def read_file(file_path: str) -> dict:
+# default cap on the returned text (~16k tokens); page through the rest with line_start / line_end
+READ_MAX_BYTES = 64 * 1024
+READ_CHUNK_BYTES = 1024 * 1024
+
+
+def _seek_line(f, line_start: int) -> int:
+    """ move f to the start of line `line_start` (or EOF) reading chunks -> line number reached """
+    line = 1
+    offset = 0
+    last = b""
+    while line < line_start:
+        chunk = f.read(READ_CHUNK_BYTES)
+        if not chunk:
+            if last and last != b"\n":
+                line += 1  # the skipped last line had no newline
+            break
+        last = chunk[-1:]
+        newlines = chunk.count(b"\n")
+        if line + newlines < line_start:
+            line += newlines
+            offset += len(chunk)
+            continue
+        position = -1
+        while line < line_start:
+            position = chunk.index(b"\n", position + 1)
+            line += 1
+        offset += position + 1
+    f.seek(offset)
+    return line
+
+
+def _skip_line(f):
+    """ move f past the end of the current line without loading it """
+    for chunk in iter(lambda: f.read(READ_CHUNK_BYTES), b""):
+        end = chunk.find(b"\n")
+        if end >= 0:
+            f.seek(end + 1 - len(chunk), 1)
+            return
+
+
+def _count_lines(f) -> int:
+    """ lines from the current position to EOF (a last line without newline counts) """
+    count, last = 0, b""
+    for chunk in iter(lambda: f.read(READ_CHUNK_BYTES), b""):
+        count += chunk.count(b"\n")
+        last = chunk[-1:]
+    return count + (1 if last and last != b"\n" else 0)
+
+
+@tool(side_effect_free=True)
+def read_file(file_path: str = None, line_start: int = None, line_end: int = None,
+              max_bytes: int = READ_MAX_BYTES, path: str = None) -> dict:
     """
-    Read the content of a file.
+    Read the content of a file, or only lines line_start..line_end (1-based, inclusive).
+    At most max_bytes are returned: "total_lines", "line_start"/"line_end" (the lines returned)
+    and "truncated" tell how to read the rest. A single line longer than max_bytes is cut
+    ("note" says so).
     Returns a dictionary with success/error status and result/message.
     """
     try:
-        # TODO:
+        file_path = file_path or path  # `path` is accepted as an alias (some prompts send that shape)
+        if not file_path:
+            return {"success": False, "error": "file_path is required"}
         p = Path(file_path)
         if not p.exists():
             return {"success": False, "error": f"File not found: {file_path}"}
+        line_start = max(int(line_start or 1), 1)
+        max_bytes = int(max_bytes or READ_MAX_BYTES)
+        if line_end is not None and int(line_end) < line_start:
+            return {"success": False, "error": f"line_end ({line_end}) is before line_start ({line_start})"}
+
+        window = bytearray()
+        last_line = line_start - 1
+        truncated = cut = False
+        with p.open("rb") as f:
+            reached = _seek_line(f, line_start)
+            while line_end is None or last_line < int(line_end):
+                remaining = max_bytes - len(window)
+                # one byte over the space left tells a line that does not fit (never loads more)
+                line = f.readline(remaining + 1)
+                if not line:
+                    break
+                if len(line) > remaining:
+                    truncated = True
+                    if window:
+                        f.seek(-len(line), 1)
+                        break
+                    # a single line longer than max_bytes: return its beginning
+                    window += line[:max_bytes]
+                    last_line += 1
+                    cut = True
+                    if not line.endswith(b"\n"):
+                        _skip_line(f)
+                    break
+                window += line
+                last_line += 1
+            total_lines = reached - 1 + (last_line - line_start + 1) + _count_lines(f)
 
-        content = p.read_text(encoding="utf-8")
-        return {"success": True, "result": content}
+        if line_start > max(total_lines, 1):
+            return {
+                "success": False,
+                "error": f"line_start ({line_start}) is past the end of the file ({total_lines} lines)",
+                "total_lines": total_lines,
+            }
+        content = window.decode("utf-8", errors="replace").replace("\r\n", "\n")
+        result = {
+            "success": True,
+            "result": content,
+            "total_lines": total_lines,
+            "line_start": line_start,
+            "line_end": last_line,
+            "truncated": truncated,
+        }
+        if cut:
+            result["note"] = (
+                f"line {last_line} is longer than max_bytes ({max_bytes}): only its first {max_bytes} bytes "
+                f"are returned, reading on from line_start={last_line + 1} skips the rest"
+            )
+        return result
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-@tool()
+@tool(serial=True)
 def write_file(file_path: str, content: str) -> dict:
     """
     Write content to a file.
@@ -62,7 +167,7 @@ def write_file(file_path: str, content: str) -> dict:
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-@tool()
+@tool(serial=True)
 def create_folder(folder_path: str) -> dict:
     """
     Create a new folder (directory) at the specified path.
@@ -76,7 +181,7 @@ def create_folder(folder_path: str) -> dict:
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-@tool()
+@tool(serial=True)
 def remove_folder(folder_path: str) -> dict:
     """
     Remove a folder (directory) and all its contents at the specified path.
@@ -92,7 +197,7 @@ def remove_folder(folder_path: str) -> dict:
     except Exception as e:
         return {"success": False, "error": str(e)}
 
-@tool()
+@tool(serial=True)
 def remove_file(file_path: str) -> dict:
     """
     Remove a file at the specified path.
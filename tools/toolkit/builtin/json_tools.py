@@ -1,7 +1,7 @@
 from tools.decorator import tool
 import json
 
-@tool()
+@tool(side_effect_free=True)
 def json_is_valid(s: str) -> bool:
     """
     Check if the input string is valid JSON.
@@ -0,0 +1,240 @@
+"""
+Warm pytest workers for run_pytest_tests.
+
+Each worker is a long-lived python process that imports pytest and every
+installed pytest plugin (pytest11 entry points, e.g. pytest-playwright) once,
+then serves runs over a json-lines pipe. Every run forks a child from that warm
+process and calls pytest.main there, so:
+- interpreter start-up + plugin discovery/imports are paid once per worker
+- repo / test modules are never imported in the worker itself -> each run sees
+  the files as they are on disk now (no stale modules, nothing to reload)
+
+Only available where os.fork exists (posix); callers fall back to a subprocess.
+"""
+import atexit
+import json
+import os
+import queue
+import subprocess
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[3]
+# cap on busy workers: workers are started on demand and sharded runs use one per shard,
+# so a run with workers=N can use up to N cores (ordinary runs use one)
+DEFAULT_POOL_SIZE = max(2, os.cpu_count() or 1)
+# warm workers kept between runs; extra ones started for a sharded run exit when it ends
+DEFAULT_MAX_IDLE = 2
+# recycle a worker after this many runs (bounds memory growth of the warm process)
+DEFAULT_MAX_RUNS = 200
+
+
+def available() -> bool:
+    return hasattr(os, "fork")
+
+
+# ---------------- worker side ----------------
+def _preload(modules: Iterable[str]):
+    import pytest  # noqa: F401
+    from importlib.metadata import entry_points
+
+    for entry_point in entry_points(group="pytest11"):
+        try:
+            entry_point.load()
+        except Exception:
+            pass  # pytest will report a broken plugin in the run itself
+    for module in modules:
+        __import__(module)
+
+
+def _run_forked(cwd: str, args: List[str]) -> Tuple[int, str]:
+    import pytest
+
+    fd, output_path = tempfile.mkstemp(prefix="pytest-worker-", suffix=".log")
+    sys.stdout.flush()
+    sys.stderr.flush()
+    pid = os.fork()
+    if pid == 0:  # child: fresh copy of the warm interpreter
+        code = 3
+        try:
+            os.dup2(fd, 1)
+            os.dup2(fd, 2)
+            os.chdir(cwd)
+            code = int(pytest.main(args))
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(code)
+
+    os.close(fd)
+    _, status = os.waitpid(pid, 0)
+    try:
+        output = Path(output_path).read_text(encoding="utf-8", errors="replace")
+    finally:
+        os.unlink(output_path)
+    return os.waitstatus_to_exitcode(status), output
+
+
+def serve(preload: Sequence[str] = ()):
+    """ worker loop: one json request per stdin line -> one json response per line """
+    # keep the protocol on a private copy of stdout, stray prints go to stderr
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8")
+    os.dup2(2, 1)
+    _preload(preload)
+    protocol.write(json.dumps({"ready": True}) + "\n")
+    protocol.flush()
+    for line in sys.stdin:
+        request = json.loads(line)
+        try:
+            returncode, output = _run_forked(request["cwd"], request["args"])
+            response = {"returncode": returncode, "output": output}
+        except Exception as e:
+            response = {"error": str(e)}
+        protocol.write(json.dumps(response) + "\n")
+        protocol.flush()
+
+
+# ---------------- pool side ----------------
+class PytestWorker:
+    def __init__(self, preload: Sequence[str] = ()):
+        env = dict(**os.environ)
+        # same import setup as the subprocess path
+        env["PYTHONPATH"] = str(REPO_ROOT)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "tools.toolkit.builtin.pytest_pool", *preload],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=str(REPO_ROOT),
+            env=env,
+            text=True,
+            encoding="utf-8",
+        )
+        self.runs = 0
+        self._read()  # wait for the ready line
+
+    def _read(self) -> dict:
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"pytest worker exited (code {self.process.poll()})")
+        return json.loads(line)
+
+    def run(self, directory: str, args: Sequence[str]) -> Tuple[int, str]:
+        self.process.stdin.write(json.dumps({"cwd": str(Path(directory).resolve()), "args": list(args)}) + "\n")
+        self.process.stdin.flush()
+        response = self._read()
+        self.runs += 1
+        if "error" in response:
+            raise RuntimeError(response["error"])
+        return response["returncode"], response["output"]
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def close(self):
+        if self.alive:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class PytestWorkerPool:
+    """
+    At most `size` warm workers, checked out one run at a time (callers block
+    while all are busy), at most `max_idle` of them kept alive between runs.
+    Dead workers are replaced, old ones recycled.
+    """
+
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, preload: Sequence[str] = (), max_runs: int = DEFAULT_MAX_RUNS,
+                 max_idle: int = DEFAULT_MAX_IDLE):
+        self.size = size
+        self.preload = tuple(preload)
+        self.max_runs = max_runs
+        self.max_idle = max_idle
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._workers: List[PytestWorker] = []
+
+    def _checkout(self) -> PytestWorker:
+        self._slots.acquire()
+        try:
+            while True:
+                try:
+                    worker = self._idle.get_nowait()
+                except queue.Empty:
+                    worker = PytestWorker(self.preload)
+                    with self._lock:
+                        self._workers.append(worker)
+                    return worker
+                if worker.alive:
+                    return worker
+                self._discard(worker)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _discard(self, worker: PytestWorker):
+        worker.close()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+
+    def _checkin(self, worker: PytestWorker, healthy: bool):
+        if healthy and worker.alive and worker.runs < self.max_runs and self._idle.qsize() < self.max_idle:
+            self._idle.put(worker)
+        else:
+            self._discard(worker)
+        self._slots.release()
+
+    def warm(self, count: Optional[int] = None):
+        """ start workers ahead of the first run (in the background) """
+        def start():
+            worker = self._checkout()
+            self._checkin(worker, healthy=True)
+
+        for _ in range(min(count or self.max_idle, self.size, self.max_idle)):
+            threading.Thread(target=start, daemon=True).start()
+
+    def run(self, directory: str, args: Sequence[str] = (".",)) -> Tuple[int, str]:
+        """ pytest.main(args) with cwd=directory -> (exit code, combined output) """
+        worker = self._checkout()
+        healthy = False
+        try:
+            result = worker.run(directory, args)
+            healthy = True
+            return result
+        finally:
+            self._checkin(worker, healthy)
+
+    def close(self):
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+
+
+_default_pool: Optional[PytestWorkerPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def default_pool() -> PytestWorkerPool:
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = PytestWorkerPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1:])
@@ -0,0 +1,124 @@
+"""
+Structured pytest results for run_pytest_tests.
+
+Loaded into the pytest run with `-p tools.toolkit.builtin.pytest_report --tool-report PATH`
+(works the same in a forked pool worker and in a subprocess) and writes a compact
+json report instead of leaving callers to scrape the terminal output:
+
+    {"exit_code": 1, "collected": 6, "passed": 5, "failed": 1, "errors": 0, "skipped": 0,
+     "duration": 0.12,
+     "tests": [["test_x.py::test_ok", "passed", 0.001], ...],
+     "failures": [{"test": "test_x.py::test_5", "outcome": "failed", "traceback": "...last lines..."}]}
+
+With --collect-only the report also lists the collected node ids ("nodeids").
+"""
+import json
+import time
+from pathlib import Path
+from typing import Optional
+
+PLUGIN = "tools.toolkit.builtin.pytest_report"
+DEFAULT_TRACEBACK_LINES = 15
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("tool-report")
+    group.addoption("--tool-report", dest="tool_report", default=None, help="write a json summary of the run here")
+    group.addoption("--tool-report-lines", dest="tool_report_lines", type=int, default=DEFAULT_TRACEBACK_LINES,
+                    help="keep the last N lines of each failure traceback")
+
+
+def pytest_configure(config):
+    path = config.getoption("tool_report")
+    if path:
+        config.pluginmanager.register(_Reporter(path, config.getoption("tool_report_lines")), "tool-reporter")
+
+
+def truncate_lines(text: str, max_lines: int) -> str:
+    """ last max_lines lines (where assertion details and the failing line are) """
+    lines = text.rstrip().splitlines()
+    if len(lines) <= max_lines:
+        return "\n".join(lines)
+    return "\n".join([f"... ({len(lines) - max_lines} lines omitted)"] + lines[-max_lines:])
+
+
+class _Reporter:
+    def __init__(self, path: str, max_lines: int):
+        self.path = Path(path)
+        self.max_lines = max_lines
+        self.start = time.perf_counter()
+        self.collected = 0
+        self.tests = {}  # nodeid -> [outcome, duration]
+        self.failures = []
+        self.nodeids = None  # collected node ids, only for --collect-only runs
+
+    def _failure(self, nodeid: str, outcome: str, report):
+        self.failures.append({
+            "test": nodeid,
+            "outcome": outcome,
+            "traceback": truncate_lines(report.longreprtext, self.max_lines),
+        })
+
+    def pytest_collection_finish(self, session):
+        self.collected = len(session.items)
+        if session.config.option.collectonly:
+            self.nodeids = [item.nodeid for item in session.items]
+
+    def pytest_collectreport(self, report):
+        if report.failed:
+            self.tests[report.nodeid] = ["error", 0.0]
+            self._failure(report.nodeid, "error", report)
+
+    def pytest_runtest_logreport(self, report):
+        entry = self.tests.setdefault(report.nodeid, ["passed", 0.0])
+        entry[1] += report.duration
+        if report.when == "call":
+            if hasattr(report, "wasxfail"):
+                entry[0] = "xfailed" if report.skipped else "xpassed"
+            elif report.outcome != "passed":
+                entry[0] = report.outcome
+                if report.failed:
+                    self._failure(report.nodeid, "failed", report)
+        elif report.skipped:
+            entry[0] = "skipped"
+        elif report.failed:
+            # setup / teardown failures are errors, not test failures
+            entry[0] = "error"
+            self._failure(report.nodeid, "error", report)
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        outcomes = [outcome for outcome, _ in self.tests.values()]
+        report = {
+            "exit_code": int(exitstatus),
+            "collected": self.collected,
+            "passed": outcomes.count("passed") + outcomes.count("xpassed"),
+            "failed": outcomes.count("failed"),
+            "errors": outcomes.count("error"),
+            "skipped": outcomes.count("skipped") + outcomes.count("xfailed"),
+            "duration": round(time.perf_counter() - self.start, 3),
+            "tests": [[nodeid, outcome, round(duration, 3)] for nodeid, (outcome, duration) in self.tests.items()],
+            "failures": self.failures,
+            # node ids are relative to it (consumed by run_pytest_tests, not returned)
+            "rootdir": str(session.config.rootpath),
+        }
+        if self.nodeids is not None:
+            report["nodeids"] = self.nodeids
+        self.path.write_text(json.dumps(report), encoding="utf-8")
+
+
+def report_passed(result: Optional[dict]) -> bool:
+    """
+    True when a run_pytest_tests result (also when wrapped by Agent.call_tool)
+    ran at least one test and nothing failed.
+    """
+    report = result
+    while isinstance(report, dict) and "collected" not in report and isinstance(report.get("result"), dict):
+        report = report["result"]
+    if not isinstance(report, dict) or "collected" not in report:
+        return False
+    return (
+        report.get("exit_code") == 0
+        and report["collected"] > 0
+        and report.get("failed", 0) == 0
+        and report.get("errors", 0) == 0
+    )
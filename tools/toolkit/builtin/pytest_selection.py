@@ -0,0 +1,126 @@
+"""
+Selects the tests affected by a set of changed files.
+
+An ImportIndex parses each python file's imports once (re-parsed when its mtime
+changes), resolves them to files of the repo and answers "which test files
+(transitively) import one of these files". Anything it cannot reason about
+(conftest.py changes, non-python files, nothing selected) means: run everything.
+"""
+import ast
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .pytest_pool import REPO_ROOT
+
+SKIP_DIRS = {"__pycache__", ".git", ".venv", "node_modules"}
+
+
+def is_test_file(path: Path) -> bool:
+    return path.suffix == ".py" and (path.name.startswith("test_") or path.stem.endswith("_test"))
+
+
+def find_test_files(directory: Path) -> List[Path]:
+    return sorted(
+        p for p in directory.rglob("*.py")
+        if is_test_file(p) and not SKIP_DIRS.intersection(p.relative_to(directory).parts)
+    )
+
+
+class ImportIndex:
+    def __init__(self, roots: Iterable[Path] = (REPO_ROOT,)):
+        self.roots = [Path(r).resolve() for r in roots]
+        self._direct: Dict[Path, Tuple[int, frozenset]] = {}  # file -> (mtime_ns, imported repo files)
+
+    def _module_file(self, base: Path, parts: List[str]) -> List[Path]:
+        """ files executed when importing base/parts... (package __init__s + the module) """
+        files = []
+        current = base
+        for i, part in enumerate(parts):
+            current = current / part
+            init = current / "__init__.py"
+            if init.exists():
+                files.append(init)
+            elif i == len(parts) - 1 and current.with_suffix(".py").exists():
+                files.append(current.with_suffix(".py"))
+            elif not current.is_dir():
+                return []
+        return files
+
+    def _resolve(self, path: Path, module: str, level: int, names: List[str]) -> Set[Path]:
+        parts = module.split(".") if module else []
+        if level:
+            base = path.parent
+            for _ in range(level - 1):
+                base = base.parent
+            bases = [base]
+        else:
+            # absolute imports: repo roots + the test file's own directory (pytest rootdir insertion)
+            bases = self.roots + [path.parent]
+        found: Set[Path] = set()
+        for base in bases:
+            files = self._module_file(base, parts) if parts else []
+            # `from package import module` imports submodules too
+            for name in names:
+                files += self._module_file(base, parts + [name])
+            if files:
+                found.update(files)
+                break
+        return found
+
+    def direct_imports(self, path: Path) -> frozenset:
+        path = path.resolve()
+        try:
+            mtime = path.stat().st_mtime_ns
+        except OSError:
+            return frozenset()
+        cached = self._direct.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        found: Set[Path] = set()
+        try:
+            tree = ast.parse(path.read_text(encoding="utf-8"), filename=str(path))
+        except (SyntaxError, UnicodeDecodeError, OSError):
+            tree = None
+        for node in ast.walk(tree) if tree is not None else ():
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    found |= self._resolve(path, alias.name, 0, [])
+            elif isinstance(node, ast.ImportFrom):
+                names = [alias.name for alias in node.names if alias.name != "*"]
+                found |= self._resolve(path, node.module or "", node.level, names)
+        found.discard(path)
+        result = frozenset(p.resolve() for p in found)
+        self._direct[path] = (mtime, result)
+        return result
+
+    def dependencies(self, path: Path) -> Set[Path]:
+        """ path + every repo file it imports, transitively """
+        seen: Set[Path] = set()
+        stack = [path.resolve()]
+        while stack:
+            current = stack.pop()
+            if current in seen:
+                continue
+            seen.add(current)
+            stack.extend(self.direct_imports(current) - seen)
+        return seen
+
+
+def affected_tests(directory: Path, changed_files: Iterable[str], index: ImportIndex) -> Optional[List[Path]]:
+    """
+    Test files under directory affected by changed_files, or None when the
+    whole directory should run.
+    """
+    directory = directory.resolve()
+    changed = {Path(f).resolve() for f in changed_files}
+    if not changed or any(p.suffix != ".py" or p.name == "conftest.py" for p in changed):
+        return None
+
+    # conftest files apply to every test below them -> a change in what they import affects all
+    for conftest in directory.rglob("conftest.py"):
+        if changed & index.dependencies(conftest):
+            return None
+
+    selected = [test for test in find_test_files(directory) if changed & index.dependencies(test)]
+    return selected or None
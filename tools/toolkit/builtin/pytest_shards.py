@@ -0,0 +1,119 @@
+"""
+Splits a pytest run into shards that run at the same time.
+
+Shards are made of whole test files (module fixtures, e.g. a browser, are set up
+once per shard) and balanced with the durations of previous runs, recorded on disk:
+longest file first, always onto the least loaded shard. With fewer files than
+workers the tests themselves are split (node ids "file::test", where module
+fixtures run once per shard that uses them). Shard reports (pytest_report.py
+format) are merged back into one.
+"""
+import heapq
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Union
+
+from .pytest_pool import REPO_ROOT
+
+DURATIONS_PATH = REPO_ROOT / ".pytest_cache" / "tool_durations.json"
+# seconds assumed for a file that never ran (when nothing is known yet)
+DEFAULT_FILE_DURATION = 1.0
+
+
+class DurationStore:
+    """
+    test file (absolute path) or test ("absolute path::name") -> seconds it took
+    in the last run
+    """
+
+    def __init__(self, path: Path = DURATIONS_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._durations: Dict[str, float] = {}
+        self._mtime = None
+
+    def _load(self):
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            return
+        if mtime != self._mtime:
+            try:
+                self._durations = json.loads(self.path.read_text(encoding="utf-8"))
+            except ValueError:
+                self._durations = {}
+            self._mtime = mtime
+
+    def get(self, items: List[Union[Path, str]]) -> Dict[Union[Path, str], float]:
+        with self._lock:
+            self._load()
+            known = {f: self._durations[str(f)] for f in items if str(f) in self._durations}
+        default = sum(known.values()) / len(known) if known else DEFAULT_FILE_DURATION
+        return {f: known.get(f, default) for f in items}
+
+    def record(self, report: dict, rootdir: str):
+        """ store per-test durations and per-file totals of a run report (node ids are relative to rootdir) """
+        totals: Dict[str, float] = {}
+        for nodeid, _, duration in report.get("tests", []):
+            test_id = absolute_nodeid(rootdir, nodeid)
+            file_path = test_id.split("::", 1)[0]
+            totals[file_path] = totals.get(file_path, 0.0) + duration
+            if test_id != file_path:
+                totals[test_id] = duration
+        if not totals:
+            return
+        with self._lock:
+            self._load()
+            self._durations.update(totals)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(self._durations, indent=0), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+            self._mtime = self.path.stat().st_mtime_ns
+
+
+def absolute_nodeid(rootdir: str, nodeid: str) -> str:
+    """ "tests/test_x.py::test_a" (relative to rootdir) -> "/abs/tests/test_x.py::test_a" """
+    file_part, sep, name = nodeid.partition("::")
+    return f"{(Path(rootdir) / file_part).resolve()}{sep}{name}"
+
+
+def plan_shards(durations: Dict[Union[Path, str], float], workers: int) -> List[list]:
+    """ longest-processing-time-first assignment of files (or tests) to at most `workers` shards """
+    count = max(1, min(workers, len(durations)))
+    shards: List[list] = [[] for _ in range(count)]
+    loads = [(0.0, i) for i in range(count)]
+    for file_path in sorted(durations, key=lambda f: (-durations[f], str(f))):
+        load, i = heapq.heappop(loads)
+        shards[i].append(file_path)
+        heapq.heappush(loads, (load + durations[file_path], i))
+    return [sorted(shard, key=str) for shard in shards if shard]
+
+
+def merge_reports(reports: List[dict], duration: float) -> dict:
+    """ one report for the whole run (exit code: 0 only if every shard passed) """
+    exit_codes = [r.get("exit_code", 3) for r in reports]
+    # 5 = "no tests collected" is only a failure when no shard ran anything
+    failing = [code for code in exit_codes if code not in (0, 5)]
+    if failing:
+        exit_code = 1 if 1 in failing else max(failing)
+    else:
+        exit_code = 0 if 0 in exit_codes else 5
+    merged = {
+        "exit_code": exit_code,
+        "collected": sum(r.get("collected", 0) for r in reports),
+        "passed": sum(r.get("passed", 0) for r in reports),
+        "failed": sum(r.get("failed", 0) for r in reports),
+        "errors": sum(r.get("errors", 0) for r in reports),
+        "skipped": sum(r.get("skipped", 0) for r in reports),
+        "duration": round(duration, 3),
+        "tests": [test for r in reports for test in r.get("tests", [])],
+        "failures": [failure for r in reports for failure in r.get("failures", [])],
+        "shards": len(reports),
+    }
+    outputs = [r["output"] for r in reports if "output" in r]
+    if outputs:
+        merged["output"] = "\n".join(outputs)
+    return merged
@@ -0,0 +1,55 @@
+"""
+Selector syntax of the web explorer tools.
+
+    e3 / [e3]                 outline id (get_page_content(mode="outline"))
+    text=Sign in              element containing the text
+    role=button name=Sign in  aria role (+ accessible name)
+    anything else             css / playwright selector
+
+compile_selector parses a selector string once (cached across pages and turns);
+locate() builds the playwright locator from it. Locators are lazy: the DOM is only
+queried when the action runs, so building one is cheap and there is nothing worth
+caching per page. Works for sync and async playwright pages alike (building
+locators never awaits).
+"""
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from tools.toolkit.page_outline import short_id_selector
+
+
+class CompiledSelector(NamedTuple):
+    kind: str  # "css" | "text" | "role"
+    value: str
+    name: Optional[str] = None  # accessible name for "role"
+
+
+@lru_cache(maxsize=1024)
+def compile_selector(selector: str) -> CompiledSelector:
+    css = short_id_selector(selector)
+    if css:
+        return CompiledSelector("css", css)
+    if selector.startswith("text="):
+        return CompiledSelector("text", selector[5:])
+    if selector.startswith("role="):
+        role_name, _, role_label = selector[5:].partition(" name=")
+        return CompiledSelector("role", role_name, role_label or None)
+    return CompiledSelector("css", selector)
+
+
+def build_locator(page, compiled: CompiledSelector):
+    """ first element matching a compiled selector """
+    if compiled.kind == "text":
+        element = page.get_by_text(compiled.value, exact=False)
+    elif compiled.kind == "role":
+        element = page.get_by_role(compiled.value, name=compiled.name)
+    else:
+        element = page.locator(compiled.value)
+    # Playwright locators expose a `.first` property; mocks may implement it as a method.
+    first = getattr(element, "first", element)
+    return first() if callable(first) else first
+
+
+def locate(page, selector: str):
+    """ first element matching `selector` on `page` """
+    return build_locator(page, compile_selector(selector))
@@ -0,0 +1,163 @@
+"""
+Compact page representation for get_page_content(mode="outline").
+
+One page.evaluate call walks the visible DOM and returns lines like
+
+    # Sign in
+    Welcome back, please enter your details
+    [e1] input type=email name=email label="Email"
+    [e2] button "Sign in"
+    [e3] link "Forgot password?" -> /reset
+
+Interactive elements get short ids stored on the element (data-agent-id), so they
+stay the same across calls on the same document and click_element / fill_input
+accept "e2" (or "[e2]") as selector. Long pages are split into parts.
+"""
+import re
+from typing import List, Optional
+
+# characters per part returned to the model (~1k tokens)
+DEFAULT_PART_CHARS = 4000
+# characters kept per text block / label
+MAX_TEXT_CHARS = 300
+SHORT_ID_ATTRIBUTE = "data-agent-id"
+_SHORT_ID = re.compile(r"^\[?(e\d+)\]?$")
+
+OUTLINE_JS = r"""
+(maxText) => {
+  const INTERACTIVE = 'a[href], button, input, select, textarea, summary, [role=button], [role=link], ' +
+    '[role=checkbox], [role=radio], [role=tab], [role=menuitem], [role=switch], [role=combobox], ' +
+    '[contenteditable=""], [contenteditable=true], [onclick]';
+  const SKIP = new Set(['SCRIPT', 'STYLE', 'NOSCRIPT', 'TEMPLATE', 'SVG', 'CANVAS', 'IFRAME', 'HEAD']);
+  const BLOCK = new Set(['P', 'DIV', 'LI', 'UL', 'OL', 'TABLE', 'TR', 'TD', 'TH', 'SECTION', 'ARTICLE',
+    'MAIN', 'ASIDE', 'HEADER', 'FOOTER', 'NAV', 'FORM', 'PRE', 'BLOCKQUOTE', 'DL', 'DT', 'DD', 'BR',
+    'FIGURE', 'FIGCAPTION', 'LABEL', 'FIELDSET', 'LEGEND']);
+  const clip = (text, n) => {
+    text = (text || '').replace(/\s+/g, ' ').trim();
+    return text.length > n ? text.slice(0, n) + '…' : text;
+  };
+  const quote = (text) => JSON.stringify(clip(text, 80));
+  const hasBox = (el) => el.checkVisibility
+    ? el.checkVisibility({checkOpacity: true, checkVisibilityCSS: true})
+    : !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+  // display: contents elements have no box of their own but their children render
+  const visible = (el) => hasBox(el) || getComputedStyle(el).display === 'contents';
+  window.__agentIdSeq = window.__agentIdSeq || 0;
+  const shortId = (el) => {
+    if (!el.dataset.agentId) el.dataset.agentId = 'e' + (++window.__agentIdSeq);
+    return el.dataset.agentId;
+  };
+  const label = (el) => el.getAttribute('aria-label') || el.innerText || el.getAttribute('title') ||
+    el.getAttribute('alt') || el.getAttribute('placeholder') || el.getAttribute('name') || '';
+  const describe = (el) => {
+    const tag = el.tagName.toLowerCase();
+    const id = '[' + shortId(el) + '] ';
+    if (tag === 'a') {
+      const href = el.getAttribute('href') || '';
+      return id + 'link ' + quote(label(el)) + (href && !href.startsWith('javascript:') ? ' -> ' + clip(href, 120) : '');
+    }
+    if (tag === 'input' || tag === 'textarea') {
+      const type = tag === 'input' ? (el.type || 'text') : 'textarea';
+      let line = id + (tag === 'input' ? 'input type=' + type : 'textarea');
+      if (el.name) line += ' name=' + el.name;
+      const hint = el.getAttribute('aria-label') || el.placeholder || (el.labels && el.labels[0] && el.labels[0].innerText);
+      if (hint) line += ' label=' + quote(hint);
+      if (type === 'checkbox' || type === 'radio') line += el.checked ? ' checked' : ' unchecked';
+      else if (el.value && type !== 'password') line += ' value=' + quote(el.value);
+      return line;
+    }
+    if (tag === 'select') {
+      const options = Array.from(el.options).slice(0, 6).map(o => clip(o.text, 30));
+      const selected = el.selectedOptions[0] ? el.selectedOptions[0].text : '';
+      return id + 'select' + (el.name ? ' name=' + el.name : '') + ' selected=' + quote(selected) +
+        ' options=' + options.join('|') + (el.options.length > 6 ? '|…' : '');
+    }
+    const role = el.getAttribute('role') || (tag === 'summary' ? 'toggle' : tag === 'button' ? 'button' : 'clickable');
+    return id + role + ' ' + quote(label(el));
+  };
+
+  const lines = [];
+  let buffer = '';
+  const flush = () => {
+    const text = clip(buffer, maxText);
+    if (text) lines.push(text);
+    buffer = '';
+  };
+  const walker = document.createTreeWalker(document.body || document.documentElement,
+    NodeFilter.SHOW_ELEMENT | NodeFilter.SHOW_TEXT, {
+    acceptNode(node) {
+      if (node.nodeType === Node.TEXT_NODE) return NodeFilter.FILTER_ACCEPT;
+      if (SKIP.has(node.tagName.toUpperCase()) || !visible(node)) return NodeFilter.FILTER_REJECT;
+      return NodeFilter.FILTER_ACCEPT;
+    }
+  });
+  let node = walker.nextNode();
+  while (node) {
+    let skipSubtree = false;
+    if (node.nodeType === Node.TEXT_NODE) {
+      buffer += ' ' + node.nodeValue;
+    } else if (/^H[1-6]$/.test(node.tagName)) {
+      flush();
+      const text = clip(node.innerText, maxText);
+      if (text) lines.push('#'.repeat(+node.tagName[1]) + ' ' + text);
+      skipSubtree = true;
+    } else if (node.matches(INTERACTIVE)) {
+      flush();
+      lines.push(describe(node));
+      skipSubtree = true;
+    } else if (BLOCK.has(node.tagName)) {
+      flush();
+    }
+    if (skipSubtree) {
+      // continue after this element's subtree
+      let current = node;
+      node = null;
+      while (current && !node) {
+        node = walker.nextSibling();
+        if (!node) current = walker.parentNode();
+      }
+    } else {
+      node = walker.nextNode();
+    }
+  }
+  flush();
+  return lines;
+}
+"""
+
+
+def short_id_selector(selector: str) -> Optional[str]:
+    """ "e12" / "[e12]" (ids from the outline) -> css selector, None for anything else """
+    match = _SHORT_ID.match(selector.strip())
+    if match is None:
+        return None
+    return f'[{SHORT_ID_ATTRIBUTE}="{match.group(1)}"]'
+
+
+def reads_only(arguments: dict) -> bool:
+    """ get_page_content calls that leave the page untouched (the outline tags elements with ids) """
+    return arguments.get("mode", "text") != "outline"
+
+
+def split_parts(lines: List[str], part_chars: int = DEFAULT_PART_CHARS) -> List[str]:
+    """ group lines into parts of at most part_chars (a longer single line gets its own part) """
+    parts, current, size = [], [], 0
+    for line in lines:
+        if current and size + len(line) + 1 > part_chars:
+            parts.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current:
+        parts.append("\n".join(current))
+    return parts or [""]
+
+
+def format_outline(title: str, url: str, lines: List[str], part: int = 1,
+                   part_chars: int = DEFAULT_PART_CHARS) -> str:
+    parts = split_parts(lines, part_chars)
+    part = min(max(part, 1), len(parts))
+    header = f"Title: {title} | URL: {url} | part {part}/{len(parts)}"
+    if part < len(parts):
+        header += f" (part={part + 1} for more)"
+    return f"{header}\n{parts[part - 1]}"
@@ -0,0 +1,140 @@
+"""
+Adaptive wait after a browser action (instead of an unconditional networkidle).
+
+settle_after(page, action) arms a MutationObserver, listens for main-frame
+navigation requests, runs the action, then waits only for what actually happened:
+- a navigation: until the new document is committed and its DOM is loaded
+- DOM changes: until there was no mutation for `quiet_ms`
+- nothing: returns after `quiet_ms`
+Long-polling / streaming pages are fine (network activity is ignored); a page that
+never stops mutating (animations, tickers) gives up after `max_quiet_wait_ms`.
+"""
+import time
+from dataclasses import dataclass
+
+from playwright.sync_api import Error as PlaywrightError, TimeoutError as PlaywrightTimeoutError
+
+# no DOM mutation for this long = stable
+QUIET_MS = 300
+# cap for waiting on DOM quiescence
+MAX_QUIET_WAIT_MS = 3000
+# cap for the whole wait (navigation included)
+SETTLE_TIMEOUT_MS = 10000
+
+ARM_JS = """() => {
+  window.__agentLastMutation = performance.now();
+  window.__agentMutations = 0;
+  if (!window.__agentObserver) {
+    window.__agentObserver = new MutationObserver(() => {
+      window.__agentLastMutation = performance.now();
+      window.__agentMutations++;
+    });
+    window.__agentObserver.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+  }
+}"""
+# true when quiet, or when the armed document is gone (navigation)
+QUIET_JS = "(quiet) => window.__agentLastMutation === undefined || performance.now() - window.__agentLastMutation >= quiet"
+NEW_DOCUMENT_JS = "() => window.__agentLastMutation === undefined"
+MUTATIONS_JS = "() => window.__agentMutations || 0"
+
+
+@dataclass
+class Settled:
+    outcome: str  # "navigated" | "updated" | "unchanged" | "busy" | "timeout"
+    elapsed_ms: int
+    mutations: int = 0
+
+    def __str__(self):
+        if self.outcome == "navigated":
+            return f"navigated, page loaded in {self.elapsed_ms}ms"
+        if self.outcome == "updated":
+            return f"page updated ({self.mutations} DOM changes), stable after {self.elapsed_ms}ms"
+        if self.outcome == "unchanged":
+            return f"no page change ({self.elapsed_ms}ms)"
+        if self.outcome == "busy":
+            return f"page still changing after {self.elapsed_ms}ms"
+        return f"navigation not finished after {self.elapsed_ms}ms"
+
+
+class _Navigations:
+    """ main-frame navigation requests seen while the action runs """
+
+    def __init__(self, page):
+        self.page = page
+        self.urls = []
+
+    def __call__(self, request):
+        try:
+            if request.is_navigation_request() and request.frame == self.page.main_frame:
+                self.urls.append(request.url)
+        except PlaywrightError:
+            pass  # frame already detached
+
+
+def _elapsed_ms(start: float) -> int:
+    return int((time.monotonic() - start) * 1000)
+
+
+def settle_after(page, action, quiet_ms: int = QUIET_MS, max_quiet_wait_ms: int = MAX_QUIET_WAIT_MS,
+                 timeout_ms: int = SETTLE_TIMEOUT_MS) -> Settled:
+    """ run action() (sync playwright) and wait until the page is stable """
+    navigations = _Navigations(page)
+    page.evaluate(ARM_JS)
+    page.on("request", navigations)
+    start = time.monotonic()
+    try:
+        action()
+        busy = False
+        try:
+            page.wait_for_function(QUIET_JS, arg=quiet_ms, polling=50,
+                                   timeout=min(max_quiet_wait_ms, timeout_ms))
+        except PlaywrightTimeoutError:
+            busy = True
+        except PlaywrightError:  # execution context destroyed: the document was replaced
+            navigations.urls.append(page.url)
+        if navigations.urls:
+            try:
+                page.wait_for_function(NEW_DOCUMENT_JS, polling=50, timeout=max(timeout_ms - _elapsed_ms(start), 1))
+                page.wait_for_load_state("domcontentloaded", timeout=max(timeout_ms - _elapsed_ms(start), 1))
+            except PlaywrightTimeoutError:
+                return Settled("timeout", _elapsed_ms(start))
+            return Settled("navigated", _elapsed_ms(start))
+        mutations = page.evaluate(MUTATIONS_JS)
+    finally:
+        page.remove_listener("request", navigations)
+    if busy:
+        return Settled("busy", _elapsed_ms(start), mutations)
+    return Settled("updated" if mutations else "unchanged", _elapsed_ms(start), mutations)
+
+
+async def asettle_after(page, action, quiet_ms: int = QUIET_MS, max_quiet_wait_ms: int = MAX_QUIET_WAIT_MS,
+                        timeout_ms: int = SETTLE_TIMEOUT_MS) -> Settled:
+    """ await action() (async playwright) and wait until the page is stable """
+    navigations = _Navigations(page)
+    await page.evaluate(ARM_JS)
+    page.on("request", navigations)
+    start = time.monotonic()
+    try:
+        await action()
+        busy = False
+        try:
+            await page.wait_for_function(QUIET_JS, arg=quiet_ms, polling=50,
+                                         timeout=min(max_quiet_wait_ms, timeout_ms))
+        except PlaywrightTimeoutError:
+            busy = True
+        except PlaywrightError:
+            navigations.urls.append(page.url)
+        if navigations.urls:
+            try:
+                await page.wait_for_function(NEW_DOCUMENT_JS, polling=50,
+                                             timeout=max(timeout_ms - _elapsed_ms(start), 1))
+                await page.wait_for_load_state("domcontentloaded", timeout=max(timeout_ms - _elapsed_ms(start), 1))
+            except PlaywrightTimeoutError:
+                return Settled("timeout", _elapsed_ms(start))
+            return Settled("navigated", _elapsed_ms(start))
+        mutations = await page.evaluate(MUTATIONS_JS)
+    finally:
+        page.remove_listener("request", navigations)
+    if busy:
+        return Settled("busy", _elapsed_ms(start), mutations)
+    return Settled("updated" if mutations else "unchanged", _elapsed_ms(start), mutations)
@@ -0,0 +1,97 @@
+"""
+Screenshot pipeline for the web explorer tools.
+
+Images are captured with chromium's Page.captureScreenshot (CDP), which scales,
+clips and encodes (jpeg / png / webp + quality) inside the browser, so the tools
+never decode or re-encode pixels in python and get base64 back directly.
+
+Every image sent is labelled "Screenshot #N" (numbered per session). A capture
+identical to the previous one is answered with "unchanged since screenshot #N"
+instead of the image again; only the last image is compared, since older ones may
+already be pruned from the agent's context.
+"""
+import hashlib
+from typing import Dict, Optional, Tuple
+
+SCREENSHOT_FORMATS = ("jpeg", "png", "webp")
+# longest side of the returned image in pixels (0 = no downscale)
+DEFAULT_MAX_DIMENSION = 1280
+DEFAULT_QUALITY = 70
+
+# -> [scrollX, scrollY, innerWidth, innerHeight, scrollWidth, scrollHeight]
+PAGE_METRICS_JS = """() => [window.scrollX, window.scrollY, window.innerWidth, window.innerHeight,
+  document.documentElement.scrollWidth, document.documentElement.scrollHeight]"""
+
+
+def parse_region(region: str) -> Tuple[float, float, float, float]:
+    """ "x,y,width,height" (css pixels of the viewport) -> tuple """
+    values = [float(v) for v in region.replace(" ", "").split(",")]
+    if len(values) != 4 or values[2] <= 0 or values[3] <= 0:
+        raise ValueError(f"region must be 'x,y,width,height' with a positive size, got {region!r}")
+    return values[0], values[1], values[2], values[3]
+
+
+def capture_params(metrics: list, full_page: bool = False, box: Optional[Tuple[float, float, float, float]] = None,
+                   image_format: str = "jpeg", quality: int = DEFAULT_QUALITY,
+                   max_dimension: int = DEFAULT_MAX_DIMENSION) -> dict:
+    """
+    Page.captureScreenshot parameters.
+    box: viewport-relative (x, y, width, height) of an element / region, else the viewport or full page.
+    """
+    if image_format not in SCREENSHOT_FORMATS:
+        raise ValueError(f"format must be one of {', '.join(SCREENSHOT_FORMATS)}, got {image_format!r}")
+    scroll_x, scroll_y, inner_width, inner_height, scroll_width, scroll_height = metrics
+    if box is not None:
+        x, y, width, height = box[0] + scroll_x, box[1] + scroll_y, box[2], box[3]
+    elif full_page:
+        x, y, width, height = 0, 0, max(scroll_width, inner_width), max(scroll_height, inner_height)
+    else:
+        x, y, width, height = scroll_x, scroll_y, inner_width, inner_height
+    scale = 1.0
+    if max_dimension and max(width, height) > max_dimension:
+        scale = max_dimension / max(width, height)
+    params = {
+        "format": image_format,
+        "clip": {"x": x, "y": y, "width": width, "height": height, "scale": scale},
+        # anything outside the viewport (full page, scrolled-away elements) is rendered too
+        "captureBeyondViewport": True,
+    }
+    if image_format != "png":
+        params["quality"] = max(1, min(int(quality), 100))
+    return params
+
+
+class ScreenshotHistory:
+    """ numbering of the images sent in one session and the hash of the last one """
+
+    def __init__(self):
+        self.count = 0
+        self._last: Optional[str] = None
+
+    def record(self, data: str, force: bool = False) -> Tuple[int, bool]:
+        """ -> (screenshot number, True if it is the last image sent, under that number) """
+        digest = hashlib.sha1(data.encode("ascii")).hexdigest()
+        if not force and digest == self._last:
+            return self.count, True
+        self.count += 1
+        self._last = digest
+        return self.count, False
+
+
+_histories: Dict[str, ScreenshotHistory] = {}
+
+
+def history(session_id: str) -> ScreenshotHistory:
+    return _histories.setdefault(session_id, ScreenshotHistory())
+
+
+def forget(session_id: str):
+    """ drop a session's history (its page was closed) """
+    _histories.pop(session_id, None)
+
+
+def format_result(session_id: str, data: str, params: dict, force: bool = False) -> str:
+    number, unchanged = history(session_id).record(data, force)
+    if unchanged:
+        return f"Screenshot unchanged since screenshot #{number} (identical image, not re-sent; force=True to resend)"
+    return f"Screenshot #{number}\ndata:image/{params['format']};base64,{data}"
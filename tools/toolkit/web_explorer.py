@@ -2,9 +2,18 @@ from tools.decorator import tool
 from typing import Literal
 from browser_manager import get_page, close_page
 from loguru import logger
-import base64
 
-@tool()
+from tools.toolkit.locators import locate
+from tools.toolkit.page_outline import MAX_TEXT_CHARS, OUTLINE_JS, format_outline, reads_only
+from tools.toolkit import screenshots
+from tools.toolkit import action_steps
+from tools.toolkit.page_waits import settle_after
+
+# NOTE: all browser tools are serial -> they share one page per session and the sync
+# playwright api is bound to the thread that started it.
+# async_web_explorer.py has the same tools on playwright.async_api for concurrent sessions.
+
+@tool(serial=True)
 def goto_url(url: str, session_id: str = "default") -> str:
     """Go to a URL and return page title + status."""
     logger.debug(f"[goto_url] url={url}, session_id={session_id}")
@@ -23,16 +32,23 @@ were originally written by me as simple, very general helpers with several easy
 BUT then the unit_tester agent ran tests on them, the tests failed, and it decided to rewrite them into much more sophisticated versions.
 The funny part? I didn't even notice until now, when I came back to remove the answers.
 """
-@tool()
-def get_page_content(mode: Literal["text", "html"] = "text", session_id: str = "default") -> str:
+@tool(serial=True, side_effect_free=reads_only)
+def get_page_content(mode: Literal["text", "html", "outline"] = "text", part: int = 1,
+                     session_id: str = "default") -> str:
     """
     Get the current page content in different formats.
 
     Args:
-        mode: "text" (clean readable text), "html" (full source)
+        mode: "text" (clean readable text), "html" (full source),
+              "outline" (compact: headings, text blocks and interactive elements with ids like [e3]
+              that click_element / fill_input accept; long pages come in parts)
+        part: which part of a long outline to return (1-based)
     """
-    logger.debug(f"[get_page_content] mode={mode}, session_id={session_id}")
+    logger.debug(f"[get_page_content] mode={mode}, part={part}, session_id={session_id}")
     page = get_page(session_id)
+    if mode == "outline":
+        lines = page.evaluate(OUTLINE_JS, MAX_TEXT_CHARS)
+        return format_outline(page.title(), page.url, lines, part)
     if mode == "text":
         return page.locator("body").inner_text()
     elif mode == "html":
@@ -54,45 +70,26 @@ def get_page_content(mode: Literal["text", "html"] = "text", session_id: str = "
     else:
         return "Invalid mode"
 
-@tool()
+@tool(serial=True)
 def click_element(selector: str, session_id: str = "default") -> str:
-    """Click an element by visible text, role, or CSS selector."""
+    """Click an element by outline id (e.g. "e3"), visible text, role, or CSS selector."""
     logger.debug(f"[click_element] selector={selector}, session_id={session_id}")
     page = get_page(session_id)
     try:
-        # Determine the appropriate locator strategy.
-        if selector.startswith("text="):
-            element = page.get_by_text(selector[5:], exact=False)
-        elif selector.startswith("role="):
-            role_part = selector[5:]
-            role_split = role_part.split(" name=")
-            role_name = role_split[0]
-            role_label = role_split[1] if len(role_split) > 1 else None
-            element = page.get_by_role(role_name, name=role_label)
-        else:
-            element = page.locator(selector)
-
-        # Playwright locators expose a `.first` property; our mocks may implement it as a method or not at all.
-        if hasattr(element, "first"):
-            first_attr = getattr(element, "first")
-            # If it's callable (mock method), invoke it.
-            element = first_attr() if callable(first_attr) else first_attr
+        element = locate(page, selector)
 
         # Perform the click if possible.
-        if hasattr(element, "click"):
-            element.click()
-        else:
+        if not hasattr(element, "click"):
             raise AttributeError("Locator does not support click")
 
-        # Wait for navigation/network idle to mimic real behavior.
-        if hasattr(page, "wait_for_load_state"):
-            page.wait_for_load_state("networkidle", timeout=10000)
-        return f"Clicked: {selector} \u2192 New URL: {page.url}"
+        # Wait only for what the click caused (navigation / DOM updates), not for network idle.
+        settled = settle_after(page, element.click)
+        return f"Clicked: {selector} \u2192 New URL: {page.url} ({settled})"
     except Exception as e:
         return f"Failed to click '{selector}': {str(e)}"
 
 # TODO: add tool by name `fill_input` to select input field and write in it
-@tool()
+@tool(serial=True)
 def fill_input(selector: str, value: str, session_id: str = "default") -> str:
     "Fill a form input field."
     # TODO: add tool `screenshot` to take screenshot of current page and return it in format AI can read
@@ -101,21 +98,7 @@ def fill_input(selector: str, value: str, session_id: str = "default") -> str:
     logger.debug(f"[fill_input] selector={selector}, value={value}, session_id={session_id}")
     page = get_page(session_id)
     try:
-        if selector.startswith("text="):
-            element = page.get_by_text(selector[5:], exact=False)
-        elif selector.startswith("role="):
-            role_part = selector[5:]
-            role_split = role_part.split(" name=")
-            role_name = role_split[0]
-            role_label = role_split[1] if len(role_split) > 1 else None
-            element = page.get_by_role(role_name, name=role_label)
-        else:
-            element = page.locator(selector)
-
-        if hasattr(element, "first"):
-            first_attr = getattr(element, "first")
-            element = first_attr() if callable(first_attr) else first_attr
-
+        element = locate(page, selector)
         if hasattr(element, "fill"):
             element.fill(value)
         else:
@@ -125,24 +108,112 @@ def fill_input(selector: str, value: str, session_id: str = "default") -> str:
     except Exception as e:
         return f"Failed to fill input '{selector}': {str(e)}"
     
-@tool()
-def screenshot(full_page: bool = False, session_id: str = "default") -> str:
-    "Take a screenshot of the current page and return as base64."
-    logger.debug(f"[screenshot] full_page={full_page}, session_id={session_id}")
+@tool(serial=True)
+def screenshot(full_page: bool = False, selector: str = None, region: str = None,
+               max_dimension: int = screenshots.DEFAULT_MAX_DIMENSION,
+               image_format: Literal["jpeg", "png", "webp"] = "jpeg",
+               quality: int = screenshots.DEFAULT_QUALITY, force: bool = False,
+               session_id: str = "default") -> str:
+    """
+    Take a screenshot of the current page (or of one element / region) and return it as a base64 data URI
+    on the line after its label "Screenshot #N" (numbered per session). An image identical to the previous
+    screenshot is not sent again, the result names that screenshot instead.
+
+    Args:
+        selector: only this element (outline id, text=, role= or CSS selector)
+        region: only this part of the viewport, "x,y,width,height" in CSS pixels
+        max_dimension: downscale so the longest side is at most this many pixels (0 = full size)
+        image_format: "jpeg" / "webp" (with quality 1-100) are much smaller than "png"
+        force: send the image even if it is unchanged
+    """
+    logger.debug(f"[screenshot] full_page={full_page}, selector={selector}, region={region}, "
+                 f"max_dimension={max_dimension}, image_format={image_format}, session_id={session_id}")
     page = get_page(session_id)
     try:
-        img_bytes = page.screenshot(full_page=full_page)
-        b64 = base64.b64encode(img_bytes).decode("utf-8")
-        return f"data:image/png;base64,{b64}"
+        box = None
+        if selector:
+            bounding = locate(page, selector).bounding_box()
+            if bounding is None:
+                return f"Failed to take screenshot: '{selector}' is not visible"
+            box = (bounding["x"], bounding["y"], bounding["width"], bounding["height"])
+        elif region:
+            box = screenshots.parse_region(region)
+        params = screenshots.capture_params(page.evaluate(screenshots.PAGE_METRICS_JS), full_page, box,
+                                            image_format, quality, max_dimension)
+        cdp = page.context.new_cdp_session(page)
+        try:
+            data = cdp.send("Page.captureScreenshot", params)["data"]
+        finally:
+            cdp.detach()
+        return screenshots.format_result(session_id, data, params, force)
     except Exception as e:
         return f"Failed to take screenshot: {str(e)}"
+
+
+def _run_step(page, step: dict) -> str:
+    action = step["action"]
+    if action == "goto":
+        response = page.goto(step["url"], wait_until="domcontentloaded")
+        return f"{page.title()} (HTTP {response.status if response else 'unknown'})"
+    if action == "click":
+        return str(settle_after(page, locate(page, step["selector"]).click))
+    if action == "fill":
+        locate(page, step["selector"]).fill(str(step["value"]))
+        return "ok"
+    if action == "press":
+        return str(settle_after(page, lambda: locate(page, step["selector"]).press(step["key"])))
+    if action == "wait_for":
+        locate(page, step["selector"]).wait_for(state="visible", timeout=step.get("timeout", 10000))
+        return "ok"
+    mode = step.get("mode", "outline")
+    if mode == "outline":
+        return format_outline(page.title(), page.url, page.evaluate(OUTLINE_JS, MAX_TEXT_CHARS), step.get("part", 1))
+    if mode == "html":
+        return page.content()
+    return page.locator("body").inner_text()
+
+
+@tool(serial=True)
+def browser_actions(steps: list, stop_on_error: bool = True, session_id: str = "default") -> str:
+    """
+    Run several browser steps in order in one call (e.g. a login: goto, fill, fill, click, content)
+    and return one short result line per step. Steps are json objects:
+        {"action": "goto", "url": "..."}
+        {"action": "click", "selector": "..."}
+        {"action": "fill", "selector": "...", "value": "..."}
+        {"action": "press", "selector": "...", "key": "Enter"}
+        {"action": "wait_for", "selector": "..."}
+        {"action": "content", "mode": "outline" | "text" | "html", "part": 1}
+    Selectors work as in click_element. Stops at the first failing step unless stop_on_error is false.
+    """
+    logger.debug(f"[browser_actions] steps={len(steps)}, session_id={session_id}")
+    try:
+        parsed = action_steps.parse_steps(steps)
+    except ValueError as e:
+        return f"Invalid steps: {e}"
+    try:
+        page = get_page(session_id)
+    except Exception as e:
+        return f"Failed to get the page: {action_steps.error_line(e)}"
+    results, failed = [], False
+    for step in parsed:
+        try:
+            results.append(_run_step(page, step))
+        except Exception as e:
+            failed = True
+            results.append(f"FAILED: {action_steps.error_line(e)}")
+            if stop_on_error:
+                break
+    return action_steps.format_results(parsed, results, failed)
+
 # TODO: add tool `end_browsing_page` to close page -> return string represent state (i.e error | success etc...)
-@tool()
+@tool(serial=True)
 def end_browsing_page(session_id: str = "default") -> str:
     "Close the page (use only when done browsing)."
     logger.debug(f"[end_browsing_page] session_id={session_id}")
     try:
         close_page(session_id)
+        screenshots.forget(session_id)
         return f"Closed browser page for session '{session_id}'"
     except Exception as e:
         return f"Failed to close page: {str(e)}"
\ No newline at end of file